@@ -1,4 +1,4 @@
 """API routes module initialization."""
-from app.api.routes import audits, stats
+from app.api.routes import audits, issues, stats
 
-__all__ = ["audits", "stats"]
+__all__ = ["audits", "issues", "stats"]
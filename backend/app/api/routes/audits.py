@@ -1,23 +1,62 @@
 """
 API routes for repository audits.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, load_only, selectinload
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import asyncio
+import base64
+import hashlib
+import json
 import re
+import uuid
 
-from app.core.database import get_db
-from app.models import Repository, Audit, AuditStatus
+from app.core.config import settings
+from app.core.coalescing import find_duplicate_audit, find_in_flight_audits, lock_audit_key, lock_audit_keys
+from app.core.database import AsyncSessionLocal, get_async_db
+from app.core.response_cache import CachedResponse, cache_generation, invalidate_response, load_response, store_response
+from app.core.purge import delete_audits, publish_deleted, purge_conditions
+from app.core.task_queue import PROCESS_REPOSITORY_AUDIT, PURGE_FINISHED_AUDITS, send_task, send_task_group, task_finished, task_signature
+from app.core.tracing import annotate_span, traced
+from app.core.export import EXPORT_FORMATS, MEDIA_TYPES, SARIF_COLUMNS, encode_chunks, ndjson_lines, sarif_parts, stream_issue_rows
+from app.core.events import ALL_AUDITS_CHANNEL, PROGRESS_FIELDS, audit_channel, event_hub, format_sse, progress_payload
+from app.models import Repository, Audit, Issue, AuditStatus, FINISHED_STATUSES, issue_load_columns
 from app.schemas import (
     RepositoryCreate,
+    BulkAuditCreate,
+    AuditPurgeRequest,
+    AuditResumeRequest,
     AuditCreateResponse,
+    BulkAuditRejection,
+    BulkAuditCreateResponse,
+    AuditPurgeResponse,
+    AuditBatchStatusResponse,
     AuditResponse,
     AuditDetailResponse,
+    IssueResponse,
+    IssuePageResponse,
+    LogPageResponse,
+    RepositoryResponse,
 )
-from worker.tasks.audit_task import process_repository_audit
+from worker.routing import estimate_repository_size, resolve_head_commit, select_queue, owner_priority_async
 
 router = APIRouter(prefix="/api/audits", tags=["audits"])
 
+FINISHED_STATUS_VALUES = tuple(status.value for status in FINISHED_STATUSES)
+
+DETAIL_INCLUDES = ("repository", "issues", "logs")
+ISSUE_FIELDS = tuple(IssueResponse.model_fields)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx)
+}
+
 
 def parse_github_url(url: str) -> tuple:
     """Parse GitHub URL to extract owner and repo name."""
@@ -38,9 +77,11 @@ def parse_github_url(url: str) -> tuple:
 
 
 @router.post("/", response_model=AuditCreateResponse, status_code=status.HTTP_201_CREATED)
+@traced("create_audit")
 async def create_audit(
     repo_data: RepositoryCreate,
-    db: Session = Depends(get_db)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new repository audit job.
@@ -48,8 +89,11 @@ async def create_audit(
     This endpoint:
     1. Validates the GitHub URL
     2. Creates or retrieves the repository record
-    3. Creates an audit job
-    4. Queues the job for processing
+    3. Resolves the branch HEAD and, unless `force` is set, returns an
+       in-flight or completed audit of the same commit instead (200)
+    4. Creates an audit job
+    5. Queues the job for processing, on the small or large queue
+       depending on the estimated repository size
     """
     try:
         # Parse GitHub URL
@@ -61,7 +105,7 @@ async def create_audit(
         )
     
     # Check if repository exists
-    repository = db.query(Repository).filter(Repository.url == repo_data.url).first()
+    repository = await db.scalar(select(Repository).where(Repository.url == repo_data.url))
     
     if not repository:
         # Create new repository
@@ -72,31 +116,71 @@ async def create_audit(
             branch=repo_data.branch
         )
         db.add(repository)
-        db.commit()
-        db.refresh(repository)
+        await db.commit()
+        await db.refresh(repository)
+    
+    branch = repository.branch
+    commit_sha = await run_in_threadpool(resolve_head_commit, owner, name, branch, repo_data.github_token)
+    
+    # Held until the new audit is committed, so concurrent duplicates see it
+    await lock_audit_key(db, repository.id, branch)
+    
+    if not repo_data.force:
+        duplicate = await find_duplicate_audit(db, repository.id, branch, commit_sha)
+        if duplicate is not None:
+            await db.commit()  # Release the lock
+            response.status_code = status.HTTP_200_OK
+            finished = duplicate.status == AuditStatus.COMPLETED
+            annotate_span({"audit.id": duplicate.id, "audit.coalesced": True})
+            return AuditCreateResponse(
+                audit_id=duplicate.id,
+                task_id=duplicate.task_id,
+                status=duplicate.status,
+                message=(
+                    f"{owner}/{name}@{branch} was already audited at this commit (audit {duplicate.id})."
+                    if finished else
+                    f"An audit of {owner}/{name}@{branch} is already in progress (audit {duplicate.id})."
+                ),
+                coalesced=True,
+            )
     
     # Create audit job
     audit = Audit(
         repository_id=repository.id,
-        status=AuditStatus.PENDING
+        status=AuditStatus.PENDING,
+        branch=branch,
+        commit_sha=commit_sha,
+        fanout=repo_data.fanout,
     )
     db.add(audit)
-    db.commit()
-    db.refresh(audit)
+    await db.commit()
+    await db.refresh(audit)
+    annotate_span({"audit.id": audit.id})
+    
+    # Route by estimated size and owner load (GitHub and broker calls block, so run them in the threadpool)
+    estimate = await run_in_threadpool(estimate_repository_size, owner, name, repository.branch, repo_data.github_token)
+    queue = select_queue(estimate)
+    priority = await owner_priority_async(db, owner, exclude_audit_id=audit.id)
     
     # Queue the audit task
     try:
-        task = process_repository_audit.delay(audit.id, repo_data.github_token, repo_data.gemini_api_key)
+        task = await run_in_threadpool(
+            send_task,
+            PROCESS_REPOSITORY_AUDIT,
+            args=(audit.id, repo_data.github_token, repo_data.gemini_api_key),
+            queue=queue,
+            priority=priority,
+        )
         # Update audit with task ID
         audit.task_id = task.id
-        db.commit()
+        await db.commit()
     except Exception as e:
         # Graceful failure if Redis/Queue is down
         import logging
         logging.error(f"Failed to queue task: {str(e)}")
         audit.status = AuditStatus.FAILED
         audit.error_message = f"Queue Error: {str(e)}"
-        db.commit()
+        await db.commit()
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Task queue is currently unavailable. Please check backend logs."
@@ -110,28 +194,693 @@ async def create_audit(
     )
 
 
+async def upsert_repositories(db: AsyncSession, repositories: dict) -> dict:
+    """
+    Insert missing repositories with one statement and load all of them.
+    
+    Args:
+        repositories: (owner, name, branch) per URL
+        
+    Returns:
+        Repository rows keyed by URL
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+    
+    if insert is not None:
+        await db.execute(
+            insert(Repository)
+            .values([
+                {"url": url, "owner": owner, "name": name, "branch": branch}
+                for url, (owner, name, branch) in repositories.items()
+            ])
+            .on_conflict_do_nothing(index_elements=[Repository.url])
+        )
+    
+    existing = {
+        repository.url: repository
+        for repository in await db.scalars(select(Repository).where(Repository.url.in_(repositories)))
+    }
+    if insert is None:
+        for url, (owner, name, branch) in repositories.items():
+            if url not in existing:
+                existing[url] = Repository(url=url, owner=owner, name=name, branch=branch)
+                db.add(existing[url])
+        await db.flush()
+    return existing
+
+
+@router.post("/batch", response_model=BulkAuditCreateResponse, status_code=status.HTTP_201_CREATED)
+@traced("create_audit_batch")
+async def create_audit_batch(
+    batch_data: BulkAuditCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Audit many repositories (e.g. a whole organization) in one request.
+    
+    Repositories are upserted and audits created in a single transaction,
+    and all tasks are published as one Celery group whose ID is the batch
+    ID. Track the batch with GET /api/audits/batch/{batch_id}, or list its
+    audits with GET /api/audits/?batch_id=...
+    
+    Unless `force` is set, a repository branch with an audit already in
+    progress is not audited again; that audit is returned instead
+    (coalesced). Batch audits skip the per-repository size estimate and
+    run on the large queue.
+    """
+    if len(batch_data.repositories) > settings.BULK_AUDIT_MAX_REPOSITORIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_AUDIT_MAX_REPOSITORIES} repositories per batch"
+        )
+    
+    requested = {}
+    rejected = []
+    for item in batch_data.repositories:
+        try:
+            owner, name = parse_github_url(item.url)
+        except ValueError as e:
+            rejected.append(BulkAuditRejection(url=item.url, error=str(e)))
+            continue
+        requested.setdefault(item.url, (owner, name, item.branch))
+    
+    batch_id = uuid.uuid4().hex
+    annotate_span({"audit.batch_id": batch_id})
+    results = []  # In request order: coalesced responses and (audit, repository) pairs
+    new_audits = []
+    
+    if requested:
+        repositories = await upsert_repositories(db, requested)
+        keys = [(repository.id, repository.branch) for repository in repositories.values()]
+        
+        # Held until the audits are committed, like create_audit
+        await lock_audit_keys(db, keys)
+        in_flight = {} if batch_data.force else await find_in_flight_audits(db, keys)
+        
+        priorities = {}
+        for owner in {repository.owner for repository in repositories.values()}:
+            priorities[owner] = await owner_priority_async(db, owner)
+        
+        for url in requested:
+            repository = repositories[url]
+            duplicate = in_flight.get((repository.id, repository.branch))
+            if duplicate is not None:
+                results.append(AuditCreateResponse(
+                    audit_id=duplicate.id,
+                    task_id=duplicate.task_id,
+                    status=duplicate.status,
+                    message=f"An audit of {repository.owner}/{repository.name}@{repository.branch} is already in progress (audit {duplicate.id}).",
+                    coalesced=True,
+                ))
+                continue
+            
+            # Task IDs are assigned up front, so the audits are complete in one commit
+            audit = Audit(
+                repository_id=repository.id,
+                status=AuditStatus.PENDING,
+                branch=repository.branch,
+                batch_id=batch_id,
+                task_id=str(uuid.uuid4()),
+                fanout=batch_data.fanout,
+            )
+            db.add(audit)
+            new_audits.append((audit, repository))
+            results.append((audit, repository))
+        
+        await db.commit()
+    
+    if new_audits:
+        signatures = [
+            task_signature(
+                PROCESS_REPOSITORY_AUDIT,
+                args=(audit.id, batch_data.github_token, batch_data.gemini_api_key),
+                queue=settings.AUDIT_LARGE_QUEUE,
+                priority=priorities[repository.owner],
+                task_id=audit.task_id,
+            )
+            for audit, repository in new_audits
+        ]
+        try:
+            # One group: all messages go out over a single producer connection
+            await run_in_threadpool(send_task_group, signatures, group_id=batch_id)
+        except Exception as e:
+            import logging
+            logging.error(f"Failed to queue batch {batch_id}: {str(e)}")
+            for audit, _ in new_audits:
+                audit.status = AuditStatus.FAILED
+                audit.error_message = f"Queue Error: {str(e)}"
+            await db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Task queue is currently unavailable. Please check backend logs."
+            )
+    
+    return BulkAuditCreateResponse(
+        batch_id=batch_id,
+        audits=[
+            result if isinstance(result, AuditCreateResponse) else AuditCreateResponse(
+                audit_id=result[0].id,
+                task_id=result[0].task_id,
+                status=result[0].status,
+                message=f"Audit job created for {result[1].owner}/{result[1].name}. Processing started.",
+            )
+            for result in results
+        ],
+        created=len(new_audits),
+        coalesced=len(results) - len(new_audits),
+        rejected=rejected,
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=AuditBatchStatusResponse)
+async def get_audit_batch(
+    batch_id: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Aggregated progress of the audits created by a bulk request, in one query.
+    """
+    rows = (await db.execute(
+        select(
+            Audit.status,
+            func.count(Audit.id),
+            func.coalesce(func.sum(Audit.total_files), 0),
+            func.coalesce(func.sum(Audit.processed_files), 0),
+            func.coalesce(func.sum(Audit.issues_found), 0),
+            func.coalesce(func.sum(Audit.fixes_applied), 0),
+            func.count(Audit.pr_url),
+        )
+        .where(Audit.batch_id == batch_id)
+        .group_by(Audit.status)
+    )).all()
+    
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Batch {batch_id} not found"
+        )
+    
+    totals = [sum(row[i] for row in rows) for i in range(1, 7)]
+    finished = sum(row[1] for row in rows if row[0] in FINISHED_STATUS_VALUES)
+    
+    return AuditBatchStatusResponse(
+        batch_id=batch_id,
+        total_audits=totals[0],
+        status_counts={row[0].value: row[1] for row in rows},
+        finished=finished == totals[0],
+        progress=round(100.0 * finished / totals[0], 1),
+        total_files=totals[1],
+        processed_files=totals[2],
+        issues_found=totals[3],
+        fixes_applied=totals[4],
+        prs_created=totals[5],
+    )
+
+
+def encode_cursor(audit: Audit) -> str:
+    """Opaque keyset cursor pointing just past the given audit."""
+    raw = json.dumps([audit.created_at.isoformat(), audit.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor from encode_cursor into (created_at, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, audit_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(audit_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
 @router.get("/", response_model=List[AuditResponse])
 async def list_audits(
-    skip: int = 0,
-    limit: int = 50,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    status_filter: Optional[AuditStatus] = Query(None, alias="status"),
+    repository_id: Optional[int] = None,
+    batch_id: Optional[str] = None,
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List all audit jobs with pagination.
+    List audit jobs, newest first, with keyset pagination.
+    
+    Pass the X-Next-Cursor response header (also in the Link header) back as
+    ``cursor`` to fetch the next page; it is absent on the last page. Each page
+    is an index range scan on (created_at, id), so deep pages cost the same as
+    the first. ``skip`` is the old offset pagination, kept for compatibility.
+    
+    Args:
+        cursor: Cursor from the previous page
+        limit: Page size
+        status: Only audits in this status
+        repository_id: Only audits of this repository
+        batch_id: Only audits created by this bulk request
+        skip: Deprecated offset, ignored when a cursor is given
     """
-    audits = db.query(Audit).order_by(Audit.created_at.desc()).offset(skip).limit(limit).all()
+    query = select(Audit).options(defer(Audit.logs))
+    
+    if status_filter is not None:
+        query = query.where(Audit.status == status_filter)
+    if repository_id is not None:
+        query = query.where(Audit.repository_id == repository_id)
+    if batch_id is not None:
+        query = query.where(Audit.batch_id == batch_id)
+    
+    if cursor:
+        created_at, audit_id = decode_cursor(cursor)
+        query = query.where(tuple_(Audit.created_at, Audit.id) < tuple_(created_at, audit_id))
+    elif skip:
+        query = query.offset(skip)
+    
+    # One extra row tells whether there is a next page
+    audits = (await db.scalars(
+        query.order_by(Audit.created_at.desc(), Audit.id.desc()).limit(limit + 1)
+    )).all()
+    
+    if len(audits) > limit:
+        audits = audits[:limit]
+        next_cursor = encode_cursor(audits[-1])
+        next_url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    
     return audits
 
 
+def parse_csv_param(value: Optional[str], allowed: tuple, name: str) -> Optional[set]:
+    """Parse a comma-separated query parameter, rejecting unknown names."""
+    if value is None:
+        return None
+    items = {item.strip() for item in value.split(",") if item.strip()}
+    unknown = items - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {name}: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        )
+    return items
+
+
+async def read_snapshot(db: AsyncSession):
+    """Read the audit and its issues from one consistent snapshot, so the body matches its ETag."""
+    if db.bind.dialect.name == "postgresql":
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+async def get_audit_version(db: AsyncSession, audit_id: int) -> int:
+    """Return the audit's version counter, or raise 404."""
+    version = await db.scalar(select(Audit.version).where(Audit.id == audit_id))
+    if version is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Audit with ID {audit_id} not found"
+        )
+    return version
+
+
+def request_variant(request: Request) -> str:
+    """Short hash identifying the representation selected by the query string."""
+    return hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:12]
+
+
+def make_etag(audit_id: int, version: int, request: Request) -> str:
+    """Strong ETag for one representation: audit version plus the query string."""
+    return f'"audit-{audit_id}-v{version}-{request_variant(request)}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match header covers this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """304 response for a conditional GET."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def cached_response(request: Request, audit_id: int, entry: CachedResponse) -> Response:
+    """
+    Serve a cached detail response without touching the database.
+    
+    Completed audits may be cached by browsers and CDNs; failed audits can
+    still be resumed, so clients revalidate them with their ETag.
+    """
+    etag = make_etag(audit_id, entry.version, request)
+    cache_control = f"public, max-age={settings.RESPONSE_CACHE_MAX_AGE}" if entry.immutable else "no-cache"
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": cache_control})
+    
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    if entry.compressed and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.body, media_type="application/json", headers=headers)
+    return Response(entry.plain_body(), media_type="application/json", headers=headers)
+
+
+def issue_statement(audit_id: int, fields: Optional[set]):
+    """SELECT an audit's issues, loading only the requested columns."""
+    statement = select(Issue).where(Issue.audit_id == audit_id).order_by(Issue.id)
+    if fields is not None:
+        statement = statement.options(load_only(*issue_load_columns(fields)))
+    return statement
+
+
+def serialize_issues(issues, fields: Optional[set]) -> List[dict]:
+    """Serialize issues, leaving out fields that were not requested."""
+    if fields is None:
+        return [IssueResponse.model_validate(issue).model_dump(mode="json") for issue in issues]
+    fields = fields | {"id"}
+    return [
+        IssueResponse.model_construct(**{field: getattr(issue, field) for field in fields}).model_dump(mode="json", include=fields)
+        for issue in issues
+    ]
+
+
+async def load_progress(audit_id: int) -> Optional[dict]:
+    """Read the current status and counters of an audit."""
+    async with AsyncSessionLocal() as db:
+        columns = [Audit.id] + [getattr(Audit, field) for field in PROGRESS_FIELDS]
+        row = (await db.execute(select(*columns).where(Audit.id == audit_id))).first()
+        return progress_payload(row) if row else None
+
+
+async def audit_event_stream(request: Request, channel: str, queue: asyncio.Queue, snapshot: dict = None, audit_id: int = None):
+    """
+    Relay events from the hub to one Server-Sent Events client.
+    
+    For a single audit, idle heartbeats also re-read the audit's counters, so
+    the stream recovers from lost pub/sub messages and still reports progress
+    when no event backend is configured. The stream ends with an "end" event
+    once the audit has completed or failed.
+    """
+    last_progress = None
+    try:
+        if snapshot is not None:
+            yield format_sse("snapshot", snapshot)
+            last_progress = {field: snapshot.get(field) for field in PROGRESS_FIELDS}
+            last_progress["audit_id"] = audit_id
+            if snapshot["status"] in FINISHED_STATUS_VALUES:
+                yield format_sse("end", {"audit_id": audit_id, "status": snapshot["status"]})
+                return
+        
+        while not await request.is_disconnected():
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if audit_id is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                progress = await load_progress(audit_id)
+                if progress is None:
+                    yield format_sse("end", {"audit_id": audit_id, "status": None})
+                    return
+                if progress != last_progress:
+                    message = {"type": "progress", "data": progress}
+                else:
+                    yield ": keep-alive\n\n"
+                    continue
+            
+            event_type, data = message["type"], message["data"]
+            if event_type in ("status", "progress"):
+                last_progress = data
+            yield format_sse(event_type, data)
+            
+            if audit_id is not None and event_type == "deleted":
+                yield format_sse("end", {"audit_id": audit_id, "status": None})
+                return
+            
+            if audit_id is not None and event_type in ("status", "progress") and data.get("status") in FINISHED_STATUS_VALUES:
+                yield format_sse("end", {"audit_id": audit_id, "status": data["status"]})
+                return
+    finally:
+        await event_hub.unsubscribe(channel, queue)
+
+
+@router.get("/events")
+async def stream_all_audit_events(request: Request):
+    """
+    Stream status transitions and progress counters of all audits (SSE).
+    
+    Used by dashboards instead of polling the audit list and statistics.
+    """
+    queue = await event_hub.subscribe(ALL_AUDITS_CHANNEL)
+    return StreamingResponse(
+        audit_event_stream(request, ALL_AUDITS_CHANNEL, queue),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.get("/{audit_id}/events")
+async def stream_audit_events(
+    audit_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream live events of an audit as Server-Sent Events.
+    
+    The first event is a "snapshot" of the audit (status, counters and the
+    logs so far). It is followed by "status", "progress", "log" and "issue"
+    events as the worker commits them, and an "end" event when the audit
+    has completed, failed or been deleted.
+    """
+    channel = audit_channel(audit_id)
+    # Subscribe before reading the snapshot so no event falls in between
+    queue = await event_hub.subscribe(channel)
+    
+    audit = await db.get(Audit, audit_id)
+    
+    if not audit:
+        await event_hub.unsubscribe(channel, queue)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Audit with ID {audit_id} not found"
+        )
+    
+    snapshot = AuditResponse.model_validate(audit).model_dump(mode="json")
+    snapshot["logs"] = audit.logs or []
+    await db.close()  # Don't hold a connection for the lifetime of the stream
+    
+    return StreamingResponse(
+        audit_event_stream(request, channel, queue, snapshot=snapshot, audit_id=audit_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.get("/{audit_id}", response_model=AuditDetailResponse)
 async def get_audit(
     audit_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    include: Optional[str] = Query(default=None, description="Sub-resources to embed: repository,issues,logs (default: all)"),
+    fields: Optional[str] = Query(default=None, description="Issue fields to return, e.g. id,file_path,severity,description"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get detailed information about a specific audit job.
+    
+    Responses carry a strong ETag derived from the audit's version counter;
+    repeating the request with If-None-Match returns 304 when nothing changed.
+    Use `include` and `fields` to leave out heavy parts (logs, code blocks),
+    or the paginated /issues and /logs sub-resources for large audits.
+    
+    Completed and failed audits are served from the response cache as
+    pre-serialized (gzip) bytes until they are deleted or resumed. A failed
+    fan-out audit is cached only once its shards have stopped updating it.
+    """
+    includes = parse_csv_param(include, DETAIL_INCLUDES, "include")
+    includes = set(DETAIL_INCLUDES) if includes is None else includes
+    issue_fields = parse_csv_param(fields, ISSUE_FIELDS, "fields")
+    
+    # Finished audits are served from the response cache
+    variant = request_variant(request)
+    cached = await load_response(audit_id, variant)
+    if cached is not None:
+        return cached_response(request, audit_id, cached)
+    generation = cache_generation(audit_id)
+    
+    await read_snapshot(db)
+    version = await get_audit_version(db, audit_id)
+    etag = make_etag(audit_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    statement = select(Audit).where(Audit.id == audit_id)
+    if "logs" not in includes:
+        statement = statement.options(defer(Audit.logs))
+    if "repository" in includes:
+        statement = statement.options(selectinload(Audit.repository))
+    audit = await db.scalar(statement)
+    
+    body = AuditResponse.model_validate(audit).model_dump(mode="json")
+    if "repository" in includes:
+        body["repository"] = RepositoryResponse.model_validate(audit.repository).model_dump(mode="json")
+    if "issues" in includes:
+        issues = await db.scalars(issue_statement(audit_id, issue_fields))
+        body["issues"] = serialize_issues(issues, issue_fields)
+    if "logs" in includes:
+        body["logs"] = audit.logs or []
+    
+    # Shards of a failed fan-out audit keep counting until its chord finishes
+    if audit.status in FINISHED_STATUS_VALUES and audit.chord_id is None:
+        entry = CachedResponse.build(
+            version,
+            json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode(),
+            immutable=audit.status == AuditStatus.COMPLETED,
+        )
+        await store_response(audit_id, variant, entry, generation)
+        return cached_response(request, audit_id, entry)
+    
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@router.get("/{audit_id}/issues", response_model=IssuePageResponse)
+async def list_audit_issues(
+    audit_id: int,
+    request: Request,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    fields: Optional[str] = Query(default=None, description="Issue fields to return, e.g. id,file_path,severity,description"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List the issues of an audit, one page at a time (ordered by ID).
+    """
+    issue_fields = parse_csv_param(fields, ISSUE_FIELDS, "fields")
+    
+    await read_snapshot(db)
+    version = await get_audit_version(db, audit_id)
+    etag = make_etag(audit_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    total = await db.scalar(select(func.count(Issue.id)).where(Issue.audit_id == audit_id))
+    issues = await db.scalars(issue_statement(audit_id, issue_fields).offset(offset).limit(limit))
+    
+    body = {
+        "items": serialize_issues(issues, issue_fields),
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+    }
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@router.get("/{audit_id}/logs", response_model=LogPageResponse)
+async def list_audit_logs(
+    audit_id: int,
+    request: Request,
+    offset: int = Query(default=0, ge=0, description="Number of entries to skip (e.g. the count already received)"),
+    limit: int = Query(default=200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List the log entries of an audit, one page at a time (oldest first).
+    """
+    await read_snapshot(db)
+    version = await get_audit_version(db, audit_id)
+    etag = make_etag(audit_id, version, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    logs = await db.scalar(select(Audit.logs).where(Audit.id == audit_id)) or []
+    
+    body = {
+        "items": logs[offset:offset + limit],
+        "total": len(logs),
+        "offset": offset,
+        "limit": limit,
+    }
+    return JSONResponse(body, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+@router.get("/{audit_id}/export")
+async def export_audit_issues(
+    audit_id: int,
+    request: Request,
+    format: str = Query(default="ndjson", pattern=f"^({'|'.join(EXPORT_FORMATS)})$", description="ndjson or sarif (SARIF 2.1.0)"),
+    fields: Optional[str] = Query(default=None, description="Issue fields of each NDJSON line, e.g. id,file_path,severity,description"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Export all issues of an audit as a stream (NDJSON or SARIF 2.1.0).
+    
+    Issues are read from a server-side cursor and written as they arrive, so
+    memory use does not grow with the audit; use this instead of the detail
+    endpoint to feed findings into other tools. The body is gzip-compressed
+    on the fly when the request sends Accept-Encoding: gzip.
+    """
+    issue_fields = parse_csv_param(fields, ISSUE_FIELDS, "fields")
+    
+    audit = await db.scalar(
+        select(Audit).options(defer(Audit.logs), selectinload(Audit.repository)).where(Audit.id == audit_id)
+    )
+    if not audit:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Audit with ID {audit_id} not found"
+        )
+    await db.close()  # The stream reads through its own session
+    
+    if format == "sarif":
+        parts = sarif_parts(audit, stream_issue_rows(audit_id, SARIF_COLUMNS))
+    else:
+        columns = ISSUE_FIELDS if issue_fields is None else issue_fields
+        parts = ndjson_lines(
+            stream_issue_rows(audit_id, columns),
+            lambda row: serialize_issues([row], issue_fields)[0],
+        )
+    
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="audit-{audit_id}-issues.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(encode_chunks(parts, compress), media_type=MEDIA_TYPES[format], headers=headers)
+
+
+@router.post("/{audit_id}/resume", response_model=AuditCreateResponse)
+@traced("resume_audit")
+async def resume_audit(
+    audit_id: int,
+    resume_data: Optional[AuditResumeRequest] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+    Resume an interrupted or failed audit.
+    
+    Files already analyzed (checkpointed) are skipped, so only the
+    remaining work is sent to the AI. Failed audits can be resumed once
+    their shards (if any) have stopped; in-flight audits only if the task
+    driving them has finished without finishing the audit, e.g. after
+    being killed by the hard time limit. Anything else would run two
+    audit tasks side by side.
+    """
+    # Locked until the new task ID is committed, so concurrent resumes queue one task
+    audit = await db.scalar(
+        select(Audit).options(defer(Audit.logs), selectinload(Audit.repository))
+        .where(Audit.id == audit_id).with_for_update()
+    )
     
     if not audit:
         raise HTTPException(
@@ -139,26 +888,160 @@ async def get_audit(
             detail=f"Audit with ID {audit_id} not found"
         )
     
-    return audit
+    if audit.status == AuditStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Audit {audit_id} is already completed"
+        )
+    
+    # A fan-out audit is driven by the chord of its shards once they are dispatched
+    driving_task = audit.chord_id or (audit.task_id if audit.status != AuditStatus.FAILED else None)
+    try:
+        running = driving_task is not None and not await run_in_threadpool(task_finished, driving_task)
+    except Exception as e:
+        import logging
+        logging.error(f"Failed to check task {driving_task}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Task queue is currently unavailable. Please check backend logs."
+        )
+    if running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Audit {audit_id} is still queued or running"
+        )
+    
+    resume_data = resume_data or AuditResumeRequest()
+    annotate_span({"audit.id": audit.id})
+    
+    # Route on the file count discovered by the interrupted run, if any
+    queue = select_queue((audit.total_files, 0) if audit.total_files else None)
+    
+    priority = await owner_priority_async(db, audit.repository.owner, exclude_audit_id=audit.id)
+    
+    # The task ID is assigned up front, so the audit is re-queued in one commit
+    audit.task_id = str(uuid.uuid4())
+    audit.chord_id = None
+    audit.status = AuditStatus.PENDING
+    audit.error_message = None
+    await db.commit()
+    await invalidate_response(audit_id)
+    
+    try:
+        await run_in_threadpool(
+            send_task,
+            PROCESS_REPOSITORY_AUDIT,
+            args=(audit.id, resume_data.github_token, resume_data.gemini_api_key),
+            queue=queue,
+            priority=priority,
+            task_id=audit.task_id,
+        )
+    except Exception as e:
+        import logging
+        logging.error(f"Failed to queue task: {str(e)}")
+        audit.status = AuditStatus.FAILED
+        audit.error_message = f"Queue Error: {str(e)}"
+        await db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Task queue is currently unavailable. Please check backend logs."
+        )
+    
+    return AuditCreateResponse(
+        audit_id=audit.id,
+        task_id=audit.task_id,
+        status=audit.status,
+        message=f"Audit {audit.id} re-queued. Already analyzed files will be skipped."
+    )
 
 
 @router.delete("/{audit_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_audit(
     audit_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete an audit job and all associated issues.
+    
+    Issues and checkpoints are removed with set-based DELETEs, so audits
+    with tens of thousands of issues are deleted without loading them.
     """
-    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+    deleted = await db.run_sync(delete_audits, [audit_id])
     
-    if not audit:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Audit with ID {audit_id} not found"
         )
     
-    db.delete(audit)
-    db.commit()
+    await db.commit()
+    await invalidate_response(audit_id)
+    await run_in_threadpool(publish_deleted, [audit_id])
     
     return None
+
+
+@router.post("/purge", response_model=AuditPurgeResponse)
+async def purge_audits_endpoint(
+    purge_data: AuditPurgeRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete finished (completed or failed) audits in bulk.
+    
+    Select audits by age (`older_than_days`), repository, or both. Purges of
+    up to AUDIT_PURGE_INLINE_MAX audits run in the request; larger ones are
+    handed to a worker task (202) that deletes them in chunks. In-flight
+    audits are never purged.
+    """
+    if purge_data.older_than_days is None and purge_data.repository_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Specify older_than_days, repository_id, or both"
+        )
+    
+    older_than = None
+    if purge_data.older_than_days is not None:
+        older_than = datetime.now(timezone.utc) - timedelta(days=purge_data.older_than_days)
+    conditions = purge_conditions(older_than=older_than, repository_id=purge_data.repository_id)
+    
+    matched = await db.scalar(select(func.count(Audit.id)).where(*conditions))
+    
+    if purge_data.dry_run or not matched:
+        return AuditPurgeResponse(matched=matched, status="dry_run" if purge_data.dry_run else "completed")
+    
+    if matched > settings.AUDIT_PURGE_INLINE_MAX:
+        try:
+            task = await run_in_threadpool(
+                send_task,
+                PURGE_FINISHED_AUDITS,
+                kwargs={
+                    "older_than": older_than.isoformat() if older_than else None,
+                    "repository_id": purge_data.repository_id,
+                },
+            )
+        except Exception as e:
+            import logging
+            logging.error(f"Failed to queue purge: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Task queue is currently unavailable. Please check backend logs."
+            )
+        response.status_code = status.HTTP_202_ACCEPTED
+        return AuditPurgeResponse(matched=matched, status="queued", task_id=task.id)
+    
+    deleted = 0
+    while True:
+        audit_ids = list(await db.scalars(
+            select(Audit.id).where(*conditions).order_by(Audit.id).limit(settings.AUDIT_PURGE_CHUNK_SIZE)
+        ))
+        if not audit_ids:
+            break
+        deleted += await db.run_sync(delete_audits, audit_ids)
+        await db.commit()
+        for audit_id in audit_ids:
+            await invalidate_response(audit_id)
+        await run_in_threadpool(publish_deleted, audit_ids)
+    
+    return AuditPurgeResponse(matched=matched, deleted=deleted, status="completed")
@@ -0,0 +1,194 @@
+"""
+API routes for searching issues across audits.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from datetime import datetime
+from typing import List, Optional
+import base64
+import json
+
+from app.core.database import get_async_db
+from app.models import Repository, Audit, Issue, IssueSeverity, IssueType, issue_load_columns, issue_search_vector
+from app.schemas import IssueSearchResponse
+from app.api.routes.audits import ISSUE_FIELDS, parse_csv_param, serialize_issues
+
+router = APIRouter(prefix="/api/issues", tags=["issues"])
+
+FACETS = ("severity", "issue_type", "fixed", "repository")
+REPOSITORY_FACET_LIMIT = 50  # Largest repositories only; the others are left out of the facet
+
+
+def encode_issue_cursor(issue: Issue) -> str:
+    """Opaque keyset cursor pointing just past the given issue."""
+    raw = json.dumps([issue.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_issue_cursor(cursor: str) -> int:
+    """Decode a cursor from encode_issue_cursor into the issue ID."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        (issue_id,) = json.loads(raw)
+        return int(issue_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards, for patterns using ESCAPE '\\'."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_condition(q: str, dialect: str):
+    """
+    Full-text match on the description and explanation.
+    
+    PostgreSQL uses the ix_issues_search GIN index with websearch syntax
+    ("sql injection", -test, "exact phrase"); other databases fall back to
+    a substring match so the endpoint still works in development.
+    """
+    if dialect == "postgresql":
+        return issue_search_vector().op("@@")(func.websearch_to_tsquery(text("'english'"), q))
+    pattern = f"%{escape_like(q)}%"
+    return or_(
+        Issue.description.ilike(pattern, escape="\\"),
+        Issue.explanation.ilike(pattern, escape="\\"),
+    )
+
+
+async def count_facets(db: AsyncSession, conditions: list, names: set) -> dict:
+    """Count the filtered issues per value of each requested facet."""
+    facets = {}
+    base = select(func.count(Issue.id)).select_from(Issue).join(Audit).where(*conditions)
+    
+    if "severity" in names:
+        rows = await db.execute(base.add_columns(Issue.severity).group_by(Issue.severity))
+        facets["severity"] = {severity.value: count for count, severity in rows}
+    if "issue_type" in names:
+        rows = await db.execute(base.add_columns(Issue.issue_type).group_by(Issue.issue_type))
+        facets["issue_type"] = {issue_type.value: count for count, issue_type in rows}
+    if "fixed" in names:
+        rows = await db.execute(base.add_columns(Issue.is_fixed).group_by(Issue.is_fixed))
+        counts = {"true": 0, "false": 0}
+        for count, is_fixed in rows:
+            counts["true" if is_fixed else "false"] += count
+        facets["fixed"] = counts
+    if "repository" in names:
+        rows = await db.execute(
+            base.join(Repository).add_columns(Repository.owner, Repository.name)
+            .group_by(Repository.id, Repository.owner, Repository.name)
+            .order_by(func.count(Issue.id).desc())
+            .limit(REPOSITORY_FACET_LIMIT)
+        )
+        facets["repository"] = {f"{owner}/{name}": count for count, owner, name in rows}
+    
+    return facets
+
+
+@router.get("/", response_model=IssueSearchResponse)
+async def search_issues(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=1, max_length=500, description="Full-text search in the description and explanation"),
+    repository_id: Optional[List[int]] = Query(None),
+    audit_id: Optional[List[int]] = Query(None),
+    severity: Optional[List[IssueSeverity]] = Query(None),
+    issue_type: Optional[List[IssueType]] = Query(None),
+    path_prefix: Optional[str] = Query(None, description="Only files under this path, e.g. src/api/"),
+    fixed: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[str] = Query(None, description="Issue fields to return, e.g. id,file_path,severity,description"),
+    facets: Optional[str] = Query(None, description=f"Counts to return per value: {', '.join(FACETS)}"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search issues across all audits and repositories, newest first.
+    
+    Filters combine with AND; repeat a list parameter to match any of its
+    values (``severity=critical&severity=high``). Pages are keyset-paginated
+    on the issue ID: pass the X-Next-Cursor header (also ``next_cursor`` and
+    the Link header) back as ``cursor``. Facet counts cover every match, not
+    just the page, and are best requested with the first page only.
+    
+    Args:
+        q: Full-text query (websearch syntax on PostgreSQL)
+        repository_id: Only issues of these repositories
+        audit_id: Only issues of these audits
+        severity: Only these severities
+        issue_type: Only these issue types
+        path_prefix: Only files whose path starts with this prefix
+        fixed: Only fixed (true) or unfixed (false) issues
+        created_after: Only issues created at or after this time
+        created_before: Only issues created before this time
+        cursor: Cursor from the previous page
+        limit: Page size
+        fields: Issue fields to return (all by default)
+        facets: Comma-separated facets to count
+    """
+    issue_fields = parse_csv_param(fields, ISSUE_FIELDS, "fields")
+    facet_names = parse_csv_param(facets, FACETS, "facets")
+    
+    conditions = []
+    if repository_id:
+        conditions.append(Audit.repository_id.in_(repository_id))
+    if audit_id:
+        conditions.append(Issue.audit_id.in_(audit_id))
+    if severity:
+        conditions.append(Issue.severity.in_(severity))
+    if issue_type:
+        conditions.append(Issue.issue_type.in_(issue_type))
+    if path_prefix:
+        # Built in Python so the pattern is a plain prefix (index range scan)
+        conditions.append(Issue.file_path.like(escape_like(path_prefix) + "%", escape="\\"))
+    if fixed is not None:
+        conditions.append(Issue.is_fixed == int(fixed))
+    if created_after is not None:
+        conditions.append(Issue.created_at >= created_after)
+    if created_before is not None:
+        conditions.append(Issue.created_at < created_before)
+    if q:
+        conditions.append(search_condition(q, db.bind.dialect.name))
+    
+    statement = (
+        select(Issue, Audit.repository_id, Repository.owner, Repository.name)
+        .join(Audit, Issue.audit_id == Audit.id)
+        .join(Repository, Audit.repository_id == Repository.id)
+        .where(*conditions)
+    )
+    if issue_fields is not None:
+        statement = statement.options(load_only(*issue_load_columns(issue_fields | {"audit_id"})))
+    if cursor:
+        statement = statement.where(Issue.id < decode_issue_cursor(cursor))
+    
+    # One extra row tells whether there is a next page
+    rows = (await db.execute(statement.order_by(Issue.id.desc()).limit(limit + 1))).all()
+    
+    headers = {}
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_issue_cursor(rows[-1][0])
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    
+    items = serialize_issues([row[0] for row in rows], issue_fields)
+    for item, (issue, repo_id, owner, name) in zip(items, rows):
+        item["audit_id"] = issue.audit_id
+        item["repository_id"] = repo_id
+        item["repository"] = f"{owner}/{name}"
+    
+    body = {
+        "items": items,
+        "next_cursor": next_cursor,
+        "facets": await count_facets(db, conditions, facet_names) if facet_names else None,
+    }
+    return JSONResponse(body, headers=headers)
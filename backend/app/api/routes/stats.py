@@ -2,55 +2,69 @@
 API routes for statistics and dashboard data.
 """
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import time
 
-from app.core.database import get_db
-from app.models import Audit, Issue, AuditStatus
-from app.schemas import StatisticsResponse
+from app.core.compaction import storage_report
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.stats import compute_statistics
+from app.schemas import DatabaseStorageResponse, StatisticsResponse, StorageUsageResponse
+from worker.clone_storage import storage_usage
 
 router = APIRouter(prefix="/api/stats", tags=["statistics"])
 
+# Short-lived per-process cache: every open dashboard polls the statistics
+_stats_cache = {"value": None, "at": 0.0}
+_stats_lock = asyncio.Lock()
+
+
+def cached_statistics():
+    """Return the cached statistics if still fresh."""
+    if _stats_cache["value"] is not None and time.monotonic() - _stats_cache["at"] < settings.STATS_CACHE_TTL:
+        return _stats_cache["value"]
+    return None
+
 
 @router.get("/", response_model=StatisticsResponse)
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(db: AsyncSession = Depends(get_async_db)):
     """
     Get overall statistics for the dashboard.
-    """
-    total_audits = db.query(func.count(Audit.id)).scalar()
     
-    completed_audits = db.query(func.count(Audit.id)).filter(
-        Audit.status == AuditStatus.COMPLETED
-    ).scalar()
-    
-    failed_audits = db.query(func.count(Audit.id)).filter(
-        Audit.status == AuditStatus.FAILED
-    ).scalar()
-    
-    pending_audits = db.query(func.count(Audit.id)).filter(
-        Audit.status.in_([
-            AuditStatus.PENDING,
-            AuditStatus.CLONING,
-            AuditStatus.ANALYZING,
-            AuditStatus.FIXING,
-            AuditStatus.VALIDATING,
-            AuditStatus.CREATING_PR,
-        ])
-    ).scalar()
-    
-    total_issues_found = db.query(func.sum(Audit.issues_found)).scalar() or 0
-    total_fixes_applied = db.query(func.sum(Audit.fixes_applied)).scalar() or 0
+    Finished audits come from the incrementally maintained audit_counters
+    table and in-flight audits from a single aggregate query. Results are
+    cached for STATS_CACHE_TTL seconds, and concurrent misses share one query.
+    """
+    stats = cached_statistics()
+    if stats is None:
+        async with _stats_lock:
+            stats = cached_statistics()
+            if stats is None:
+                stats = await compute_statistics(db)
+                _stats_cache["value"] = stats
+                _stats_cache["at"] = time.monotonic()
     
-    total_prs_created = db.query(func.count(Audit.id)).filter(
-        Audit.pr_url.isnot(None)
-    ).scalar()
+    return StatisticsResponse(**stats)
+
+
+@router.get("/storage", response_model=StorageUsageResponse)
+async def get_storage_usage():
+    """
+    Get clone storage usage (CLONE_DIR shared with the workers).
     
-    return StatisticsResponse(
-        total_audits=total_audits or 0,
-        completed_audits=completed_audits or 0,
-        failed_audits=failed_audits or 0,
-        pending_audits=pending_audits or 0,
-        total_issues_found=total_issues_found,
-        total_fixes_applied=total_fixes_applied,
-        total_prs_created=total_prs_created or 0,
-    )
+    Only meaningful when the API mounts the workers' clone volume; each
+    worker exports its own view as autodev_clone_storage_* metrics.
+    """
+    # Walks the clone directory, so keep it off the event loop
+    return await run_in_threadpool(storage_usage)
+
+
+@router.get("/database", response_model=DatabaseStorageResponse)
+async def get_database_storage(db: AsyncSession = Depends(get_async_db)):
+    """
+    Get database storage usage: table, TOAST and index sizes, and how much
+    of the issue code and logs the compaction job has compacted so far.
+    """
+    return await db.run_sync(storage_report)
@@ -0,0 +1,103 @@
+"""
+Audit coalescing - One audit per (repository, branch, commit).
+
+A double-click or a retrying CI hook must not start a second full audit of
+the same code. A new request attaches to an in-flight audit of the same
+repository and branch at the same HEAD commit, or gets the result of a
+completed audit of that commit. The check and the insert of a new audit run
+under a Postgres transaction-level advisory lock on (repository, branch), so
+concurrent requests can't both miss each other.
+"""
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from app.models import Audit, AuditStatus, FINISHED_STATUSES
+
+
+def advisory_lock_key(repository_id: int, branch: Optional[str]) -> int:
+    """Signed 64-bit advisory lock key for a repository branch."""
+    digest = hashlib.sha1(f"audit:{repository_id}:{branch}".encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+async def lock_audit_key(db: AsyncSession, repository_id: int, branch: Optional[str]):
+    """Serialize audit creation for a repository branch until the transaction ends."""
+    await lock_audit_keys(db, [(repository_id, branch)])
+
+
+async def lock_audit_keys(db: AsyncSession, keys: Iterable[Tuple[int, Optional[str]]]):
+    """Take the locks of many repository branches in one statement (in key order, so batches can't deadlock)."""
+    if db.bind.dialect.name != "postgresql":
+        return
+    lock_keys = sorted({advisory_lock_key(repository_id, branch) for repository_id, branch in keys})
+    if lock_keys:
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(key) FROM unnest(CAST(:keys AS bigint[])) AS key ORDER BY key"),
+            {"keys": lock_keys},
+        )
+
+
+async def find_duplicate_audit(db: AsyncSession, repository_id: int, branch: Optional[str], commit_sha: Optional[str]) -> Optional[Audit]:
+    """
+    Find an audit a new request for this commit can reuse.
+    
+    In-flight audits of the branch match when their commit is the same or
+    unknown on either side (HEAD could not be resolved). Completed audits
+    only match on a known, identical commit; failed ones never do.
+    
+    Returns:
+        The in-flight audit if there is one, else the latest completed audit, or None
+    """
+    in_flight = select(Audit).options(defer(Audit.logs)).where(
+        Audit.repository_id == repository_id,
+        Audit.branch == branch,
+        Audit.status.notin_(FINISHED_STATUSES),
+    )
+    if commit_sha is not None:
+        in_flight = in_flight.where(or_(Audit.commit_sha == commit_sha, Audit.commit_sha.is_(None)))
+    audit = await db.scalar(in_flight.order_by(Audit.created_at.desc(), Audit.id.desc()).limit(1))
+    if audit is not None or commit_sha is None:
+        return audit
+    
+    return await db.scalar(
+        select(Audit)
+        .options(defer(Audit.logs))
+        .where(
+            Audit.repository_id == repository_id,
+            Audit.branch == branch,
+            Audit.commit_sha == commit_sha,
+            Audit.status == AuditStatus.COMPLETED,
+        )
+        .order_by(Audit.created_at.desc(), Audit.id.desc())
+        .limit(1)
+    )
+
+
+async def find_in_flight_audits(db: AsyncSession, keys: Iterable[Tuple[int, Optional[str]]]) -> Dict[Tuple[int, Optional[str]], Audit]:
+    """
+    In-flight audits of many repository branches, in one query.
+    
+    Used for bulk requests, where HEAD commits aren't resolved: any in-flight
+    audit of the branch counts as a duplicate.
+    
+    Returns:
+        The latest in-flight audit per (repository_id, branch) that has one
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    audits = await db.scalars(
+        select(Audit)
+        .options(defer(Audit.logs))
+        .where(
+            Audit.repository_id.in_({repository_id for repository_id, _ in keys}),
+            Audit.status.notin_(FINISHED_STATUSES),
+        )
+        .order_by(Audit.created_at, Audit.id)
+    )
+    # Later audits overwrite earlier ones, leaving the latest per key
+    return {(audit.repository_id, audit.branch): audit for audit in audits if (audit.repository_id, audit.branch) in keys}
@@ -0,0 +1,208 @@
+"""
+Storage compaction - Shrinks finished audits without changing what the API returns.
+
+Two passes over finished audits, each a series of short transactions of
+STORAGE_COMPACTION_BATCH_SIZE audits:
+
+- Issue fixes: fixed_code is replaced by a diff against original_code
+  (app.core.compression), rebuilt when issues are loaded.
+- Logs: once an audit finished more than LOG_ARCHIVE_AFTER_DAYS ago, its
+  logs are rewritten as a compressed archive, expanded when read.
+
+Updates bypass the ORM (no version bump): the API output is unchanged. A
+resumed audit is compacted again after it finishes, since its
+completed_at is then newer than the compaction timestamps.
+"""
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, func, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core.compression import archive_logs, make_code_diff
+from app.models import Audit, FINISHED_STATUSES, Issue
+
+logger = logging.getLogger(__name__)
+
+REPORTED_TABLES = ("issues", "audits", "file_checkpoints", "repositories", "audit_counters")
+
+# When an audit finished (failed audits may have no completed_at)
+FINISHED_AT = func.coalesce(Audit.completed_at, Audit.created_at)
+
+
+def pending_code_conditions() -> list:
+    """Finished audits whose issue fixes were not compacted since they finished."""
+    return [
+        Audit.status.in_(FINISHED_STATUSES),
+        or_(Audit.compacted_at.is_(None), Audit.compacted_at < FINISHED_AT),
+    ]
+
+
+def pending_logs_conditions(archive_before: datetime) -> list:
+    """Finished audits older than the retention window whose logs are not archived."""
+    return [
+        Audit.status.in_(FINISHED_STATUSES),
+        FINISHED_AT < archive_before,
+        or_(Audit.logs_archived_at.is_(None), Audit.logs_archived_at < FINISHED_AT),
+    ]
+
+
+def lock_finished_audits(db: Session, audit_ids: list) -> list:
+    """Lock the audits and return those still finished (a resume may have started meanwhile)."""
+    return list(db.scalars(
+        select(Audit.id)
+        .where(Audit.id.in_(audit_ids), Audit.status.in_(FINISHED_STATUSES))
+        .with_for_update()
+    ))
+
+
+def compact_issue_code(db: Session, audit_ids: list) -> dict:
+    """
+    Store the issue fixes of the given audits as diffs, in the caller's transaction.
+
+    Fixes whose diff would not be smaller (complete rewrites) are kept in full.
+
+    Returns:
+        Issues compacted and bytes saved
+    """
+    stats = {"issues": 0, "bytes_saved": 0}
+    rows = db.execute(
+        select(Issue.id, Issue.original_code, Issue.fixed_code)
+        .where(Issue.audit_id.in_(audit_ids), Issue.fixed_code.isnot(None), Issue.original_code.isnot(None))
+    )
+    updates = []
+    for issue_id, original_code, fixed_code in rows:
+        diff = make_code_diff(original_code, fixed_code)
+        if diff is None:
+            continue
+        updates.append({"issue_id": issue_id, "diff": diff})
+        stats["bytes_saved"] += len(fixed_code.encode()) - len(diff.encode())
+
+    if updates:
+        table = Issue.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("issue_id"))
+            .values(fixed_code=None, fix_diff=bindparam("diff")),
+            updates,
+        )
+    db.execute(update(Audit.__table__).where(Audit.__table__.c.id.in_(audit_ids)).values(compacted_at=func.now()))
+    stats["issues"] = len(updates)
+    return stats
+
+
+def archive_audit_logs(db: Session, audit_ids: list) -> dict:
+    """
+    Rewrite the logs of the given audits as compressed archives, in the caller's transaction.
+
+    Returns:
+        Audits archived and bytes saved (JSON text before and after)
+    """
+    stats = {"audits": 0, "bytes_saved": 0}
+    table = Audit.__table__
+    for audit_id in audit_ids:
+        logs = db.scalar(select(table.c.logs).where(table.c.id == audit_id))
+        values = {"logs_archived_at": func.now()}
+        if logs:
+            values["logs"] = archive_logs(logs)
+            stats["audits"] += 1
+            stats["bytes_saved"] += json_size(logs) - json_size(values["logs"])
+        db.execute(update(table).where(table.c.id == audit_id).values(**values))
+    return stats
+
+
+def json_size(value) -> int:
+    """Size of a value stored in a JSON column."""
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def compact_storage(db: Session, batch_size: int, log_retention_days: int) -> dict:
+    """
+    Run both compaction passes over every pending finished audit.
+
+    Args:
+        db: Session (committed after each batch)
+        batch_size: Audits per transaction
+        log_retention_days: Days logs stay uncompressed after an audit finishes (0 = never archive)
+
+    Returns:
+        Totals of both passes
+    """
+    totals = {"issues_compacted": 0, "issue_bytes_saved": 0, "logs_archived": 0, "log_bytes_saved": 0}
+
+    passes = [("code", pending_code_conditions())]
+    if log_retention_days > 0:
+        archive_before = datetime.now(timezone.utc) - timedelta(days=log_retention_days)
+        passes.append(("logs", pending_logs_conditions(archive_before)))
+
+    for name, conditions in passes:
+        last_id = 0
+        while True:
+            audit_ids = list(db.scalars(
+                select(Audit.id).where(*conditions, Audit.id > last_id).order_by(Audit.id).limit(batch_size)
+            ))
+            if not audit_ids:
+                break
+            last_id = audit_ids[-1]
+
+            audit_ids = lock_finished_audits(db, audit_ids)
+            if name == "code":
+                stats = compact_issue_code(db, audit_ids)
+                totals["issues_compacted"] += stats["issues"]
+                totals["issue_bytes_saved"] += stats["bytes_saved"]
+            else:
+                stats = archive_audit_logs(db, audit_ids)
+                totals["logs_archived"] += stats["audits"]
+                totals["log_bytes_saved"] += stats["bytes_saved"]
+            db.commit()
+            logger.info(f"Compacted {name} of {len(audit_ids)} audits (up to ID {last_id})")
+
+    return totals
+
+
+def storage_report(db: Session) -> dict:
+    """
+    Database storage usage and the state of compaction.
+
+    Table sizes (heap, TOAST and indexes) are only available on PostgreSQL.
+    """
+    tables = []
+    if db.get_bind().dialect.name == "postgresql":
+        rows = db.execute(text(
+            "SELECT c.relname, pg_table_size(c.oid) - COALESCE(pg_total_relation_size(c.reltoastrelid), 0), "
+            "COALESCE(pg_total_relation_size(c.reltoastrelid), 0), pg_indexes_size(c.oid), c.reltuples::bigint "
+            "FROM pg_class c WHERE c.relkind = 'r' AND c.relname IN :names "
+            "AND pg_table_is_visible(c.oid)"
+        ).bindparams(bindparam("names", expanding=True)), {"names": list(REPORTED_TABLES)})
+        tables = [
+            {"table": name, "heap_bytes": heap, "toast_bytes": toast, "index_bytes": indexes, "estimated_rows": max(estimated, 0)}
+            for name, heap, toast, indexes, estimated in sorted(rows, key=lambda row: -(row[1] + row[2] + row[3]))
+        ]
+
+    issues = db.execute(select(
+        func.count(Issue.id),
+        func.count(Issue.fix_diff),
+        func.coalesce(func.sum(func.length(Issue.original_code)), 0),
+        func.coalesce(func.sum(func.length(Issue.fixed_code)), 0),
+        func.coalesce(func.sum(func.length(Issue.fix_diff)), 0),
+    )).one()
+    audits = db.execute(select(
+        func.count(Audit.id),
+        func.count(Audit.compacted_at),
+        func.count(Audit.logs_archived_at),
+    )).one()
+    pending_code = db.scalar(select(func.count(Audit.id)).where(*pending_code_conditions()))
+
+    return {
+        "tables": tables,
+        "issues": issues[0],
+        "issues_compacted": issues[1],
+        "original_code_chars": issues[2],
+        "fixed_code_chars": issues[3],
+        "fix_diff_chars": issues[4],
+        "audits": audits[0],
+        "audits_compacted": audits[1],
+        "audits_logs_archived": audits[2],
+        "audits_pending_compaction": pending_code,
+    }
@@ -0,0 +1,96 @@
+"""
+Compact storage formats - Issue fixes as diffs and archived audit logs.
+
+An issue's fixed_code is usually its original_code with a line or two
+changed, so compacted issues store it as a zero-context unified diff
+against original_code (the excerpt stays as is) and rebuild it on load.
+Logs of old audits are stored as a zlib-compressed archive inside the same
+JSON column and expanded when read, so callers always see a list.
+"""
+import base64
+import difflib
+import json
+import re
+import zlib
+from typing import List, Optional
+
+from sqlalchemy.types import JSON, TypeDecorator
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@")
+NO_NEWLINE = "\\ No newline at end of file\n"
+
+
+def split_lines(text: str) -> List[str]:
+    """Split on "\\n" only, keeping line ends (str.splitlines also splits on \\r, \\f, ...)."""
+    return re.findall(r"[^\n]*\n|[^\n]+$", text)
+
+
+def make_code_diff(original: str, fixed: str) -> Optional[str]:
+    """
+    Unified diff (no context, no file headers) turning original into fixed.
+
+    Returns None when the diff would not be smaller than the fixed code
+    itself, e.g. for a complete rewrite.
+    """
+    lines = []
+    for line in difflib.unified_diff(split_lines(original), split_lines(fixed), n=0, lineterm="\n"):
+        if line.startswith(("---", "+++")) and not lines:
+            continue  # File headers
+        lines.append(line)
+        if not line.endswith("\n"):
+            lines.append("\n" + NO_NEWLINE)
+    diff = "".join(lines)
+    return diff if len(diff) < len(fixed) else None
+
+
+def apply_code_diff(original: str, diff: str) -> str:
+    """Rebuild the fixed code from original_code and a diff from make_code_diff."""
+    source = split_lines(original)
+    result = []
+    position = 0
+    previous = None
+    for line in split_lines(diff):
+        header = HUNK_HEADER.match(line)
+        if header:
+            start, count = int(header.group(1)), int(header.group(2) or 1)
+            begin = start if count == 0 else start - 1
+            result.extend(source[position:begin])
+            position = begin + count
+        elif line == NO_NEWLINE:
+            if previous == "+":
+                result[-1] = result[-1][:-1]
+            continue
+        elif line.startswith("+"):
+            result.append(line[1:])
+        previous = line[:1]
+    result.extend(source[position:])
+    return "".join(result)
+
+
+def archive_logs(logs: list) -> dict:
+    """Compressed form of a log list, as stored in audits.logs."""
+    raw = json.dumps(logs, ensure_ascii=False, separators=(",", ":")).encode()
+    return {"archive": "zlib", "data": base64.b64encode(zlib.compress(raw, 9)).decode()}
+
+
+def expand_logs(value):
+    """The log list of a stored value, archived or not."""
+    if isinstance(value, dict) and value.get("archive") == "zlib":
+        return json.loads(zlib.decompress(base64.b64decode(value["data"])))
+    return value
+
+
+class ArchivableJSON(TypeDecorator):
+    """
+    JSON column whose value may be a compressed archive (see archive_logs).
+
+    Archives are expanded on read, so callers always see the original value;
+    writing it back (e.g. appending to the logs of a resumed audit) stores
+    it uncompressed again.
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return expand_logs(value)
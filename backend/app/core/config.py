@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "postgresql://autodev:autodev_password@db:5432/autodev_db"
+    DB_POOL_SIZE: int = 10  # Sync pool, used by the worker
+    DB_MAX_OVERFLOW: int = 20
+    API_DB_POOL_SIZE: int = 20  # Async pool, used by the API (per process)
+    API_DB_MAX_OVERFLOW: int = 30
+    API_DB_POOL_TIMEOUT: float = 10.0  # Seconds a request waits for a connection
     
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
@@ -20,6 +25,8 @@ class Settings(BaseSettings):
     # API Keys
     GEMINI_API_KEY: str
     GITHUB_TOKEN: str
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_API_TIMEOUT: float = 30.0
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
@@ -28,9 +35,74 @@ class Settings(BaseSettings):
     
     # Worker Configuration
     CLONE_DIR: str = "/tmp/autodev-clones"
+    CLONE_MODE: str = "sparse"  # "sparse" (partial clone of analyzable blobs only) or "full"
+    PR_CREATION_MODE: str = "api"  # "api" (Git Data API, no push) or "push" (git push + PR)
+    CLONE_DISK_QUOTA_MB: int = 20480  # Total clone storage per CLONE_DIR (0 = no quota)
+    CLONE_RESERVE_MB: int = 512  # Space assumed for a new clone
+    CLONE_MIN_FREE_MB: int = 1024  # Free disk space to always keep
+    CLONE_ORPHAN_AGE_SECONDS: int = 3900  # Older clones are orphaned (> task_time_limit)
+    CLONE_STORAGE_RETRY_DELAY: int = 60  # Seconds before retrying when storage is full
+    CLONE_JANITOR_INTERVAL: int = 600  # Seconds between periodic orphan sweeps
     MAX_FILE_SIZE: int = 1048576  # 1MB
     MAX_FILES_PER_REPO: int = 100
-    
+
+    WORKER_POOL: str = "prefork"  # "prefork", or "gevent" for I/O-bound concurrency
+    GEMINI_AGENT_CACHE_SIZE: int = 32  # Agents (and their gRPC channels) kept per custom API key
+    WORKER_MAX_MEMORY_PER_CHILD_MB: int = 1024  # Recycle a prefork child above this RSS (0 = never)
+    WORKER_MAX_TASKS_PER_CHILD: int = 0  # Optional task-count recycling (0 = disabled)
+    WORKER_TRACEMALLOC: bool = False  # Record Python heap peaks and top allocations per stage
+    WORKER_METRICS_PORT: int = 9808  # Prometheus metrics of the worker's processes (0 = not served)
+    WORKER_METRICS_DIR: str = "/tmp/autodev-metrics"  # Default PROMETHEUS_MULTIPROC_DIR of the worker
+
+    # Fan-out (sharded) audits
+    AUDIT_FANOUT_MIN_FILES: int = 0  # Auto fan-out at this many files (0 = only on request)
+    AUDIT_SHARD_SIZE: int = 25  # Files analyzed per shard subtask
+
+    # Checkpointing
+    AUDIT_MAX_RESUMES: int = 3  # Automatic re-queues after hitting the soft time limit
+
+    # Queue routing & fairness
+    AUDIT_SMALL_QUEUE: str = "audits.small"
+    AUDIT_LARGE_QUEUE: str = "audits.large"
+    AUDIT_LARGE_MIN_FILES: int = 50  # Analyzable files that make an audit "large"
+    AUDIT_LARGE_MIN_BYTES: int = 5242880  # 5MB of analyzable source
+    AUDIT_SIZE_ESTIMATE_TIMEOUT: float = 5.0  # Seconds for the pre-listing call
+    AUDIT_MAX_RUNNING_PER_OWNER: int = 2  # Concurrent audits per owner (0 = unlimited)
+    AUDIT_FAIRNESS_DELAY: int = 30  # Seconds before re-checking an owner at capacity
+    BULK_AUDIT_MAX_REPOSITORIES: int = 500  # Repositories accepted by one POST /api/audits/batch
+    AUDIT_PURGE_CHUNK_SIZE: int = 500  # Audits deleted per transaction by a purge
+    AUDIT_PURGE_INLINE_MAX: int = 1000  # Larger purges run as a background worker task
+
+    # Live audit events (Server-Sent Events)
+    EVENTS_BACKEND: str = "auto"  # "auto" (Redis if available, else Postgres), "redis", "postgres" or "none"
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive interval of idle event streams
+
+    # Dashboard statistics
+    STATS_CACHE_TTL: float = 5.0  # Seconds the API serves cached statistics (0 = no cache)
+    STATS_RECONCILE_INTERVAL: int = 3600  # Seconds between audit_counters rebuilds (drift repair)
+
+    # Storage compaction of finished audits (issue fixes as diffs, archived logs)
+    STORAGE_COMPACTION_INTERVAL: int = 3600  # Seconds between compaction runs (Celery beat)
+    STORAGE_COMPACTION_BATCH_SIZE: int = 100  # Audits compacted per transaction
+    LOG_ARCHIVE_AFTER_DAYS: int = 30  # Compress an audit's logs this long after it finished (0 = never)
+
+    # Response cache for finished audits
+    RESPONSE_CACHE_BACKEND: str = "auto"  # "auto" (Redis if available, else in-process LRU), "redis", "local" or "none"
+    RESPONSE_CACHE_TTL: float = 604800  # Seconds an entry is kept (7 days, 0 = until invalidated)
+    RESPONSE_CACHE_MAX_MB: int = 64  # Size of the in-process LRU
+    RESPONSE_CACHE_COMPRESS_MIN_BYTES: int = 1024  # Gzip bodies at least this large (0 = never)
+    RESPONSE_CACHE_MAX_AGE: int = 86400  # Browser/CDN max-age for completed audits
+
+    # Issue export (GET /api/audits/{id}/export)
+    EXPORT_BATCH_SIZE: int = 500  # Issues fetched per server-side cursor round trip
+    EXPORT_CHUNK_BYTES: int = 65536  # Output buffered before each write to the client
+    EXPORT_GZIP_LEVEL: int = 6  # Compression level when the client accepts gzip
+
+    # Tracing (OpenTelemetry)
+    TRACING_EXPORTER: str = "none"  # "none", "console", "file", "otlp" or "package.module:factory"
+    TRACING_FILE: str = "/tmp/autodev-traces/spans.jsonl"  # Span log of the "file" exporter
+    TRACING_SAMPLE_RATIO: float = 1.0  # Share of new traces recorded (children follow their parent)
+
     # Logging
     LOG_LEVEL: str = "INFO"
     
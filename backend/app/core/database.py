@@ -2,6 +2,8 @@
 Database configuration and session management.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -16,13 +18,37 @@ engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
     pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,
-    max_overflow=20
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """Use the asyncpg driver for a postgresql:// URL (sslmode is passed separately)."""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async engine for the API, with its own pool: request handlers never block
+# the event loop on I/O, while the worker keeps the sync engine above
+async_connect_args = {"ssl": "require"} if connect_args else {}
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    connect_args=async_connect_args,
+    pool_pre_ping=True,
+    pool_size=settings.API_DB_POOL_SIZE,
+    max_overflow=settings.API_DB_MAX_OVERFLOW,
+    pool_timeout=settings.API_DB_POOL_TIMEOUT,
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -37,3 +63,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency that provides an async database session (API routes).
+    Yields a session and ensures it's closed after use.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,401 @@
+"""
+Audit events - Live status, progress, log and issue events for audits.
+
+The worker publishes an event whenever an audit row or one of its issues is
+committed. Events are collected by SQLAlchemy session hooks (so every status
+transition, counter update and append_log call is covered without touching
+call sites) and published after the commit succeeds, through Redis pub/sub
+or, when Redis is not available, Postgres LISTEN/NOTIFY.
+
+The API keeps one subscriber connection per process (AuditEventHub) and fans
+events out to Server-Sent Events streams. Delivery is best effort: streams
+start from a database snapshot and clients re-sync on reconnect.
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+# Channel carrying status/progress events of every audit (dashboards)
+ALL_AUDITS_CHANNEL = "audit_events"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+MAX_MESSAGE_CHARS = 1000
+
+PROGRESS_FIELDS = (
+    "status", "total_files", "processed_files", "issues_found",
+    "fixes_applied", "pr_url", "pr_number", "error_message",
+)
+
+_PENDING_KEY = "pending_audit_events"
+_publisher = None
+
+
+def audit_channel(audit_id: int) -> str:
+    """Channel carrying all events of one audit."""
+    return f"audit_events_{audit_id}"
+
+
+def events_backend() -> Optional[str]:
+    """Resolve EVENTS_BACKEND ("auto", "redis", "postgres" or "none")."""
+    backend = settings.EVENTS_BACKEND.lower()
+    if backend == "auto":
+        if settings.CELERY_BROKER_URL.startswith(("redis://", "rediss://")):
+            return "redis"
+        if settings.DATABASE_URL.startswith("postgresql"):
+            return "postgres"
+        return None
+    return None if backend == "none" else backend
+
+
+def progress_payload(audit) -> dict:
+    """Status and progress counters of an audit."""
+    payload = {field: getattr(audit, field) for field in PROGRESS_FIELDS}
+    payload["status"] = payload["status"].value if payload["status"] is not None else None
+    payload["audit_id"] = audit.id
+    return payload
+
+
+def _log_payload(audit_id: int, entry: dict) -> dict:
+    """A log entry, trimmed to fit a NOTIFY payload."""
+    payload = {
+        "audit_id": audit_id,
+        "timestamp": entry.get("timestamp"),
+        "level": entry.get("level"),
+        "message": (entry.get("message") or "")[:MAX_MESSAGE_CHARS],
+    }
+    if "data" in entry and len(json.dumps(entry["data"], default=str)) < MAX_PAYLOAD_BYTES // 2:
+        payload["data"] = entry["data"]
+    return payload
+
+
+def _issue_payload(issue) -> dict:
+    """Issue summary (code blocks are fetched from the API when needed)."""
+    return {
+        "audit_id": issue.audit_id,
+        "id": issue.id,
+        "file_path": issue.file_path,
+        "line_number": issue.line_number,
+        "issue_type": issue.issue_type.value if issue.issue_type else None,
+        "severity": issue.severity.value if issue.severity else None,
+        "description": (issue.description or "")[:MAX_MESSAGE_CHARS],
+        "explanation": (issue.explanation or "")[:MAX_MESSAGE_CHARS],
+        "is_fixed": bool(issue.is_fixed),
+    }
+
+
+def _new_log_entries(audit) -> List[dict]:
+    """Log entries appended to an audit since it was loaded."""
+    history = inspect(audit).attrs.logs.history
+    if not history.added:
+        return []
+    current = history.added[0] or []
+    previous = history.deleted[0] if history.deleted else None
+    if previous is None:
+        # Unknown previous state: only announce the latest entry
+        return current[-1:]
+    return current[len(previous):]
+
+
+def collect_audit_events(session, flush_context):
+    """after_flush hook: queue events for changed audits and new issues."""
+    from app.models import Audit, Issue
+
+    pending = session.info.setdefault(_PENDING_KEY, [])
+
+    for obj in session.new:
+        if isinstance(obj, Issue):
+            pending.append(("issue", obj.audit_id, _issue_payload(obj)))
+        elif isinstance(obj, Audit):
+            pending.append(("status", obj.id, progress_payload(obj)))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Audit):
+            continue
+        state = inspect(obj)
+        if state.attrs.status.history.has_changes():
+            pending.append(("status", obj.id, progress_payload(obj)))
+        elif any(state.attrs[field].history.has_changes() for field in PROGRESS_FIELDS):
+            pending.append(("progress", obj.id, progress_payload(obj)))
+        for entry in _new_log_entries(obj):
+            pending.append(("log", obj.id, _log_payload(obj.id, entry)))
+
+    for obj in session.deleted:
+        if isinstance(obj, Audit):
+            pending.append(("deleted", obj.id, {"audit_id": obj.id}))
+
+
+def _publish_all(pending: list):
+    for event_type, audit_id, payload in pending:
+        publish_event(event_type, audit_id, payload)
+
+
+def publish_pending_events(session):
+    """after_commit hook: publish the events collected during the transaction."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _publish_all(pending)
+    else:
+        # Async session in the API: publishing is blocking I/O, keep it off the event loop
+        loop.run_in_executor(None, _publish_all, pending)
+
+
+def discard_pending_events(session):
+    """after_rollback hook: drop events of a rolled back transaction."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def install_event_hooks(session_factory=Session):
+    """
+    Register the session hooks that turn audit changes into events.
+    
+    Hooks go on the Session class by default, which also covers the sync
+    sessions behind the API's AsyncSessions.
+    """
+    if events_backend() is None or event.contains(session_factory, "after_flush", collect_audit_events):
+        return
+    event.listen(session_factory, "after_flush", collect_audit_events)
+    event.listen(session_factory, "after_commit", publish_pending_events)
+    event.listen(session_factory, "after_soft_rollback", lambda session, previous: discard_pending_events(session))
+
+
+def publish_audit_progress(db, audit_id: int):
+    """
+    Publish the current counters of an audit.
+
+    Needed after bulk UPDATE statements (fan-out shards), which bypass the
+    session hooks.
+    """
+    from app.models import Audit
+
+    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+    if audit:
+        publish_event("progress", audit_id, progress_payload(audit))
+        db.commit()
+
+
+# =============================================================================
+# Publishing (worker side, synchronous)
+# =============================================================================
+
+class RedisPublisher:
+    """Publishes events with Redis PUBLISH."""
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel: str, message: str):
+        self.client.publish(channel, message)
+
+
+class PostgresPublisher:
+    """Publishes events with pg_notify on a pooled connection."""
+
+    def publish(self, channel: str, message: str):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": channel, "message": message})
+            conn.commit()
+
+
+def get_publisher():
+    """Return the process-wide publisher for the configured backend."""
+    global _publisher
+    if _publisher is None:
+        backend = events_backend()
+        if backend == "redis":
+            _publisher = RedisPublisher(settings.REDIS_URL)
+        elif backend == "postgres":
+            _publisher = PostgresPublisher()
+    return _publisher
+
+
+def publish_event(event_type: str, audit_id: int, payload: dict):
+    """
+    Publish an audit event. Failures are logged and never propagate.
+
+    Args:
+        event_type: "status", "progress", "log", "issue" or "deleted"
+        audit_id: ID of the audit
+        payload: JSON-serializable event data
+    """
+    publisher = get_publisher()
+    if publisher is None:
+        return
+
+    message = json.dumps({"type": event_type, "data": payload}, default=str)
+    if len(message.encode()) > MAX_PAYLOAD_BYTES:
+        logger.warning(f"Dropping oversized {event_type} event for audit {audit_id}")
+        return
+
+    try:
+        publisher.publish(audit_channel(audit_id), message)
+        if event_type in ("status", "progress", "deleted"):
+            publisher.publish(ALL_AUDITS_CHANNEL, message)
+    except Exception as e:
+        logger.warning(f"Failed to publish {event_type} event for audit {audit_id}: {e}")
+
+
+# =============================================================================
+# Subscribing (API side, asyncio)
+# =============================================================================
+
+class RedisListener:
+    """Single Redis pub/sub connection shared by all streams of a process."""
+
+    def __init__(self, url: str, dispatch):
+        import redis.asyncio as aioredis
+        self.client = aioredis.Redis.from_url(url)
+        self.pubsub = self.client.pubsub()
+        self.dispatch = dispatch
+        self._reader: Optional[asyncio.Task] = None
+
+    async def listen(self, channel: str):
+        await self.pubsub.subscribe(channel)
+        if self._reader is None or self._reader.done():
+            self._reader = asyncio.create_task(self._read())
+
+    async def unlisten(self, channel: str):
+        await self.pubsub.unsubscribe(channel)
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except Exception as e:
+                logger.warning(f"Redis event listener error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message and message.get("type") == "message":
+                channel = message["channel"]
+                data = message["data"]
+                self.dispatch(
+                    channel.decode() if isinstance(channel, bytes) else channel,
+                    data.decode() if isinstance(data, bytes) else data,
+                )
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+        await self.pubsub.close()
+        await self.client.close()
+
+
+class PostgresListener:
+    """Single asyncpg LISTEN connection shared by all streams of a process."""
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+        self.conn = None
+
+    async def _connection(self):
+        if self.conn is None or self.conn.is_closed():
+            # Detached from the API pool, but opened with the engine's connect_args (SSL)
+            raw = await async_engine.raw_connection()
+            self.conn = raw.driver_connection
+            raw.detach()
+        return self.conn
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.dispatch(channel, payload)
+
+    async def listen(self, channel: str):
+        conn = await self._connection()
+        await conn.add_listener(channel, self._on_notify)
+
+    async def unlisten(self, channel: str):
+        if self.conn is not None and not self.conn.is_closed():
+            await self.conn.remove_listener(channel, self._on_notify)
+
+    async def close(self):
+        if self.conn is not None:
+            await self.conn.close()
+            self.conn = None
+
+
+class AuditEventHub:
+    """Fans events from one backend connection out to per-stream queues."""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listener = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def available(self) -> bool:
+        return events_backend() is not None
+
+    def _dispatch(self, channel: str, message: str):
+        try:
+            parsed = json.loads(message)
+        except ValueError:
+            return
+        for queue in list(self._subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(parsed)
+            except asyncio.QueueFull:
+                # Slow client: it will re-sync from the snapshot on reconnect
+                logger.warning(f"Dropping event for a slow subscriber on {channel}")
+
+    async def _get_listener(self):
+        if self._listener is None:
+            backend = events_backend()
+            if backend == "redis":
+                self._listener = RedisListener(settings.REDIS_URL, self._dispatch)
+            elif backend == "postgres":
+                self._listener = PostgresListener(self._dispatch)
+        return self._listener
+
+    async def subscribe(self, channel: str, maxsize: int = 1000) -> asyncio.Queue:
+        """Start receiving events of a channel on a new queue."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        async with self._lock:
+            listener = await self._get_listener()
+            if channel not in self._subscribers and listener is not None:
+                await listener.listen(channel)
+            self._subscribers.setdefault(channel, set()).add(queue)
+        return queue
+
+    async def unsubscribe(self, channel: str, queue: asyncio.Queue):
+        """Stop delivering events of a channel to a queue."""
+        async with self._lock:
+            queues = self._subscribers.get(channel)
+            if not queues:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[channel]
+                if self._listener is not None:
+                    try:
+                        await self._listener.unlisten(channel)
+                    except Exception as e:
+                        logger.warning(f"Failed to unsubscribe from {channel}: {e}")
+
+    async def close(self):
+        """Close the backend connection (application shutdown)."""
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+        self._subscribers.clear()
+
+
+def format_sse(event_type: str, data) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# Process-wide hub used by the API
+event_hub = AuditEventHub()
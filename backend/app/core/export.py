@@ -0,0 +1,198 @@
+"""
+Issue export - Streams an audit's issues as NDJSON or SARIF 2.1.0.
+
+Issues are read through a server-side cursor, EXPORT_BATCH_SIZE rows per
+round trip, and written out as they arrive: memory stays constant however
+large the audit is, and the first bytes leave before the last row is read.
+Output is buffered into EXPORT_CHUNK_BYTES writes and, when the client
+accepts it, gzip-compressed on the fly.
+"""
+import json
+import zlib
+from types import SimpleNamespace
+from typing import AsyncIterator, Callable, Iterable
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import Audit, Issue, IssueSeverity, IssueType, expand_fixed_code, issue_load_columns
+
+EXPORT_FORMATS = ("ndjson", "sarif")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sarif": "application/sarif+json",
+}
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULES = {
+    IssueType.SYNTAX_ERROR: "Code that does not parse or compile.",
+    IssueType.LOGIC_ERROR: "Code that runs but computes the wrong result.",
+    IssueType.SECURITY_VULNERABILITY: "Code that can be exploited (injection, unsafe deserialization, ...).",
+    IssueType.CODE_SMELL: "Code that works but is hard to read or maintain.",
+    IssueType.PERFORMANCE_ISSUE: "Code that is needlessly slow or wasteful.",
+    IssueType.SECRET_EXPOSURE: "Credentials or keys committed to the repository.",
+}
+RULE_INDEX = {issue_type: index for index, issue_type in enumerate(SARIF_RULES)}
+
+# Issue columns read for a SARIF export
+SARIF_COLUMNS = ("id", "file_path", "line_number", "issue_type", "severity", "description",
+                 "original_code", "fixed_code", "explanation", "is_fixed")
+SARIF_LEVELS = {
+    IssueSeverity.CRITICAL: "error",
+    IssueSeverity.HIGH: "error",
+    IssueSeverity.MEDIUM: "warning",
+    IssueSeverity.LOW: "note",
+}
+
+
+def dumps(value) -> str:
+    """Compact JSON, as written to export streams."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def issue_rows_statement(audit_id: int, columns: Iterable[str]):
+    """SELECT the given issue columns of an audit, in ID order, without building ORM objects."""
+    return (
+        select(*issue_load_columns(columns))
+        .where(Issue.audit_id == audit_id)
+        .order_by(Issue.id)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+
+
+async def stream_issue_rows(audit_id: int, columns: Iterable[str]) -> AsyncIterator:
+    """
+    Yield an audit's issue rows from a server-side cursor.
+
+    Opens its own session: the request's session is closed before a
+    streaming response starts. Compacted fixes are rebuilt on the way.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(issue_rows_statement(audit_id, columns))
+        async for row in result:
+            if getattr(row, "fix_diff", None) is not None:
+                values = row._asdict()
+                values["fixed_code"] = expand_fixed_code(row.original_code, row.fixed_code, row.fix_diff)
+                row = SimpleNamespace(**values)
+            yield row
+
+
+def sarif_rule(issue_type: IssueType) -> dict:
+    """SARIF reportingDescriptor of one issue type."""
+    return {
+        "id": issue_type.value,
+        "name": "".join(part.capitalize() for part in issue_type.value.split("_")),
+        "shortDescription": {"text": SARIF_RULES[issue_type]},
+    }
+
+
+def sarif_envelope(audit: Audit) -> tuple:
+    """
+    Return the text before and after the results array of a SARIF log.
+
+    The results are streamed in between, comma-separated.
+    """
+    repository = audit.repository
+    revision = audit.commit_sha or audit.branch or repository.branch
+    run = {
+        "tool": {
+            "driver": {
+                "name": "AutoDev Agent",
+                "version": "1.0.0",
+                "informationUri": "https://github.com/Robert2101/AutoDev-Agent",
+                "rules": [sarif_rule(issue_type) for issue_type in SARIF_RULES],
+            }
+        },
+        # Result paths resolve to the audited files on GitHub
+        "originalUriBaseIds": {"SRCROOT": {"uri": f"{repository.url.rstrip('/').removesuffix('.git')}/blob/{revision}/"}},
+        "versionControlProvenance": [{
+            key: value for key, value in (
+                ("repositoryUri", repository.url),
+                ("revisionId", audit.commit_sha),
+                ("branch", audit.branch or repository.branch),
+            ) if value
+        }],
+        "automationDetails": {"id": f"autodev/audit/{audit.id}"},
+        "results": [],  # Must stay the last key, see below
+    }
+    log = dumps({"$schema": SARIF_SCHEMA, "version": "2.1.0", "runs": [run]})
+    head, tail = log.rsplit('"results":[]', 1)
+    return head + '"results":[', "]" + tail
+
+
+def sarif_result(row) -> dict:
+    """SARIF result of one issue row."""
+    location = {"artifactLocation": {"uri": row.file_path, "uriBaseId": "SRCROOT"}}
+    if row.line_number and row.line_number > 0:
+        location["region"] = {"startLine": row.line_number}
+        if row.original_code:
+            location["region"]["snippet"] = {"text": row.original_code}
+
+    properties = {
+        "issueId": row.id,
+        "severity": row.severity.value,
+        "isFixed": bool(row.is_fixed),
+    }
+    if row.explanation:
+        properties["explanation"] = row.explanation
+    if row.fixed_code:
+        properties["fixedCode"] = row.fixed_code
+
+    return {
+        "ruleId": row.issue_type.value,
+        "ruleIndex": RULE_INDEX[row.issue_type],
+        "level": SARIF_LEVELS[row.severity],
+        "message": {"text": row.description},
+        "locations": [{"physicalLocation": location}],
+        "properties": properties,
+    }
+
+
+async def ndjson_lines(rows: AsyncIterator, serialize: Callable) -> AsyncIterator[str]:
+    """One JSON object per issue and line, as built by serialize(row)."""
+    async for row in rows:
+        yield dumps(serialize(row)) + "\n"
+
+
+async def sarif_parts(audit: Audit, rows: AsyncIterator) -> AsyncIterator[str]:
+    """A SARIF 2.1.0 log of the audit, one result per row of SARIF_COLUMNS."""
+    head, tail = sarif_envelope(audit)
+    yield head
+    separator = ""
+    async for row in rows:
+        yield separator + dumps(sarif_result(row))
+        separator = ","
+    yield tail
+
+
+async def encode_chunks(parts: AsyncIterator[str], compress: bool) -> AsyncIterator[bytes]:
+    """
+    Buffer text parts into EXPORT_CHUNK_BYTES writes, gzip-compressed if asked.
+
+    Compression is streaming (one zlib stream for the whole body), so the
+    client receives a regular gzip member.
+    """
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    size = 0
+
+    def flush() -> bytes:
+        data = "".join(buffer).encode()
+        buffer.clear()
+        return compressor.compress(data) if compressor else data
+
+    async for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= settings.EXPORT_CHUNK_BYTES:
+            size = 0
+            data = flush()
+            if data:
+                yield data
+
+    data = flush()
+    if compressor:
+        data += compressor.flush()
+    if data:
+        yield data
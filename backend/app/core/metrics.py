@@ -0,0 +1,95 @@
+"""
+Metrics - Prometheus exposition for the API's /metrics endpoint.
+
+Pipeline metrics (stage latencies, LLM counters, database time) are
+recorded by the workers (see worker.metrics) and aggregated from
+PROMETHEUS_MULTIPROC_DIR when the API shares that directory. Queue depth
+and in-flight audits by status are read at scrape time, so every API
+process reports the same values without recording anything itself.
+"""
+import logging
+import os
+
+from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Audit, AuditStatus, FINISHED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT_STATUSES = [status for status in AuditStatus if status not in FINISHED_STATUSES]
+
+
+def process_registry() -> CollectorRegistry:
+    """Registry of the metrics recorded by this process, or by all processes in multiprocess mode."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+def queue_depths() -> dict:
+    """Messages waiting in each audit queue, as reported by the broker."""
+    from app.core.task_queue import get_celery_client
+
+    depths = {}
+    with get_celery_client().connection_for_read() as connection:
+        connection.ensure_connection(max_retries=1)
+        channel = connection.default_channel
+        for queue in (settings.AUDIT_SMALL_QUEUE, settings.AUDIT_LARGE_QUEUE):
+            try:
+                depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except Exception:
+                depths[queue] = 0  # Never declared yet: nothing was ever queued
+    return depths
+
+
+def in_flight_audit_counts() -> dict:
+    """In-flight audits per status (one GROUP BY over the status index)."""
+    counts = {status: 0 for status in IN_FLIGHT_STATUSES}
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Audit.status, func.count(Audit.id))
+            .where(Audit.status.notin_(FINISHED_STATUSES))
+            .group_by(Audit.status)
+        ).all()
+    finally:
+        db.close()
+    counts.update(dict(rows))
+    return counts
+
+
+class PipelineCollector:
+    """Scrape-time gauges: audit queue depth and in-flight audits by status."""
+
+    def collect(self):
+        try:
+            depth = GaugeMetricFamily("autodev_queue_depth", "Messages waiting in an audit queue", labels=["queue"])
+            for queue, messages in queue_depths().items():
+                depth.add_metric([queue], messages)
+            yield depth
+        except Exception as e:
+            logger.warning(f"Failed to read queue depths: {e}")
+
+        try:
+            active = GaugeMetricFamily("autodev_active_audits", "In-flight audits by status", labels=["status"])
+            for status, audits in in_flight_audit_counts().items():
+                active.add_metric([status.value], audits)
+            yield active
+        except Exception as e:
+            logger.warning(f"Failed to count in-flight audits: {e}")
+
+
+def render_metrics() -> bytes:
+    """Render the text exposition of worker and pipeline metrics (blocking)."""
+    registry = CollectorRegistry()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.MultiProcessCollector(registry)
+    registry.register(PipelineCollector())
+    return generate_latest(registry)
@@ -0,0 +1,104 @@
+"""
+Audit deletion - Set-based deletes of audits and everything that hangs off them.
+
+Deleting through the ORM cascade loads every issue and checkpoint of an
+audit and deletes them one row at a time. Here each table is cleared with a
+single DELETE ... WHERE audit_id IN (...) per chunk of audits, backed by the
+audit_id indexes. These statements bypass the ORM hooks, so the
+audit_counters contribution of the deleted audits is withdrawn explicitly
+and "deleted" events are published after the commit.
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.events import publish_event
+from app.models import Audit, FileCheckpoint, FINISHED_STATUSES, Issue
+from app.models.models import apply_counter_deltas
+
+logger = logging.getLogger(__name__)
+
+
+def purge_conditions(older_than: Optional[datetime] = None, repository_id: Optional[int] = None) -> list:
+    """
+    WHERE clauses selecting finished audits for a bulk purge.
+
+    In-flight audits are never purged: their worker still writes to them.
+    """
+    conditions = [Audit.status.in_(FINISHED_STATUSES)]
+    if older_than is not None:
+        conditions.append(Audit.created_at < older_than)
+    if repository_id is not None:
+        conditions.append(Audit.repository_id == repository_id)
+    return conditions
+
+
+def delete_audits(db: Session, audit_ids: List[int]) -> int:
+    """
+    Delete audits with their issues and checkpoints, in the caller's transaction.
+
+    Args:
+        db: Session (the caller commits)
+        audit_ids: IDs of the audits to delete
+
+    Returns:
+        Number of audits deleted
+    """
+    if not audit_ids:
+        return 0
+
+    # Lock the rows first, so no status transition lands between the counter read and the delete
+    db.execute(select(Audit.id).where(Audit.id.in_(audit_ids)).with_for_update())
+
+    finished = db.execute(
+        select(
+            Audit.status,
+            func.count(Audit.id),
+            func.coalesce(func.sum(Audit.issues_found), 0),
+            func.coalesce(func.sum(Audit.fixes_applied), 0),
+            func.count(Audit.pr_url),
+        )
+        .where(Audit.id.in_(audit_ids), Audit.status.in_(FINISHED_STATUSES))
+        .group_by(Audit.status)
+    ).all()
+    deltas = {status: [-value for value in values] for status, *values in finished}
+    if deltas:
+        apply_counter_deltas(db.connection(), deltas)
+
+    db.execute(delete(Issue).where(Issue.audit_id.in_(audit_ids)).execution_options(synchronize_session=False))
+    db.execute(delete(FileCheckpoint).where(FileCheckpoint.audit_id.in_(audit_ids)).execution_options(synchronize_session=False))
+    result = db.execute(delete(Audit).where(Audit.id.in_(audit_ids)).execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+def publish_deleted(audit_ids: List[int]):
+    """Announce committed deletions (dashboards, response caches of other API processes)."""
+    for audit_id in audit_ids:
+        publish_event("deleted", audit_id, {"audit_id": audit_id})
+
+
+def purge_audits(db: Session, conditions: list, chunk_size: int) -> int:
+    """
+    Delete all audits matching the conditions, one committed chunk at a time.
+
+    Each chunk is its own short transaction, so a purge of millions of rows
+    never holds long locks or one huge transaction.
+
+    Returns:
+        Total number of audits deleted
+    """
+    total = 0
+    while True:
+        audit_ids = list(db.scalars(
+            select(Audit.id).where(*conditions).order_by(Audit.id).limit(chunk_size)
+        ))
+        if not audit_ids:
+            break
+        total += delete_audits(db, audit_ids)
+        db.commit()
+        publish_deleted(audit_ids)
+        logger.info(f"Purged {total} audits so far")
+    return total
@@ -0,0 +1,225 @@
+"""
+Response cache - Pre-serialized detail responses of finished audits.
+
+A completed or failed audit no longer changes, so its detail response is
+built once and then served as stored bytes: no database round trip, no
+Pydantic serialization. Bodies are kept gzip-compressed (above a size
+threshold) and handed to clients that accept gzip as-is.
+
+Entries live in Redis when available (shared by all API processes) or in a
+per-process LRU. They are dropped when an audit is deleted or resumed, by the
+route itself and, for other processes, from the "deleted" and "status"
+events on the all-audits channel.
+"""
+import asyncio
+import gzip
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.events import ALL_AUDITS_CHANNEL, event_hub
+from app.models import FINISHED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Bound on the per-audit invalidation counters kept by the process
+MAX_TRACKED_GENERATIONS = 10000
+
+_cache = None
+_generations = {}
+
+
+class CachedResponse(NamedTuple):
+    """A serialized response body and the audit version it was built from."""
+    version: int
+    body: bytes
+    compressed: bool
+    immutable: bool  # Completed audits; failed ones can still be resumed
+
+    @classmethod
+    def build(cls, version: int, body: bytes, immutable: bool) -> "CachedResponse":
+        threshold = settings.RESPONSE_CACHE_COMPRESS_MIN_BYTES
+        if threshold and len(body) >= threshold:
+            return cls(version, gzip.compress(body, compresslevel=6), True, immutable)
+        return cls(version, body, False, immutable)
+
+    def to_bytes(self) -> bytes:
+        flags = (b"g" if self.compressed else b"-") + (b"i" if self.immutable else b"-")
+        return b"%d|%s|" % (self.version, flags) + self.body
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CachedResponse":
+        version, flags, body = raw.split(b"|", 2)
+        return cls(int(version), body, flags[:1] == b"g", flags[1:2] == b"i")
+
+    def plain_body(self) -> bytes:
+        return gzip.decompress(self.body) if self.compressed else self.body
+
+
+class LocalResponseCache:
+    """In-process LRU, bounded by the total size of the stored bodies."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, audit_id: int, variant: str) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._entries.get((audit_id, variant))
+            if item is None:
+                return None
+            expires_at, entry = item
+            if self.ttl and expires_at < time.monotonic():
+                self._remove((audit_id, variant))
+                return None
+            self._entries.move_to_end((audit_id, variant))
+            return entry
+
+    async def set(self, audit_id: int, variant: str, entry: CachedResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove((audit_id, variant))
+            self._entries[(audit_id, variant)] = (time.monotonic() + self.ttl, entry)
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, audit_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == audit_id]:
+                self._remove(key)
+
+    def _remove(self, key: tuple):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.size -= len(item[1].body)
+
+
+class RedisResponseCache:
+    """Redis hash per audit (one field per response variant), shared by all API processes."""
+
+    def __init__(self, url: str, ttl: float):
+        import redis.asyncio as aioredis
+        self.client = aioredis.Redis.from_url(url)
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _key(audit_id: int) -> str:
+        return f"audit_response:{audit_id}"
+
+    async def get(self, audit_id: int, variant: str) -> Optional[CachedResponse]:
+        raw = await self.client.hget(self._key(audit_id), variant)
+        return CachedResponse.from_bytes(raw) if raw is not None else None
+
+    async def set(self, audit_id: int, variant: str, entry: CachedResponse):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(audit_id), variant, entry.to_bytes())
+            if self.ttl:
+                pipe.expire(self._key(audit_id), self.ttl)
+            await pipe.execute()
+
+    async def invalidate(self, audit_id: int):
+        await self.client.delete(self._key(audit_id))
+
+
+def response_cache_backend() -> Optional[str]:
+    """Resolve RESPONSE_CACHE_BACKEND ("auto", "redis", "local" or "none")."""
+    backend = settings.RESPONSE_CACHE_BACKEND.lower()
+    if backend == "auto":
+        # Same rule as events_backend(): Redis only when it replaced the default broker
+        return "redis" if settings.CELERY_BROKER_URL.startswith(("redis://", "rediss://")) else "local"
+    return None if backend == "none" else backend
+
+
+def get_response_cache():
+    """Return the process-wide response cache, or None when disabled."""
+    global _cache
+    if _cache is None:
+        backend = response_cache_backend()
+        if backend == "redis":
+            _cache = RedisResponseCache(settings.REDIS_URL, settings.RESPONSE_CACHE_TTL)
+        elif backend == "local":
+            _cache = LocalResponseCache(settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024, settings.RESPONSE_CACHE_TTL)
+    return _cache
+
+
+def cache_generation(audit_id: int) -> int:
+    """Invalidation counter of an audit in this process; see store_response."""
+    return _generations.get(audit_id, 0)
+
+
+async def load_response(audit_id: int, variant: str) -> Optional[CachedResponse]:
+    """Cached response of an audit, or None. Cache errors count as misses."""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    try:
+        return await cache.get(audit_id, variant)
+    except Exception as e:
+        logger.warning(f"Response cache read failed for audit {audit_id}: {e}")
+        return None
+
+
+async def store_response(audit_id: int, variant: str, entry: CachedResponse, generation: int):
+    """
+    Cache a response, unless the audit was invalidated since it was read.
+
+    Args:
+        audit_id: ID of the audit
+        variant: Response variant (query parameters)
+        entry: The serialized response
+        generation: cache_generation(audit_id) taken before the database read
+    """
+    cache = get_response_cache()
+    if cache is None or cache_generation(audit_id) != generation:
+        return
+    try:
+        await cache.set(audit_id, variant, entry)
+    except Exception as e:
+        logger.warning(f"Response cache write failed for audit {audit_id}: {e}")
+
+
+async def invalidate_response(audit_id: int):
+    """Drop all cached responses of an audit."""
+    if len(_generations) >= MAX_TRACKED_GENERATIONS:
+        _generations.clear()
+    _generations[audit_id] = _generations.get(audit_id, 0) + 1
+    cache = get_response_cache()
+    if cache is None:
+        return
+    try:
+        await cache.invalidate(audit_id)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation failed for audit {audit_id}: {e}")
+
+
+async def watch_invalidations():
+    """
+    Invalidate cached responses from audit events published by other processes.
+
+    Runs for the lifetime of the API process. A "deleted" event, or a status
+    event leaving completed/failed (a resumed audit), drops the audit's entries.
+    """
+    finished = {status.value for status in FINISHED_STATUSES}
+    try:
+        queue = await event_hub.subscribe(ALL_AUDITS_CHANNEL)
+    except Exception as e:
+        logger.warning(f"Response cache invalidation events unavailable: {e}")
+        return
+    try:
+        while True:
+            message = await queue.get()
+            data = message.get("data") or {}
+            if message.get("type") == "deleted" or (message.get("type") == "status" and data.get("status") not in finished):
+                await invalidate_response(data.get("audit_id"))
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await event_hub.unsubscribe(ALL_AUDITS_CHANNEL, queue)
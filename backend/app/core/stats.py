@@ -0,0 +1,127 @@
+"""
+Dashboard statistics - Counters for finished audits plus one live aggregate.
+
+Finished (completed/failed) audits never change, so their totals are kept
+in the audit_counters table, updated in the same transaction as each status
+transition (see maintain_audit_counters in app.models). Only in-flight
+audits - a small, status-indexed set - are aggregated on request, in a
+single query with conditional counts. Statistics therefore cost the same
+whether the audits table has a thousand rows or millions.
+"""
+import logging
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Audit, AuditCounter, AuditStatus, FINISHED_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def finished_totals_statement():
+    """Totals of finished audits per status, straight from the audits table."""
+    return (
+        select(
+            Audit.status,
+            func.count(Audit.id),
+            func.coalesce(func.sum(Audit.issues_found), 0),
+            func.coalesce(func.sum(Audit.fixes_applied), 0),
+            func.count(Audit.pr_url),
+        )
+        .where(Audit.status.in_(FINISHED_STATUSES))
+        .group_by(Audit.status)
+    )
+
+
+def in_flight_totals_statement():
+    """One aggregate over the audits that are still running or queued."""
+    return select(
+        func.count(Audit.id),
+        func.coalesce(func.sum(Audit.issues_found), 0),
+        func.coalesce(func.sum(Audit.fixes_applied), 0),
+        func.count(Audit.pr_url),
+    ).where(Audit.status.notin_(FINISHED_STATUSES))
+
+
+def combine_statistics(counters: Iterable, in_flight) -> dict:
+    """
+    Build the dashboard statistics.
+
+    Args:
+        counters: Rows of (status, audits, issues_found, fixes_applied, prs_created)
+        in_flight: Row of (audits, issues_found, fixes_applied, prs_created)
+    """
+    in_flight_audits, issues_found, fixes_applied, prs_created = in_flight
+    stats = {
+        "total_audits": in_flight_audits,
+        "completed_audits": 0,
+        "failed_audits": 0,
+        "pending_audits": in_flight_audits,
+        "total_issues_found": issues_found,
+        "total_fixes_applied": fixes_applied,
+        "total_prs_created": prs_created,
+    }
+    for status, audits, issues_found, fixes_applied, prs_created in counters:
+        stats["total_audits"] += audits
+        stats["total_issues_found"] += issues_found
+        stats["total_fixes_applied"] += fixes_applied
+        stats["total_prs_created"] += prs_created
+        if status == AuditStatus.COMPLETED:
+            stats["completed_audits"] += audits
+        elif status == AuditStatus.FAILED:
+            stats["failed_audits"] += audits
+    return stats
+
+
+async def compute_statistics(db: AsyncSession) -> dict:
+    """Dashboard statistics from the counters table and the in-flight aggregate."""
+    counters = (await db.execute(select(
+        AuditCounter.status,
+        AuditCounter.audits,
+        AuditCounter.issues_found,
+        AuditCounter.fixes_applied,
+        AuditCounter.prs_created,
+    ))).all()
+    in_flight = (await db.execute(in_flight_totals_statement())).one()
+    return combine_statistics(counters, in_flight)
+
+
+def rebuild_audit_counters(db: Session) -> dict:
+    """
+    Recompute audit_counters from the audits table.
+
+    Repairs drift from writes that bypass the ORM hook (bulk UPDATEs, manual
+    SQL). The counters table is locked first, so transitions committed
+    meanwhile are applied on top of the rebuilt values rather than lost.
+
+    Returns:
+        The rebuilt counters, keyed by status value
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE audit_counters IN EXCLUSIVE MODE"))
+
+    rows = db.execute(finished_totals_statement()).all()
+    db.execute(delete(AuditCounter))
+    if rows:
+        db.execute(insert(AuditCounter), [
+            {
+                "status": status,
+                "audits": audits,
+                "issues_found": issues_found,
+                "fixes_applied": fixes_applied,
+                "prs_created": prs_created,
+            }
+            for status, audits, issues_found, fixes_applied, prs_created in rows
+        ])
+    db.commit()
+
+    return {status.value: audits for status, audits, *_ in rows}
+
+
+def seed_audit_counters(db: Session):
+    """Build audit_counters on first start against a database that already has audits."""
+    if db.query(AuditCounter.status).first() is None and db.query(Audit.id).filter(Audit.status.in_(FINISHED_STATUSES)).first():
+        logger.info("Seeding audit_counters from existing audits")
+        rebuild_audit_counters(db)
@@ -0,0 +1,111 @@
+"""
+Task queue - Publishes worker tasks by name, without importing the worker.
+
+The API only needs to put messages on the broker. Importing the task
+modules for that would load GitPython, PyGithub and the Gemini SDK (and
+configure a Gemini client) in every API process, so tasks are sent by
+name through a producer-only Celery app instead. The broker settings
+shared with the worker live here, so both sides route and prioritize
+messages the same way.
+"""
+from typing import Optional
+
+from app.core.config import settings
+
+# Task names (registered by worker.tasks.*)
+PROCESS_REPOSITORY_AUDIT = "worker.tasks.audit_task.process_repository_audit"
+ANALYZE_AUDIT_SHARD = "worker.tasks.audit_task.analyze_audit_shard"
+FINALIZE_SHARDED_AUDIT = "worker.tasks.audit_task.finalize_sharded_audit"
+PURGE_FINISHED_AUDITS = "worker.tasks.maintenance_task.purge_finished_audits"
+
+_client = None
+
+
+def celery_config() -> dict:
+    """Celery settings shared by the API (producer) and the worker."""
+    from kombu import Queue
+
+    return dict(
+        task_serializer="json",
+        accept_content=["json"],
+        result_serializer="json",
+        timezone="UTC",
+        enable_utc=True,
+        # Size-aware queues: small audits never wait behind large ones
+        task_queues=(
+            Queue(settings.AUDIT_SMALL_QUEUE),
+            Queue(settings.AUDIT_LARGE_QUEUE),
+        ),
+        task_default_queue=settings.AUDIT_SMALL_QUEUE,
+        task_routes={
+            ANALYZE_AUDIT_SHARD: {"queue": settings.AUDIT_LARGE_QUEUE},
+            FINALIZE_SHARDED_AUDIT: {"queue": settings.AUDIT_LARGE_QUEUE},
+        },
+        # Per-owner fairness uses message priorities (0 = highest on Redis)
+        broker_transport_options={
+            # Must exceed task_time_limit so running tasks aren't redelivered early
+            "visibility_timeout": 7200,
+            "queue_order_strategy": "priority",
+            "priority_steps": list(range(10)),
+        },
+    )
+
+
+def get_celery_client():
+    """Return the process-wide producer-only Celery app (created on first use)."""
+    global _client
+    if _client is None:
+        from celery import Celery
+        from app.core.tracing import install_celery_tracing
+
+        _client = Celery("autodev_api", broker=settings.CELERY_BROKER_URL, backend=settings.CELERY_RESULT_BACKEND)
+        _client.conf.update(celery_config())
+        # Published tasks continue the trace of the API request
+        install_celery_tracing()
+    return _client
+
+
+def send_task(name: str, args: tuple = (), kwargs: Optional[dict] = None, **options):
+    """
+    Publish a task by name.
+
+    Args:
+        name: Registered task name, e.g. PROCESS_REPOSITORY_AUDIT
+        args: Positional task arguments
+        kwargs: Keyword task arguments
+        **options: Publishing options (queue, priority, task_id, countdown)
+
+    Returns:
+        AsyncResult of the published task
+    """
+    return get_celery_client().send_task(name, args=args, kwargs=kwargs or {}, **options)
+
+
+def task_finished(task_id: str) -> bool:
+    """
+    Return True if a task has finished: succeeded, failed or been revoked.
+
+    Queued, running and retrying tasks are not finished, and neither are
+    tasks unknown to the result backend (reported as PENDING), so a False
+    never proves that a task is lost.
+    """
+    return get_celery_client().AsyncResult(task_id).ready()
+
+
+def send_task_group(signatures: list, group_id: Optional[str] = None):
+    """
+    Publish many tasks as one Celery group, over a single producer connection.
+
+    Args:
+        signatures: Signatures from task_signature()
+        group_id: ID of the group (e.g. a batch ID)
+    """
+    from celery import group
+
+    options = {"task_id": group_id} if group_id else {}
+    return group(signatures, app=get_celery_client()).apply_async(**options)
+
+
+def task_signature(name: str, args: tuple = (), kwargs: Optional[dict] = None, **options):
+    """Signature of a task by name, for send_task_group()."""
+    return get_celery_client().signature(name, args=args, kwargs=kwargs or {}, **options)
@@ -0,0 +1,287 @@
+"""
+Tracing - OpenTelemetry spans from the API request down to each LLM call.
+
+create_audit (and resume/batch) open a span whose context travels in the
+Celery message headers, so the worker's task span and the clone, discovery,
+per-file analysis (every LLM attempt and retry sleep), fix and GitHub spans
+below it belong to the same trace. Tasks published by tasks (shards,
+re-queues, retries) continue the trace of their parent.
+
+Spans go to a pluggable exporter (TRACING_EXPORTER): "console", "file"
+(JSON lines that `python -m app.core.tracing <audit_id>` renders as a
+timeline), "otlp" (configured with the standard OTEL_EXPORTER_OTLP_*
+variables) or any "package.module:factory" returning a SpanExporter.
+With "none" (default) the OpenTelemetry SDK is never imported and every
+span is a no-op.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+from contextlib import nullcontext
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Celery task id -> (span, context token) of the running task spans
+_task_spans = {}
+_configured = False
+
+
+def tracing_enabled() -> bool:
+    """Whether spans are recorded at all."""
+    return settings.TRACING_EXPORTER != "none"
+
+
+@functools.lru_cache(maxsize=None)
+def get_tracer():
+    """The tracer of this application (a proxy until configure_tracing runs)."""
+    from opentelemetry import trace
+    return trace.get_tracer("autodev")
+
+
+class JsonLinesSpanExporter:
+    """
+    Append finished spans to a file, one compact JSON object per line.
+
+    Implements the SpanExporter interface without subclassing it, so the SDK
+    is only imported when tracing is enabled.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> "SpanExportResult":
+        from opentelemetry.sdk.trace.export import SpanExportResult
+
+        lines = []
+        for span in spans:
+            parent = span.parent
+            lines.append(json.dumps({
+                "trace_id": format(span.context.trace_id, "032x"),
+                "span_id": format(span.context.span_id, "016x"),
+                "parent_id": format(parent.span_id, "016x") if parent else None,
+                "name": span.name,
+                "service": span.resource.attributes.get("service.name"),
+                "start": span.start_time,
+                "end": span.end_time,
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {}),
+            }, default=str) + "\n")
+        try:
+            # One append per batch: processes sharing the file never interleave lines
+            with self._lock, open(self.path, "a") as f:
+                f.write("".join(lines))
+        except OSError as e:
+            logger.warning(f"Failed to write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+def build_exporter(name: str):
+    """
+    Create the span exporter selected by TRACING_EXPORTER.
+
+    Raises:
+        ValueError: For an unknown exporter name
+    """
+    if name == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    if name == "file":
+        os.makedirs(os.path.dirname(settings.TRACING_FILE) or ".", exist_ok=True)
+        return JsonLinesSpanExporter(settings.TRACING_FILE)
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if ":" in name:
+        import importlib
+        module_name, factory = name.split(":", 1)
+        return getattr(importlib.import_module(module_name), factory)()
+    raise ValueError(f"Unknown TRACING_EXPORTER: {name}")
+
+
+def configure_tracing(service_name: str):
+    """Install the tracer provider and exporter for this process (once)."""
+    global _configured
+    if _configured or not tracing_enabled():
+        return
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    # Batches are exported from a background thread (restarted in forked pool processes)
+    provider.add_span_processor(BatchSpanProcessor(build_exporter(settings.TRACING_EXPORTER)))
+    trace.set_tracer_provider(provider)
+    _configured = True
+
+
+def flush_spans():
+    """Export pending spans now (before a pool process exits)."""
+    if _configured:
+        from opentelemetry import trace
+        trace.get_tracer_provider().force_flush()
+
+
+def start_span(name: str, attributes: Optional[dict] = None):
+    """Context manager running the enclosed code in a child span of the current one."""
+    if not tracing_enabled():
+        return nullcontext()
+    return get_tracer().start_as_current_span(name, attributes=attributes)
+
+
+def traced(name: str):
+    """Decorator running each call of the function (sync or async) in a span."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate_span(attributes: dict):
+    """Add attributes to the current span (e.g. audit.id once it is known)."""
+    if tracing_enabled():
+        from opentelemetry import trace
+        trace.get_current_span().set_attributes(attributes)
+
+
+# =============================================================================
+# Celery propagation
+# =============================================================================
+
+def _inject_trace_context(headers=None, **kwargs):
+    """before_task_publish: carry the current trace context in the message headers."""
+    if headers is not None:
+        from opentelemetry import propagate
+        propagate.inject(headers)
+
+
+def _start_task_span(task_id=None, task=None, args=None, **kwargs):
+    """task_prerun: run the task in a span continuing the publisher's trace."""
+    from opentelemetry import context, propagate, trace
+
+    request = task.request
+    carrier = {key: getattr(request, key) for key in ("traceparent", "tracestate") if getattr(request, key, None)}
+    span = get_tracer().start_span(
+        f"task {task.name.rsplit('.', 1)[-1]}",
+        context=propagate.extract(carrier),
+        kind=trace.SpanKind.CONSUMER,
+        attributes={"celery.task_id": task_id, "celery.retries": request.retries or 0},
+    )
+    _task_spans[task_id] = (span, context.attach(trace.set_span_in_context(span)))
+
+
+def _end_task_span(task_id=None, state=None, **kwargs):
+    """task_postrun: close the task span."""
+    from opentelemetry import context
+    from opentelemetry.trace import Status, StatusCode
+
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    span, token = entry
+    span.set_attribute("celery.state", state or "")
+    if state == "FAILURE":
+        span.set_status(Status(StatusCode.ERROR))
+    span.end()
+    context.detach(token)
+
+
+def install_celery_tracing():
+    """Propagate trace context through Celery messages (producer and worker side)."""
+    if not tracing_enabled():
+        return
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    before_task_publish.connect(_inject_trace_context, weak=False)
+    task_prerun.connect(_start_task_span, weak=False)
+    task_postrun.connect(_end_task_span, weak=False)
+
+
+# =============================================================================
+# Timelines
+# =============================================================================
+
+def load_audit_traces(path: str, audit_id: int) -> dict:
+    """Spans (from a "file" exporter log) of every trace that touched an audit, keyed by trace."""
+    traces = {}
+    audit_traces = set()
+    with open(path) as f:
+        for line in f:
+            span = json.loads(line)
+            traces.setdefault(span["trace_id"], []).append(span)
+            if span["attributes"].get("audit.id") == audit_id:
+                audit_traces.add(span["trace_id"])
+    return {trace_id: traces[trace_id] for trace_id in audit_traces}
+
+
+def render_timeline(spans: list, width: int = 40) -> str:
+    """Render one trace as an indented flame-style timeline."""
+    start = min(span["start"] for span in spans)
+    total = max(max(span["end"] for span in spans) - start, 1)
+    children = {}
+    for span in sorted(spans, key=lambda span: span["start"]):
+        children.setdefault(span["parent_id"], []).append(span)
+    span_ids = {span["span_id"] for span in spans}
+    roots = [span for parent_id, group in children.items() if parent_id not in span_ids for span in group]
+
+    lines = [f"trace {spans[0]['trace_id']}  {total / 1e9:.2f}s"]
+
+    def walk(span, depth):
+        offset = int((span["start"] - start) / total * width)
+        length = max(1, int((span["end"] - span["start"]) / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        status = " ✗" if span["status"] == "ERROR" else ""
+        lines.append(
+            f"{(span['start'] - start) / 1e9:9.2f}s {(span['end'] - span['start']) / 1e9:9.2f}s "
+            f"|{bar:<{width}}| {'  ' * depth}{span['name']}{status}"
+        )
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in sorted(roots, key=lambda span: span["start"]):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the traced timeline of an audit")
+    parser.add_argument("audit_id", type=int)
+    parser.add_argument("--file", default=settings.TRACING_FILE, help="Span log written by TRACING_EXPORTER=file")
+    options = parser.parse_args()
+
+    audit_traces = load_audit_traces(options.file, options.audit_id)
+    if not audit_traces:
+        print(f"No traces of audit {options.audit_id} in {options.file}")
+    for trace_spans in sorted(audit_traces.values(), key=lambda spans: min(span["start"] for span in spans)):
+        print(render_timeline(trace_spans))
+        print()
@@ -1,13 +1,32 @@
 """
 Main FastAPI application entry point.
+
+The schema is managed by Alembic migrations (run before the server starts)
+and worker modules are never imported here: tasks are published by name.
 """
-from fastapi import FastAPI
+import time
+
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+import asyncio
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api.routes import audits, stats
+from app.core.database import SessionLocal, async_engine
+from app.core.events import event_hub, install_event_hooks
+from app.core.metrics import render_metrics
+from app.core.response_cache import get_response_cache, watch_invalidations
+from app.core.stats import seed_audit_counters
+from app.core.task_queue import get_celery_client
+from app.core.tracing import configure_tracing, flush_spans
+from app.api.routes import audits, issues, stats
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 
 @asynccontextmanager
@@ -15,13 +34,40 @@ async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events.
     """
-    # Startup: Create database tables
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    startup_started = time.perf_counter()
+    
+    # Export request spans (no-op unless TRACING_EXPORTER is set)
+    configure_tracing("autodev-api")
+    
+    # Build the statistics counters if they predate existing audits
+    db = SessionLocal()
+    try:
+        seed_audit_counters(db)
+    finally:
+        db.close()
+    
+    # Publish audit changes made by the API (e.g. resumes) as live events
+    install_event_hooks()
+    
+    # Drop cached audit responses when other processes delete or resume audits
+    invalidation_watcher = None
+    if event_hub.available and get_response_cache() is not None:
+        invalidation_watcher = asyncio.create_task(watch_invalidations())
+    
+    print(
+        f"✅ API ready (imports {IMPORT_SECONDS * 1000:.0f}ms, "
+        f"startup {(time.perf_counter() - startup_started) * 1000:.0f}ms)"
+    )
     
     yield
     
     # Shutdown: Clean up resources
+    if invalidation_watcher is not None:
+        invalidation_watcher.cancel()
+        await invalidation_watcher
+    await event_hub.close()
+    await async_engine.dispose()
+    flush_spans()
     print("👋 Shutting down gracefully")
 
 
@@ -42,10 +88,12 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link"],  # Keyset pagination (audit list, issue search)
 )
 
 # Include routers
 app.include_router(audits.router)
+app.include_router(issues.router)
 app.include_router(stats.router)
 
 
@@ -60,11 +108,40 @@ async def root():
     }
 
 
+def broker_reachable() -> bool:
+    """Open (and release) a broker connection."""
+    with get_celery_client().connection_for_write() as connection:
+        connection.ensure_connection(max_retries=1)
+    return True
+
+
 @app.get("/health")
-async def health_check():
-    """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "database": "connected",
-        "redis": "connected"
-    }
+async def health_check(response: Response):
+    """Health check endpoint (database and broker connectivity)."""
+    checks = {"database": "connected", "broker": "connected"}
+    
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except Exception as e:
+        checks["database"] = f"unavailable: {type(e).__name__}"
+    
+    try:
+        await asyncio.wait_for(run_in_threadpool(broker_reachable), timeout=5)
+    except Exception as e:
+        checks["broker"] = f"unavailable: {type(e).__name__}"
+    
+    healthy = all(value == "connected" for value in checks.values())
+    if not healthy:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "healthy" if healthy else "unhealthy", **checks}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics: worker pipeline metrics (from PROMETHEUS_MULTIPROC_DIR),
+    audit queue depth and in-flight audits by status.
+    """
+    # Sync route: the scrape-time collectors query the database and the broker
+    return Response(content=render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
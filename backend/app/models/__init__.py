@@ -3,16 +3,28 @@ from app.models.models import (
     Repository,
     Audit,
     Issue,
+    FileCheckpoint,
+    AuditCounter,
     AuditStatus,
+    FINISHED_STATUSES,
     IssueSeverity,
     IssueType,
+    issue_search_vector,
+    issue_load_columns,
+    expand_fixed_code,
 )
 
 __all__ = [
     "Repository",
     "Audit",
     "Issue",
+    "FileCheckpoint",
+    "AuditCounter",
     "AuditStatus",
+    "FINISHED_STATUSES",
     "IssueSeverity",
     "IssueType",
+    "issue_search_vector",
+    "issue_load_columns",
+    "expand_fixed_code",
 ]
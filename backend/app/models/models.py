@@ -1,9 +1,11 @@
 """
 Database models for the AutoDev Agent.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, Enum, ForeignKey, Index, UniqueConstraint, event, false, inspect, text, update
+from sqlalchemy.orm import Session, column_property, relationship
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql import func
+from app.core.compression import ArchivableJSON, apply_code_diff
 from app.core.database import Base
 import enum
 
@@ -20,6 +22,10 @@ class AuditStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+# Audits whose counters no longer change (summed into audit_counters)
+FINISHED_STATUSES = (AuditStatus.COMPLETED, AuditStatus.FAILED)
+
+
 class IssueSeverity(str, enum.Enum):
     """Enumeration for issue severity levels."""
     LOW = "low"
@@ -59,41 +65,72 @@ class Audit(Base):
     """Model for audit jobs."""
     
     __tablename__ = "audits"
+    __table_args__ = (
+        # Keyset pagination of the audit list, unfiltered and by status/repository
+        Index("ix_audits_created_at_id", "created_at", "id"),
+        Index("ix_audits_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_audits_repository_id_created_at_id", "repository_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     repository_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
-    status = Column(Enum(AuditStatus), default=AuditStatus.PENDING, index=True)
+    # active_history: the previous value is loaded on change, for audit_counters
+    status = column_property(Column(Enum(AuditStatus), default=AuditStatus.PENDING, index=True), active_history=True)
     task_id = Column(String, unique=True, index=True)  # Celery task ID
     
+    # What was audited: used to coalesce duplicate requests
+    branch = Column(String, nullable=True)
+    commit_sha = Column(String(40), nullable=True)  # Branch HEAD when the audit was requested
+    batch_id = Column(String(32), nullable=True, index=True)  # Bulk request that created the audit
+    
+    # Fan-out analysis (see worker.tasks.audit_task.dispatch_shards)
+    fanout = Column(Boolean, nullable=False, default=False, server_default=false())  # Requested, or chosen by the worker
+    chord_id = Column(String, nullable=True)  # Finalize task of the shards in flight; cleared when it runs
+    
     # Metadata
     total_files = Column(Integer, default=0)
     processed_files = Column(Integer, default=0)
-    issues_found = Column(Integer, default=0)
-    fixes_applied = Column(Integer, default=0)
+    issues_found = column_property(Column(Integer, default=0), active_history=True)
+    fixes_applied = column_property(Column(Integer, default=0), active_history=True)
     
     # Results
-    pr_url = Column(String, nullable=True)
+    pr_url = column_property(Column(String, nullable=True), active_history=True)
     pr_number = Column(Integer, nullable=True)
     error_message = Column(Text, nullable=True)
-    logs = Column(JSON, default=list)
+    logs = Column(ArchivableJSON, default=list)  # Compressed once archived (see app.core.compaction)
+    
+    # Incremented on every change to the audit or its issues (used for ETags)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Storage compaction (a resumed audit is compacted again once it finishes)
+    compacted_at = Column(DateTime(timezone=True), nullable=True)  # Issue fixes stored as diffs
+    logs_archived_at = Column(DateTime(timezone=True), nullable=True)  # Logs compressed
+    
     # Relationships
     repository = relationship("Repository", back_populates="audits")
     issues = relationship("Issue", back_populates="audit", cascade="all, delete-orphan")
+    checkpoints = relationship("FileCheckpoint", back_populates="audit", cascade="all, delete-orphan")
 
 
 class Issue(Base):
     """Model for detected issues."""
     
     __tablename__ = "issues"
+    __table_args__ = (
+        # Cross-audit search (GET /api/issues); audit_id has its own index below
+        Index("ix_issues_severity_type_fixed_id", "severity", "issue_type", "is_fixed", "id"),
+        Index("ix_issues_issue_type", "issue_type"),
+        Index("ix_issues_file_path_pattern", "file_path", postgresql_ops={"file_path": "text_pattern_ops"}),
+        Index("ix_issues_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False)
+    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False, index=True)
     
     # Issue details
     file_path = Column(String, nullable=False)
@@ -104,8 +141,9 @@ class Issue(Base):
     # Content
     description = Column(Text, nullable=False)
     original_code = Column(Text, nullable=True)
-    fixed_code = Column(Text, nullable=True)
+    fixed_code = Column(Text, nullable=True)  # NULL once compacted into fix_diff
     explanation = Column(Text, nullable=True)
+    fix_diff = Column(Text, nullable=True)  # fixed_code as a diff against original_code
     
     # Status
     is_fixed = Column(Integer, default=0)  # Boolean as integer
@@ -115,3 +153,189 @@ class Issue(Base):
     
     # Relationships
     audit = relationship("Audit", back_populates="issues")
+
+
+def issue_search_vector():
+    """
+    Full-text document of an issue (description and explanation).
+    
+    Constants are inlined rather than bound, so queries match the
+    ix_issues_search expression index exactly.
+    """
+    columns = Issue.__table__.c
+    return func.to_tsvector(
+        text("'english'"),
+        func.coalesce(columns.description, text("''"))
+        .op("||")(text("' '"))
+        .op("||")(func.coalesce(columns.explanation, text("''"))),
+    )
+
+
+# GIN index for GET /api/issues?q=... (PostgreSQL only)
+Index("ix_issues_search", issue_search_vector(), postgresql_using="gin").ddl_if(dialect="postgresql")
+
+
+def issue_load_columns(fields) -> list:
+    """Issue columns to load for the given fields (a compacted fixed_code is rebuilt from two others)."""
+    names = set(fields) | {"id"}
+    if "fixed_code" in names:
+        names |= {"original_code", "fix_diff"}
+    return [getattr(Issue, name) for name in sorted(names)]
+
+
+def expand_fixed_code(original_code, fixed_code, fix_diff):
+    """The issue's fixed code, whether stored in full or as a diff."""
+    if fixed_code is None and fix_diff is not None and original_code is not None:
+        return apply_code_diff(original_code, fix_diff)
+    return fixed_code
+
+
+@event.listens_for(Issue, "load")
+@event.listens_for(Issue, "refresh")
+def rebuild_fixed_code(target, context, attrs=None):
+    """Rebuild fixed_code of compacted issues as they are loaded."""
+    loaded = target.__dict__
+    if loaded.get("fix_diff") is not None and "fixed_code" in loaded and "original_code" in loaded:
+        set_committed_value(target, "fixed_code", expand_fixed_code(loaded["original_code"], loaded["fixed_code"], loaded["fix_diff"]))
+
+
+class FileCheckpoint(Base):
+    """Model for per-file analysis checkpoints, used to resume interrupted audits."""
+    
+    __tablename__ = "file_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("audit_id", "file_path", name="uq_file_checkpoints_audit_file"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False, index=True)
+    file_path = Column(String, nullable=False)  # Relative to the clone root
+    issues_count = Column(Integer, default=0)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    audit = relationship("Audit", back_populates="checkpoints")
+
+
+class AuditCounter(Base):
+    """Running totals of finished audits per status, maintained on every status transition."""
+    
+    __tablename__ = "audit_counters"
+    
+    status = Column(Enum(AuditStatus), primary_key=True)
+    audits = Column(Integer, nullable=False, default=0)
+    issues_found = Column(Integer, nullable=False, default=0)
+    fixes_applied = Column(Integer, nullable=False, default=0)
+    prs_created = Column(Integer, nullable=False, default=0)
+
+
+@event.listens_for(Session, "before_flush")
+def bump_audit_versions(session, flush_context, instances):
+    """
+    Bump the version of every audit whose row or issues change in this flush.
+    
+    The increment is done in SQL (version = version + 1), so concurrent
+    writers such as fan-out shards never produce the same version twice.
+    """
+    bumped = set()
+    for obj in session.dirty:
+        if isinstance(obj, Audit) and session.is_modified(obj, include_collections=False):
+            obj.version = Audit.version + 1
+            bumped.add(obj.id)
+    
+    issue_audit_ids = {
+        obj.audit_id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, Issue) and obj.audit_id is not None
+    } - bumped
+    if issue_audit_ids:
+        session.connection().execute(
+            update(Audit.__table__)
+            .where(Audit.__table__.c.id.in_(issue_audit_ids))
+            .values(version=Audit.__table__.c.version + 1)
+        )
+
+
+def _previous_value(obj, key: str):
+    """Value of an attribute before the pending changes (loaded thanks to active_history)."""
+    history = inspect(obj).attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return getattr(obj, key)
+
+
+def _counter_contribution(status, issues_found, fixes_applied, pr_url):
+    """What one audit adds to audit_counters: nothing until it is finished."""
+    if status not in FINISHED_STATUSES:
+        return None
+    return status, (1, issues_found or 0, fixes_applied or 0, 1 if pr_url else 0)
+
+
+def apply_counter_deltas(connection, deltas: dict):
+    """Upsert the counter deltas, one row per finished status."""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif connection.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return
+    
+    table = AuditCounter.__table__
+    for status, (audits, issues_found, fixes_applied, prs_created) in deltas.items():
+        statement = insert(table).values(
+            status=status,
+            audits=audits,
+            issues_found=issues_found,
+            fixes_applied=fixes_applied,
+            prs_created=prs_created,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.status],
+            set_={
+                "audits": table.c.audits + statement.excluded.audits,
+                "issues_found": table.c.issues_found + statement.excluded.issues_found,
+                "fixes_applied": table.c.fixes_applied + statement.excluded.fixes_applied,
+                "prs_created": table.c.prs_created + statement.excluded.prs_created,
+            },
+        )
+        connection.execute(statement)
+
+
+@event.listens_for(Session, "before_flush")
+def maintain_audit_counters(session, flush_context, instances):
+    """
+    Keep audit_counters in step with finished audits, in the same transaction.
+    
+    An audit contributes to the counters once it is completed or failed; the
+    contribution moves or is withdrawn when it is resumed, changed or deleted.
+    """
+    tracked = ("status", "issues_found", "fixes_applied", "pr_url")
+    deltas = {}
+    
+    def add(contribution, sign):
+        if contribution is None:
+            return
+        status, values = contribution
+        current = deltas.setdefault(status, [0, 0, 0, 0])
+        for i, value in enumerate(values):
+            current[i] += sign * value
+    
+    for obj in session.new:
+        if isinstance(obj, Audit):
+            add(_counter_contribution(*(getattr(obj, key) for key in tracked)), 1)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Audit) and any(inspect(obj).attrs[key].history.has_changes() for key in tracked):
+            add(_counter_contribution(*(_previous_value(obj, key) for key in tracked)), -1)
+            add(_counter_contribution(*(getattr(obj, key) for key in tracked)), 1)
+    
+    for obj in session.deleted:
+        if isinstance(obj, Audit):
+            add(_counter_contribution(*(_previous_value(obj, key) for key in tracked)), -1)
+    
+    deltas = {status: values for status, values in deltas.items() if any(values)}
+    if deltas:
+        apply_counter_deltas(session.connection(), deltas)
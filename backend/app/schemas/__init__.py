@@ -1,22 +1,50 @@
 """Schemas module initialization."""
 from app.schemas.schemas import (
     RepositoryCreate,
+    BulkRepository,
+    BulkAuditCreate,
+    AuditPurgeRequest,
+    AuditResumeRequest,
     RepositoryResponse,
     IssueResponse,
     AuditResponse,
     AuditDetailResponse,
+    IssuePageResponse,
+    IssueSearchResponse,
+    LogPageResponse,
     AuditCreateResponse,
+    BulkAuditRejection,
+    BulkAuditCreateResponse,
+    AuditPurgeResponse,
+    AuditBatchStatusResponse,
     StatusResponse,
     StatisticsResponse,
+    StorageUsageResponse,
+    TableSizeResponse,
+    DatabaseStorageResponse,
 )
 
 __all__ = [
     "RepositoryCreate",
+    "BulkRepository",
+    "BulkAuditCreate",
+    "AuditPurgeRequest",
+    "AuditResumeRequest",
     "RepositoryResponse",
     "IssueResponse",
     "AuditResponse",
     "AuditDetailResponse",
+    "IssuePageResponse",
+    "IssueSearchResponse",
+    "LogPageResponse",
     "AuditCreateResponse",
+    "BulkAuditRejection",
+    "BulkAuditCreateResponse",
+    "AuditPurgeResponse",
+    "AuditBatchStatusResponse",
     "StatusResponse",
     "StatisticsResponse",
+    "StorageUsageResponse",
+    "TableSizeResponse",
+    "DatabaseStorageResponse",
 ]
@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation.
 """
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from app.models import AuditStatus, IssueSeverity, IssueType
 
@@ -17,6 +17,36 @@ class RepositoryCreate(BaseModel):
     branch: Optional[str] = Field(default="main", description="Branch to analyze")
     github_token: Optional[str] = Field(default=None, description="Custom GitHub Token for this audit")
     gemini_api_key: Optional[str] = Field(default=None, description="Custom Gemini API Key for this audit")
+    fanout: bool = Field(default=False, description="Split analysis into shards processed in parallel by multiple workers")
+    force: bool = Field(default=False, description="Start a new audit even if the same commit is being or has been audited")
+
+
+class BulkRepository(BaseModel):
+    """One repository of a bulk audit request."""
+    url: str = Field(..., description="GitHub repository URL")
+    branch: Optional[str] = Field(default="main", description="Branch to analyze")
+
+
+class BulkAuditCreate(BaseModel):
+    """Schema for auditing many repositories in one request."""
+    repositories: List[BulkRepository] = Field(..., min_length=1, description="Repositories to audit")
+    github_token: Optional[str] = Field(default=None, description="Custom GitHub Token for these audits")
+    gemini_api_key: Optional[str] = Field(default=None, description="Custom Gemini API Key for these audits")
+    fanout: bool = Field(default=False, description="Split analysis into shards processed in parallel by multiple workers")
+    force: bool = Field(default=False, description="Start new audits even for repositories that already have one in progress")
+
+
+class AuditPurgeRequest(BaseModel):
+    """Schema for purging finished audits in bulk."""
+    older_than_days: Optional[int] = Field(default=None, ge=0, description="Purge audits created more than this many days ago")
+    repository_id: Optional[int] = Field(default=None, description="Purge audits of this repository")
+    dry_run: bool = Field(default=False, description="Only count the audits that would be purged")
+
+
+class AuditResumeRequest(BaseModel):
+    """Schema for resuming an interrupted audit."""
+    github_token: Optional[str] = Field(default=None, description="Custom GitHub Token for this audit")
+    gemini_api_key: Optional[str] = Field(default=None, description="Custom Gemini API Key for this audit")
 
 
 class RepositoryResponse(BaseModel):
@@ -64,6 +94,8 @@ class AuditResponse(BaseModel):
     repository_id: int
     status: AuditStatus
     task_id: Optional[str] = None  # Can be None initially
+    branch: Optional[str] = None
+    commit_sha: Optional[str] = None
     total_files: int
     processed_files: int
     issues_found: int
@@ -74,6 +106,7 @@ class AuditResponse(BaseModel):
     created_at: datetime
     started_at: Optional[datetime]
     completed_at: Optional[datetime]
+    version: int = 1
     
     class Config:
         from_attributes = True
@@ -89,12 +122,73 @@ class AuditDetailResponse(AuditResponse):
         from_attributes = True
 
 
+class IssuePageResponse(BaseModel):
+    """Schema for a page of an audit's issues (only the requested fields)."""
+    items: List[dict]
+    total: int
+    offset: int
+    limit: int
+
+
+class IssueSearchResponse(BaseModel):
+    """Schema for a page of cross-audit issue search results."""
+    items: List[dict]
+    next_cursor: Optional[str] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None  # Only the requested facets
+
+
+class LogPageResponse(BaseModel):
+    """Schema for a page of an audit's log entries."""
+    items: List[dict]
+    total: int
+    offset: int
+    limit: int
+
+
 class AuditCreateResponse(BaseModel):
     """Schema for audit creation response."""
     audit_id: int
     task_id: Optional[str] = None
     status: AuditStatus
     message: str
+    coalesced: bool = False  # True when an existing audit was returned instead of starting a new one
+
+
+class BulkAuditRejection(BaseModel):
+    """A repository of a bulk request that could not be audited."""
+    url: str
+    error: str
+
+
+class BulkAuditCreateResponse(BaseModel):
+    """Schema for bulk audit creation response."""
+    batch_id: str
+    audits: List[AuditCreateResponse]
+    created: int
+    coalesced: int
+    rejected: List[BulkAuditRejection] = []
+
+
+class AuditPurgeResponse(BaseModel):
+    """Schema for audit purge response."""
+    matched: int
+    deleted: int = 0
+    status: str  # "completed", "queued" or "dry_run"
+    task_id: Optional[str] = None  # Background purge task, when queued
+
+
+class AuditBatchStatusResponse(BaseModel):
+    """Aggregated progress of the audits created by one bulk request."""
+    batch_id: str
+    total_audits: int
+    status_counts: Dict[str, int]
+    finished: bool
+    progress: float = Field(..., ge=0.0, le=100.0)  # Share of finished audits
+    total_files: int
+    processed_files: int
+    issues_found: int
+    fixes_applied: int
+    prs_created: int
 
 
 # =============================================================================
@@ -124,3 +218,35 @@ class StatisticsResponse(BaseModel):
     total_issues_found: int
     total_fixes_applied: int
     total_prs_created: int
+
+
+class StorageUsageResponse(BaseModel):
+    """Schema for clone storage usage."""
+    clone_dir: str
+    clone_count: int
+    used_bytes: int
+    quota_bytes: int
+    disk_free_bytes: int
+
+
+class TableSizeResponse(BaseModel):
+    """Schema for the on-disk size of one table (PostgreSQL)."""
+    table: str
+    heap_bytes: int
+    toast_bytes: int  # Out-of-line storage of large values (code blocks, logs)
+    index_bytes: int
+    estimated_rows: int
+
+
+class DatabaseStorageResponse(BaseModel):
+    """Schema for database storage usage and compaction progress."""
+    tables: List[TableSizeResponse]  # Empty on databases other than PostgreSQL
+    issues: int
+    issues_compacted: int  # Fix stored as a diff
+    original_code_chars: int
+    fixed_code_chars: int
+    fix_diff_chars: int
+    audits: int
+    audits_compacted: int
+    audits_logs_archived: int
+    audits_pending_compaction: int
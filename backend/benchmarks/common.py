@@ -0,0 +1,143 @@
+"""
+Benchmark utilities - Latency summaries, result files and baseline comparison.
+
+Every benchmark writes one JSON document: the configuration it ran with,
+the environment (Python, CPU, git commit) and its results. Two documents
+of the same benchmark can be compared metric by metric, so a change can be
+checked against a baseline saved before it.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: List[float]) -> dict:
+    """Count, mean, p50, p99 and max of a list of durations (seconds)."""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 6),
+        "p50": round(percentile(values, 50), 6),
+        "p99": round(percentile(values, 99), 6),
+        "max": round(max(values), 6),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the working tree being benchmarked, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(benchmark: str, config: dict, results: dict) -> dict:
+    """Wrap results with their configuration and environment."""
+    return {
+        "benchmark": benchmark,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "git_commit": git_commit(),
+        },
+        "config": config,
+        "results": results,
+    }
+
+
+def save_report(report: dict, path: str):
+    """Write a report as indented JSON."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load_report(path: str) -> dict:
+    """Read a report written by save_report()."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of nested results, keyed by dotted path."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare_reports(
+    current: dict,
+    baseline: dict,
+    tracked: Iterable[str],
+    higher_is_better: Iterable[str] = (),
+    max_regression: Optional[float] = None,
+) -> Tuple[List[str], List[str]]:
+    """
+    Compare the results of two reports of the same benchmark.
+
+    Only metrics whose dotted path ends with one of `tracked` are compared
+    (e.g. "p50", "files_per_second"); counts and totals are left out. They
+    are lower-is-better unless they end with one of higher_is_better.
+
+    Args:
+        current: Report of this run
+        baseline: Saved report to compare against
+        tracked: Suffixes of the compared metrics
+        higher_is_better: Suffixes of throughput-like metrics
+        max_regression: Percentage beyond which a metric regresses (None = report only)
+
+    Returns:
+        Tuple of (table lines, regressed metric paths)
+    """
+    if current["benchmark"] != baseline["benchmark"]:
+        raise ValueError(f"Cannot compare {current['benchmark']} results with {baseline['benchmark']} results")
+
+    tracked = tuple(tracked)
+    higher_is_better = tuple(higher_is_better)
+    now = {path: value for path, value in flatten(current["results"]).items() if path.endswith(tracked)}
+    before = {path: value for path, value in flatten(baseline["results"]).items() if path.endswith(tracked)}
+
+    lines = []
+    if current["config"] != baseline["config"]:
+        changed = sorted(key for key in current["config"].keys() | baseline["config"].keys()
+                         if current["config"].get(key) != baseline["config"].get(key))
+        lines.append(f"⚠️  Configurations differ ({', '.join(changed)}): results are not comparable")
+    lines.append(f"{'metric':<60} {'baseline':>12} {'current':>12} {'change':>9}")
+    regressions = []
+
+    for path in sorted(now.keys() & before.keys()):
+        old, new = before[path], now[path]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = -change if path.endswith(higher_is_better) else change
+        regressed = max_regression is not None and worse > max_regression
+        if regressed:
+            regressions.append(path)
+        lines.append(f"{path:<60} {old:>12.6g} {new:>12.6g} {change:>+8.1f}%{'  ✗' if regressed else ''}")
+
+    for path in sorted(now.keys() ^ before.keys()):
+        lines.append(f"{path:<60} {'(only in ' + ('current' if path in now else 'baseline') + ')':>35}")
+    return lines, regressions
@@ -0,0 +1,302 @@
+"""
+End-to-end benchmark - The full audit pipeline, offline.
+
+Generates synthetic repositories, publishes them as local bare remotes and
+runs process_repository_audit on each (eagerly, in this process) against a
+stub LLM and a stub GitHub API, with a throwaway SQLite database unless
+--database-url points at a migrated PostgreSQL. Reports files/sec, p50/p99
+latency of every traced stage, database statements per file and peak
+memory, and saves them as JSON for later comparison:
+
+    python -m benchmarks.e2e --files 200 --languages python:3,javascript:1
+    python -m benchmarks.e2e --files 200 --compare benchmarks/results/baseline.json
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.common import build_report, compare_reports, load_report, save_report, summarize
+
+BENCHMARK = "e2e"
+
+# Metrics compared with --compare (dotted path suffixes)
+TRACKED_METRICS = ("files_per_second", ".p50", ".p99", "_per_file", "peak_rss_mb")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end audit benchmark")
+    parser.add_argument("--audits", type=int, default=3, help="Repositories audited one after another")
+    parser.add_argument("--files", type=int, default=50, help="Analyzable files per repository")
+    parser.add_argument("--languages", default="python:3,javascript:1,typescript:1,go:1", help="Language mix (language:weight,...)")
+    parser.add_argument("--lines", type=int, default=80, help="Approximate lines per file")
+    parser.add_argument("--issues-per-file", type=int, default=2, help="Issues the stub LLM reports per file")
+    parser.add_argument("--llm-latency", type=float, default=50, help="Mean stub LLM latency (ms)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Share of LLM calls failing with an error")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="Share of LLM calls failing with a 429")
+    parser.add_argument("--backoff-scale", type=float, default=0.001, help="Multiplier of the agent's 429 backoff sleeps")
+    parser.add_argument("--github-latency", type=float, default=20, help="Stub GitHub API latency per request (ms)")
+    parser.add_argument("--clone-mode", default="sparse", choices=["sparse", "full"])
+    parser.add_argument("--database-url", help="Migrated PostgreSQL database to use instead of SQLite")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/e2e-<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare with a saved result file")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Percent change failing --compare")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's warnings (retries, failed files)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(options, workdir: str, github_url: str):
+    """Point the settings at the sandbox; must run before any app or worker import."""
+    os.environ.update({
+        "GEMINI_API_KEY": "benchmark",
+        "GITHUB_TOKEN": "benchmark",
+        "GITHUB_API_URL": github_url,
+        "DATABASE_URL": options.database_url or "postgresql://benchmark@localhost/unused",
+        "EVENTS_BACKEND": "none",
+        "RESPONSE_CACHE_BACKEND": "none",
+        "WORKER_METRICS_DIR": "",
+        "WORKER_METRICS_PORT": "0",
+        "TRACING_EXPORTER": "benchmarks.stubs:span_collector",
+        "TRACING_SAMPLE_RATIO": "1.0",
+        "CLONE_DIR": os.path.join(workdir, "clones"),
+        "CLONE_MODE": options.clone_mode,
+        "CLONE_DISK_QUOTA_MB": "0",
+        "CLONE_MIN_FREE_MB": "0",
+        "CLONE_RESERVE_MB": "0",
+        "PR_CREATION_MODE": "api",
+        "MAX_FILES_PER_REPO": str(options.files * 2),
+        "AUDIT_MAX_RUNNING_PER_OWNER": "0",
+        "AUDIT_FANOUT_MIN_FILES": "0",
+    })
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+
+def setup_database(options, workdir: str):
+    """Return the engine audits will use (SQLite by default), with tables in place."""
+    from sqlalchemy import create_engine
+
+    from app.core.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401  (registers the tables)
+
+    if options.database_url:
+        return engine
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'benchmark.db')}")
+    SessionLocal.configure(bind=engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+class StatementCounter:
+    """Counts the statements executed through an engine and their time."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = 0
+        self.seconds = 0.0
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _started(conn, cursor, statement, parameters, context, executemany):
+            context._benchmark_started = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _finished(conn, cursor, statement, parameters, context, executemany):
+            self.statements += 1
+            self.seconds += time.perf_counter() - context._benchmark_started
+
+
+class ScaledTime:
+    """Stand-in for the agent module's `time`, shortening its backoff sleeps."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.requested_seconds = 0.0
+
+    def sleep(self, seconds: float):
+        self.requested_seconds += seconds
+        time.sleep(seconds * self.scale)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def run_audit(repository_url: str, name: str) -> dict:
+    """Create the rows of one audit, run it eagerly and return its outcome."""
+    from app.core.database import SessionLocal
+    from app.models import Audit, AuditStatus, Repository
+    from worker.tasks.audit_task import process_repository_audit
+
+    db = SessionLocal()
+    try:
+        repository = Repository(url=repository_url, owner="benchmark", name=name, branch="main")
+        db.add(repository)
+        db.flush()
+        audit = Audit(repository_id=repository.id, status=AuditStatus.PENDING, branch="main")
+        db.add(audit)
+        db.commit()
+        audit_id = audit.id
+    finally:
+        db.close()
+
+    started = time.perf_counter()
+    process_repository_audit.apply(args=(audit_id,))
+    seconds = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        audit = db.query(Audit).filter(Audit.id == audit_id).one()
+        if audit.status != AuditStatus.COMPLETED:
+            raise RuntimeError(f"Audit of {name} ended {audit.status.value}: {audit.error_message}")
+        memory = next((entry["data"] for entry in reversed(audit.logs) if "memory" in entry.get("data", {})), {})
+        return {
+            "seconds": seconds,
+            "files": audit.processed_files,
+            "issues": audit.issues_found,
+            "fixes": audit.fixes_applied,
+            "pr_url": audit.pr_url,
+            "memory": memory.get("memory", {}),
+        }
+    finally:
+        db.close()
+
+
+def stage_latencies(spans) -> dict:
+    """Latency summary of every span name (pipeline stages, LLM and GitHub calls)."""
+    durations = {}
+    for span in spans:
+        durations.setdefault(span.name, []).append((span.end_time - span.start_time) / 1e9)
+    return {name: summarize(values) for name, values in sorted(durations.items())}
+
+
+def run(options) -> dict:
+    """Run the benchmark and return its results."""
+    from benchmarks.stubs import StubGitHub, StubModel
+    from benchmarks.synthetic import create_repository, parse_language_mix
+
+    language_mix = parse_language_mix(options.languages)
+    github = StubGitHub(latency=options.github_latency / 1000).start()
+
+    with tempfile.TemporaryDirectory(prefix="autodev-benchmark-") as workdir:
+        configure_environment(options, workdir, github.url)
+        engine = setup_database(options, workdir)
+        counter = StatementCounter(engine)
+
+        from app.core.tracing import configure_tracing, flush_spans
+        from worker.agents.gemini_agent import gemini_agent
+        from worker.memory import MB, peak_rss_bytes
+
+        configure_tracing("autodev-benchmark")
+        model = StubModel(
+            latency=options.llm_latency / 1000,
+            error_rate=options.llm_error_rate,
+            rate_limit_rate=options.llm_rate_limit_rate,
+            issues_per_file=options.issues_per_file,
+            seed=options.seed,
+        )
+        gemini_agent.model = model
+        backoff = ScaledTime(options.backoff_scale)
+        sys.modules["worker.agents.gemini_agent"].time = backoff
+
+        remotes = []
+        for i in range(options.audits):
+            name = f"synthetic-{i}"
+            remotes.append((create_repository(
+                workdir, name, options.files, language_mix,
+                lines_per_file=options.lines, seed=options.seed + i,
+            ), name))
+        print(f"📦 Generated {options.audits} repositories of {options.files} files")
+
+        audits = []
+        statements_before = counter.statements
+        started = time.perf_counter()
+        for url, name in remotes:
+            audits.append(run_audit(url, name))
+            print(f"⚙️  {name}: {audits[-1]['files']} files in {audits[-1]['seconds']:.2f}s")
+        wall_seconds = time.perf_counter() - started
+        statements = counter.statements - statements_before
+
+        flush_spans()
+        github.stop()
+
+    files = sum(audit["files"] for audit in audits)
+    stage_peaks = {}
+    for audit in audits:
+        for stage, stats in audit["memory"].items():
+            stage_peaks[stage] = max(stage_peaks.get(stage, 0), stats["rss_delta_mb"])
+
+    return {
+        "totals": {
+            "audits": len(audits),
+            "files": files,
+            "issues": sum(audit["issues"] for audit in audits),
+            "fixes": sum(audit["fixes"] for audit in audits),
+            "pull_requests": sum(1 for audit in audits if audit["pr_url"]),
+            "llm_calls": dict(model.calls),
+            "llm_backoff_requested_seconds": round(backoff.requested_seconds, 3),
+            "github_requests": dict(github.requests),
+        },
+        "files_per_second": round(files / wall_seconds, 3),
+        "audit_seconds": summarize([audit["seconds"] for audit in audits]),
+        "stages": stage_latencies(span_collector_spans()),
+        "db": {
+            "statements_per_file": round(statements / max(files, 1), 2),
+            "seconds_per_file": round(counter.seconds / max(files, 1), 6),
+        },
+        "memory": {
+            "peak_rss_mb": round(peak_rss_bytes() / MB, 1),
+            "max_stage_rss_delta_mb": stage_peaks,
+        },
+    }
+
+
+def span_collector_spans():
+    """Spans recorded by the benchmark's exporter."""
+    from benchmarks.stubs import span_collector
+    return span_collector().get_finished_spans()
+
+
+def print_summary(results: dict):
+    """Headline numbers of a run."""
+    print(f"📊 {results['totals']['files']} files at {results['files_per_second']} files/sec, "
+          f"{results['db']['statements_per_file']} statements/file, peak RSS {results['memory']['peak_rss_mb']}MB")
+    for name, stats in results["stages"].items():
+        print(f"   {name:<45} p50 {stats['p50'] * 1000:9.1f}ms   p99 {stats['p99'] * 1000:9.1f}ms   (n={stats['count']})")
+
+
+def main(argv=None) -> int:
+    options = parse_args(argv)
+    if not options.verbose:
+        logging.disable(logging.WARNING)
+    results = run(options)
+    print_summary(results)
+    config = {key: value for key, value in vars(options).items() if key not in ("output", "compare", "max_regression", "database_url", "verbose")}
+    config["database"] = "postgresql" if options.database_url else "sqlite"
+    report = build_report(BENCHMARK, config, results)
+
+    output = options.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{BENCHMARK}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json",
+    )
+    save_report(report, output)
+    print(f"✅ Results saved to {output}")
+
+    if options.compare:
+        lines, regressions = compare_reports(
+            report, load_report(options.compare),
+            tracked=TRACKED_METRICS,
+            higher_is_better=("files_per_second",),
+            max_regression=options.max_regression,
+        )
+        print("\n".join(lines))
+        if regressions:
+            print(f"❌ {len(regressions)} metrics regressed by more than {options.max_regression}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""
+Micro-benchmarks - Timings of the pipeline's CPU- and DB-heavy helpers.
+
+Each benchmark builds a fixed, seeded fixture once, then times its target
+over several rounds (fixtures are reset between rounds, outside the
+timing). Results are saved as JSON and can be compared with a baseline:
+
+    python -m benchmarks.micro --output benchmarks/results/micro-baseline.json
+    python -m benchmarks.micro --compare benchmarks/results/micro-baseline.json
+    python -m benchmarks.micro --only apply_fixes,append_log --quick
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, NamedTuple, Optional
+
+from benchmarks.common import build_report, compare_reports, load_report, save_report, summarize
+
+BENCHMARK = "micro"
+
+# Metrics compared with --compare (dotted path suffixes)
+TRACKED_METRICS = (".p50",)
+
+
+class Case(NamedTuple):
+    """A prepared benchmark: `run` is timed, `reset` restores the fixture between rounds."""
+    run: Callable[[], object]
+    items: int  # Work units per round (files, entries, issues), reported for context
+    rounds: int
+    reset: Optional[Callable[[], None]] = None
+
+
+BENCHMARKS: Dict[str, Callable[[int, str], Case]] = {}
+
+
+def benchmark(name: str):
+    """Register a fixture factory: factory(scale, workdir) -> Case."""
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return decorator
+
+
+def configure_environment():
+    """Offline settings; must run before any app or worker import."""
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "postgresql://benchmark@localhost/unused")
+    os.environ.update({
+        "EVENTS_BACKEND": "none",
+        "TRACING_EXPORTER": "none",
+        "WORKER_METRICS_DIR": "",
+        "MAX_FILES_PER_REPO": "1000000",  # Discovery returns the whole fixture tree
+    })
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+
+# =============================================================================
+# Fixtures and benchmarks
+# =============================================================================
+
+@benchmark("discover_files")
+def discover_files_case(scale: int, workdir: str) -> Case:
+    """A 100k-entry tree: sources, other files and a vendored node_modules."""
+    from worker.tasks.audit_task import discover_files
+
+    root = os.path.join(workdir, "tree")
+    extensions = [".py", ".js", ".ts", ".go", ".md", ".json", ".png", ".lock"]
+    entries = 100_000 // scale
+    for i in range(entries):
+        directory = os.path.join(root, "node_modules" if i % 10 == 0 else "src", f"d{i // 100 % 40}", f"d{i // 4000}")
+        os.makedirs(directory, exist_ok=True)
+        open(os.path.join(directory, f"f{i}{extensions[i % len(extensions)]}"), "w").close()
+
+    return Case(run=lambda: discover_files(root), items=entries, rounds=5)
+
+
+@benchmark("append_log")
+def append_log_case(scale: int, workdir: str) -> Case:
+    """Appending to an audit whose log already holds 5000 entries (SQLite)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.core.database import Base
+    from app.models import Audit, Repository
+    from worker.tasks.audit_task import append_log
+
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'append_log.db')}")
+    Base.metadata.create_all(engine)
+    db = Session(engine)
+    repository = Repository(url="https://github.com/benchmark/logs", owner="benchmark", name="logs")
+    db.add(repository)
+    db.flush()
+    audit = Audit(repository_id=repository.id)
+    db.add(audit)
+    db.commit()
+
+    existing = [
+        {"timestamp": "2024-01-01T00:00:00", "level": "INFO", "message": f"⚙️  Processed {i}/5000 files ({i * 2} issues found)"}
+        for i in range(5000 // scale)
+    ]
+    appends = 50 // scale
+
+    def reset():
+        audit.logs = list(existing)
+        db.commit()
+
+    def run():
+        for i in range(appends):
+            append_log(audit, db, "INFO", f"⚙️  Processed {i} files")
+
+    return Case(run=run, items=appends, rounds=5, reset=reset)
+
+
+@benchmark("apply_fixes")
+def apply_fixes_case(scale: int, workdir: str) -> Case:
+    """500 fixes in each of 20 files of 2000 lines."""
+    from worker.tasks.audit_task import apply_fixes
+
+    root = os.path.join(workdir, "fixes")
+    os.makedirs(root)
+    files = max(1, 20 // scale)
+    lines = [f"    value_{n} = compute(value_{n - 1}, {n})\n" for n in range(2000)]
+    content = "".join(lines)
+    issues = [
+        SimpleNamespace(
+            file_path=f"module_{f}.py",
+            original_code=lines[n].rstrip("\n"),
+            fixed_code=lines[n].rstrip("\n").replace("compute", "compute_safely"),
+            is_fixed=1,
+        )
+        for f in range(files)
+        for n in range(0, 2000, 4)
+    ]
+
+    def reset():
+        for f in range(files):
+            with open(os.path.join(root, f"module_{f}.py"), "w") as handle:
+                handle.write(content)
+
+    return Case(run=lambda: apply_fixes(root, issues), items=len(issues), rounds=10, reset=reset)
+
+
+@benchmark("analyze_file_parse")
+def analyze_file_case(scale: int, workdir: str) -> Case:
+    """analyze_file on a 2000-line file with an instant model answering 200 issues."""
+    from worker.agents.gemini_agent import GeminiAgent
+
+    rng = random.Random(0)
+    issues = [
+        {
+            "file_path": "src/app.py",
+            "line_number": rng.randint(1, 2000),
+            "issue_type": "logic_error",
+            "severity": "medium",
+            "description": f"Possible off-by-one in loop {i}",
+            "explanation": "The loop bound excludes the last element " * 3,
+            "original_code": f"for i in range(len(items) - 1):  # {i}",
+            "fixed_code": f"for i in range(len(items)):  # {i}",
+            "fix_explanation": "Iterate over every element",
+        }
+        for i in range(200 // scale)
+    ]
+    text = f"Here is my analysis.\n\n```json\n{json.dumps({'issues': issues}, indent=2)}\n```\n"
+    source = "".join(f"value_{n} = compute(value_{n - 1}, {n})\n" for n in range(2000 // scale))
+
+    agent = GeminiAgent.__new__(GeminiAgent)
+    agent._api_key = "benchmark"
+    agent.system_prompt = "You are a code reviewer."
+    agent.model = SimpleNamespace(generate_content=lambda prompt: SimpleNamespace(text=text, usage_metadata=None))
+    calls = 50
+
+    def run():
+        for _ in range(calls):
+            agent.analyze_file("src/app.py", source, "python")
+
+    return Case(run=run, items=calls, rounds=20)
+
+
+def large_audit(scale: int):
+    """A transient audit with 5000 issues and 2000 log entries."""
+    from app.models import Audit, AuditStatus, Issue, IssueSeverity, IssueType, Repository
+
+    rng = random.Random(0)
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    repository = Repository(id=1, url="https://github.com/benchmark/large", owner="benchmark",
+                            name="large", branch="main", created_at=now)
+    audit = Audit(
+        id=1, repository_id=1, repository=repository, status=AuditStatus.COMPLETED,
+        total_files=1000, processed_files=1000, issues_found=5000 // scale, fixes_applied=4000 // scale,
+        created_at=now, started_at=now, completed_at=now, version=1,
+        logs=[
+            {"timestamp": now.isoformat(), "level": "INFO", "message": f"⚙️  Processed {i} files"}
+            for i in range(2000 // scale)
+        ],
+    )
+    audit.issues = [
+        Issue(
+            id=i, audit_id=1, file_path=f"src/module_{i % 200}/file_{i % 50}.py",
+            line_number=rng.randint(1, 500),
+            issue_type=rng.choice(list(IssueType)), severity=rng.choice(list(IssueSeverity)),
+            description=f"Issue {i}: unchecked return value", explanation="Errors are silently ignored. " * 4,
+            original_code="result = call()\n" * 5, fixed_code="result = call()\nif result is None:\n    raise Error()\n" * 5,
+            is_fixed=1, created_at=now,
+        )
+        for i in range(5000 // scale)
+    ]
+    return audit
+
+
+@benchmark("audit_detail_model")
+def audit_detail_model_case(scale: int, workdir: str) -> Case:
+    """AuditDetailResponse validation and JSON dump of a large audit."""
+    from app.schemas import AuditDetailResponse
+
+    audit = large_audit(scale)
+    return Case(
+        run=lambda: AuditDetailResponse.model_validate(audit).model_dump_json(),
+        items=len(audit.issues), rounds=10,
+    )
+
+
+@benchmark("audit_detail_route")
+def audit_detail_route_case(scale: int, workdir: str) -> Case:
+    """The body GET /api/audits/{id} builds for a large audit (dicts + json.dumps)."""
+    from app.api.routes.audits import serialize_issues
+    from app.schemas import AuditResponse, RepositoryResponse
+
+    audit = large_audit(scale)
+
+    def run():
+        body = AuditResponse.model_validate(audit).model_dump(mode="json")
+        body["repository"] = RepositoryResponse.model_validate(audit.repository).model_dump(mode="json")
+        body["issues"] = serialize_issues(audit.issues, None)
+        body["logs"] = audit.logs
+        return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode()
+
+    return Case(run=run, items=len(audit.issues), rounds=10)
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def time_case(case: Case, rounds: Optional[int] = None) -> dict:
+    """Run a case once to warm up, then time each round (without garbage collection, like timeit)."""
+    durations = []
+    for round_index in range(1 + (rounds or case.rounds)):
+        if case.reset:
+            case.reset()
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            case.run()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        if round_index:
+            durations.append(elapsed)
+    stats = summarize(durations)
+    stats["per_item_us"] = round(stats["p50"] / max(case.items, 1) * 1e6, 3)
+    stats["items"] = case.items
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the pipeline's hot paths")
+    parser.add_argument("--only", help=f"Comma-separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--quick", action="store_true", help="Fixtures 10x smaller (smoke runs, not comparable)")
+    parser.add_argument("--rounds", type=int, help="Timed rounds per benchmark (default: per benchmark)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/micro-<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare with a saved result file")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Percent change failing --compare")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    options = parse_args(argv)
+    names = options.only.split(",") if options.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"❌ Unknown benchmarks: {', '.join(unknown)}")
+        return 2
+
+    configure_environment()
+    scale = 10 if options.quick else 1
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="autodev-micro-") as workdir:
+        for name in names:
+            case_dir = os.path.join(workdir, name)
+            os.makedirs(case_dir)
+            case = BENCHMARKS[name](scale, case_dir)
+            results[name] = stats = time_case(case, options.rounds)
+            print(f"   {name:<22} p50 {stats['p50'] * 1000:9.2f}ms   p99 {stats['p99'] * 1000:9.2f}ms   "
+                  f"({stats['items']} items, {stats['per_item_us']}µs/item)")
+
+    config = {"benchmarks": names, "quick": options.quick, "rounds": options.rounds}
+    report = build_report(BENCHMARK, config, results)
+    output = options.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results",
+        f"{BENCHMARK}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json",
+    )
+    save_report(report, output)
+    print(f"✅ Results saved to {output}")
+
+    if options.compare:
+        lines, regressions = compare_reports(
+            report, load_report(options.compare),
+            tracked=TRACKED_METRICS,
+            max_regression=options.max_regression,
+        )
+        print("\n".join(lines))
+        if regressions:
+            print(f"❌ {len(regressions)} metrics regressed by more than {options.max_regression}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
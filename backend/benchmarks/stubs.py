@@ -0,0 +1,199 @@
+"""
+Benchmark stubs - Offline stand-ins for the Gemini model and the GitHub API.
+
+StubModel replaces GeminiAgent.model: it answers after a configurable
+latency, fails or rate-limits at configurable rates, and reports issues
+the fix stage can really apply (see synthetic.FIXABLE_NAME). StubGitHub
+is a local HTTP server implementing the Git Data and pulls endpoints used
+by PR_CREATION_MODE="api". span_collector is the exporter factory the
+benchmark passes as TRACING_EXPORTER to read stage latencies back.
+"""
+import functools
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from benchmarks.synthetic import FIXABLE_NAME
+
+PROMPT_FILE = re.compile(r"\*\*File to Analyze\*\*: (.+)")
+PROMPT_CODE = re.compile(r"\*\*Code\*\*:\n```[^\n]*\n(.*)\n```", re.DOTALL)
+
+
+@functools.lru_cache(maxsize=None)
+def span_collector():
+    """In-memory span exporter shared by the benchmark (TRACING_EXPORTER factory)."""
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    return InMemorySpanExporter()
+
+
+class StubModel:
+    """
+    Drop-in for genai.GenerativeModel with simulated latency and failures.
+
+    Args:
+        latency: Mean seconds per call (each call takes 0.5x-1.5x of it)
+        error_rate: Share of calls failing with a generic error
+        rate_limit_rate: Share of calls failing with a 429 (retried by the agent)
+        issues_per_file: Issues reported per analyzed file
+        seed: Random seed of latencies and failures
+    """
+
+    def __init__(self, latency: float, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 issues_per_file: int = 2, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.issues_per_file = issues_per_file
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        with self._lock:
+            delay = self.latency * self._rng.uniform(0.5, 1.5)
+            roll = self._rng.random()
+        time.sleep(delay)
+
+        if roll < self.rate_limit_rate:
+            self.calls["rate_limited"] += 1
+            raise RuntimeError("429 Too Many Requests: resource exhausted")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.calls["error"] += 1
+            raise RuntimeError("503 Service Unavailable")
+
+        self.calls["success"] += 1
+        return SimpleNamespace(text=f"```json\n{json.dumps({'issues': self.issues_for(prompt)})}\n```", usage_metadata=None)
+
+    def issues_for(self, prompt: str) -> list:
+        """Issues renaming FIXABLE_NAME on the first distinct lines that use it."""
+        file_match = PROMPT_FILE.search(prompt)
+        code_match = PROMPT_CODE.search(prompt)
+        if not file_match or not code_match:
+            return []
+
+        issues = []
+        seen = set()
+        for number, line in enumerate(code_match.group(1).splitlines(), start=1):
+            if len(issues) >= self.issues_per_file:
+                break
+            if FIXABLE_NAME not in line or line in seen:
+                continue
+            seen.add(line)
+            issues.append({
+                "file_path": file_match.group(1).strip(),
+                "line_number": number,
+                "issue_type": "code_smell",
+                "severity": "low",
+                "description": f"Unclear variable name {FIXABLE_NAME}",
+                "explanation": "The name does not say what is being accumulated",
+                "original_code": line,
+                "fixed_code": line.replace(FIXABLE_NAME, "fixed_total"),
+                "fix_explanation": "Rename the variable",
+            })
+        return issues
+
+
+class StubGitHub:
+    """
+    Local GitHub REST API serving the calls of create_pull_request_from_files.
+
+    Every repository exists and has every branch; no blob is known
+    beforehand, so all changed files are uploaded like on a first audit.
+
+    Args:
+        latency: Seconds added to every request
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = Counter()
+        self._pull_numbers = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubGitHub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, method: str, path: str, body: dict) -> tuple:
+        """Return (status, JSON body) for one API call."""
+        parts = path.strip("/").split("/")
+        if len(parts) < 4 or parts[0] != "repos":
+            return 404, {"message": "Not Found"}
+        repo = "/".join(parts[1:3])
+        route = "/".join(parts[3:5])
+
+        with self._lock:
+            self.requests[f"{method} {route}"] += 1
+
+        if method == "GET" and route == "git/ref":
+            return 200, {"object": {"sha": fake_sha(repo, path)}}
+        if method == "GET" and route.startswith("git/commits"):
+            return 200, {"sha": parts[-1], "tree": {"sha": fake_sha(repo, "tree", parts[-1])}}
+        if method == "HEAD" and route.startswith("git/blobs"):
+            return 404, None
+        if method == "POST" and route == "git/blobs":
+            return 201, {"sha": fake_sha(repo, body.get("content", ""))}
+        if method == "POST" and route in ("git/trees", "git/commits"):
+            return 201, {"sha": fake_sha(repo, uuid.uuid4().hex)}
+        if method == "POST" and route == "git/refs":
+            return 201, {"ref": body.get("ref")}
+        if method == "PATCH" and route.startswith("git/refs"):
+            return 200, {"ref": "/".join(parts[5:])}
+        if method == "POST" and route == "pulls":
+            with self._lock:
+                self._pull_numbers[repo] += 1
+                number = self._pull_numbers[repo]
+            return 201, {"number": number, "html_url": f"{self.url}/{repo}/pull/{number}"}
+        return 404, {"message": "Not Found"}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the pooled client expects
+            disable_nagle_algorithm = True  # Headers and body are separate writes
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                time.sleep(stub.latency)
+                status, payload = stub.respond(self.command, self.path, body)
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(data)
+
+            do_GET = do_HEAD = do_POST = do_PATCH = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def fake_sha(*parts: str) -> str:
+    """Deterministic 40-character SHA for stub objects."""
+    return hashlib.sha1("\0".join(parts).encode()).hexdigest()
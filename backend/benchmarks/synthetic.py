@@ -0,0 +1,169 @@
+"""
+Synthetic repositories - Deterministic git repositories for benchmarks.
+
+Repositories have a configurable number of source files, language mix and
+file length, plus "noise" the audit must skip (binary assets, vendored
+node_modules). Each one is published as a local bare remote that supports
+partial clones, so the real sparse clone path is exercised offline.
+"""
+import os
+import random
+import subprocess
+from typing import Dict
+
+from worker.file_filters import SUPPORTED_EXTENSIONS
+
+# Every generated function mentions this name; the stub LLM "fixes" it
+FIXABLE_NAME = "legacy_total"
+
+TEMPLATES = {
+    "python": (
+        "def function_{n}(values):\n"
+        "    legacy_total = 0\n"
+        "    for value in values:\n"
+        "        legacy_total += value * {n}\n"
+        "    return legacy_total\n\n"
+    ),
+    "javascript": (
+        "function function{n}(values) {{\n"
+        "  let legacy_total = 0;\n"
+        "  for (const value of values) {{\n"
+        "    legacy_total += value * {n};\n"
+        "  }}\n"
+        "  return legacy_total;\n"
+        "}}\n\n"
+    ),
+    "typescript": (
+        "export function function{n}(values: number[]): number {{\n"
+        "  let legacy_total = 0;\n"
+        "  for (const value of values) {{\n"
+        "    legacy_total += value * {n};\n"
+        "  }}\n"
+        "  return legacy_total;\n"
+        "}}\n\n"
+    ),
+    "go": (
+        "func Function{n}(values []int) int {{\n"
+        "\tlegacy_total := 0\n"
+        "\tfor _, value := range values {{\n"
+        "\t\tlegacy_total += value * {n}\n"
+        "\t}}\n"
+        "\treturn legacy_total\n"
+        "}}\n\n"
+    ),
+}
+
+# Languages without a template get this C-like one
+DEFAULT_TEMPLATE = (
+    "int function_{n}(int *values, int count) {{\n"
+    "    int legacy_total = 0;\n"
+    "    for (int i = 0; i < count; i++) {{\n"
+    "        legacy_total += values[i] * {n};\n"
+    "    }}\n"
+    "    return legacy_total;\n"
+    "}}\n\n"
+)
+
+
+def parse_language_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse a language mix such as "python:3,javascript:1" into weights.
+
+    Raises:
+        ValueError: For languages the audit does not analyze
+    """
+    known = set(SUPPORTED_EXTENSIONS.values())
+    mix = {}
+    for part in spec.split(","):
+        language, _, weight = part.strip().partition(":")
+        if language not in known:
+            raise ValueError(f"Unsupported language {language!r} (known: {', '.join(sorted(known))})")
+        mix[language] = float(weight or 1)
+    return mix
+
+
+def extension_for(language: str) -> str:
+    """First file extension mapped to a language."""
+    return next(ext for ext, name in SUPPORTED_EXTENSIONS.items() if name == language)
+
+
+def source_file(language: str, lines: int, seed: int) -> str:
+    """Source text of about `lines` lines made of small functions."""
+    template = TEMPLATES.get(language, DEFAULT_TEMPLATE)
+    parts = []
+    count = 0
+    n = seed
+    while count < lines:
+        chunk = template.format(n=n)
+        parts.append(chunk)
+        count += chunk.count("\n")
+        n += 1
+    return "".join(parts)
+
+
+def git(cwd: str, *args: str):
+    """Run a git command quietly."""
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def create_repository(
+    root: str,
+    name: str,
+    files: int,
+    language_mix: Dict[str, float],
+    lines_per_file: int = 80,
+    files_per_directory: int = 20,
+    noise_ratio: float = 0.2,
+    seed: int = 0,
+) -> str:
+    """
+    Create a synthetic repository and its bare remote.
+
+    Args:
+        root: Directory to create the repository in
+        name: Repository name
+        files: Number of analyzable source files
+        language_mix: Language weights from parse_language_mix()
+        lines_per_file: Approximate length of each source file
+        files_per_directory: Source files per generated directory
+        noise_ratio: Extra skipped files (assets, node_modules) per source file
+        seed: Random seed; the same arguments always produce the same repository
+
+    Returns:
+        file:// URL of the bare remote (on the "main" branch)
+    """
+    rng = random.Random(seed)
+    work = os.path.join(root, f"{name}-work")
+    bare = os.path.join(root, f"{name}.git")
+    os.makedirs(work)
+
+    languages = list(language_mix)
+    weights = [language_mix[language] for language in languages]
+    for i in range(files):
+        language = rng.choices(languages, weights)[0]
+        directory = os.path.join(work, "src", f"module_{i // files_per_directory}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file_{i}{extension_for(language)}"), "w") as f:
+            f.write(source_file(language, lines_per_file, seed=i))
+
+    for i in range(int(files * noise_ratio)):
+        if i % 2:
+            directory = os.path.join(work, "assets")
+            filename = f"blob_{i}.bin"
+            content = rng.randbytes(4096)
+        else:
+            directory = os.path.join(work, "node_modules", f"package_{i}")
+            filename = "index.js"
+            content = source_file("javascript", 20, seed=i).encode()
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, filename), "wb") as f:
+            f.write(content)
+
+    git(work, "init", "-q", "-b", "main")
+    git(work, "add", "-A")
+    git(work, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "Synthetic repository")
+    git(root, "clone", "-q", "--bare", work, bare)
+    # Serve partial clones and lazy blob fetches like GitHub does
+    git(bare, "config", "uploadpack.allowFilter", "true")
+    git(bare, "config", "uploadpack.allowAnySHA1InWant", "true")
+    return f"file://{bare}"
@@ -0,0 +1,159 @@
+"""Baseline schema
+
+Creates the schema as it was managed by Base.metadata.create_all(). Databases
+created that way are adopted in place: existing tables are left alone and
+only missing tables and columns are added. In particular audits.version,
+which create_all() never added to an existing audits table, is added with
+a default of 1 (ADD COLUMN IF NOT EXISTS on PostgreSQL, so concurrent
+upgrades from several replicas are safe).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AUDIT_STATUSES = ('PENDING', 'CLONING', 'ANALYZING', 'FIXING', 'VALIDATING', 'CREATING_PR', 'COMPLETED', 'FAILED')
+ISSUE_TYPES = ('SYNTAX_ERROR', 'LOGIC_ERROR', 'SECURITY_VULNERABILITY', 'CODE_SMELL', 'PERFORMANCE_ISSUE', 'SECRET_EXPOSURE')
+ISSUE_SEVERITIES = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+
+
+def enum_type(values, name):
+    """Enum column type; the PostgreSQL type itself is created once, up front."""
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), 'postgresql'
+    )
+
+
+def existing_schema(bind):
+    """Tables and audits columns already present (none when emitting offline SQL)."""
+    if op.get_context().as_sql:
+        return set(), set()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    columns = {column['name'] for column in inspector.get_columns('audits')} if 'audits' in tables else set()
+    return tables, columns
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    tables, audit_columns = existing_schema(bind)
+
+    if bind.dialect.name == 'postgresql':
+        for values, name in ((AUDIT_STATUSES, 'auditstatus'), (ISSUE_TYPES, 'issuetype'), (ISSUE_SEVERITIES, 'issueseverity')):
+            postgresql.ENUM(*values, name=name).create(bind, checkfirst=not op.get_context().as_sql)
+
+    if 'repositories' not in tables:
+        op.create_table(
+            'repositories',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('url', sa.String(), nullable=False),
+            sa.Column('owner', sa.String(), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('branch', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_repositories_id', 'repositories', ['id'])
+        op.create_index('ix_repositories_url', 'repositories', ['url'], unique=True)
+
+    if 'audits' not in tables:
+        op.create_table(
+            'audits',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('repository_id', sa.Integer(), nullable=False),
+            sa.Column('status', enum_type(AUDIT_STATUSES, 'auditstatus'), nullable=True),
+            sa.Column('task_id', sa.String(), nullable=True),
+            sa.Column('total_files', sa.Integer(), nullable=True),
+            sa.Column('processed_files', sa.Integer(), nullable=True),
+            sa.Column('issues_found', sa.Integer(), nullable=True),
+            sa.Column('fixes_applied', sa.Integer(), nullable=True),
+            sa.Column('pr_url', sa.String(), nullable=True),
+            sa.Column('pr_number', sa.Integer(), nullable=True),
+            sa.Column('error_message', sa.Text(), nullable=True),
+            sa.Column('logs', sa.JSON(), nullable=True),
+            sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(['repository_id'], ['repositories.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_audits_id', 'audits', ['id'])
+        op.create_index('ix_audits_status', 'audits', ['status'])
+        op.create_index('ix_audits_task_id', 'audits', ['task_id'], unique=True)
+    elif bind.dialect.name == 'postgresql':
+        op.execute("ALTER TABLE audits ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT 1 NOT NULL")
+    elif 'version' not in audit_columns:
+        op.add_column('audits', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    if 'issues' not in tables:
+        op.create_table(
+            'issues',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('audit_id', sa.Integer(), nullable=False),
+            sa.Column('file_path', sa.String(), nullable=False),
+            sa.Column('line_number', sa.Integer(), nullable=True),
+            sa.Column('issue_type', enum_type(ISSUE_TYPES, 'issuetype'), nullable=False),
+            sa.Column('severity', enum_type(ISSUE_SEVERITIES, 'issueseverity'), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('original_code', sa.Text(), nullable=True),
+            sa.Column('fixed_code', sa.Text(), nullable=True),
+            sa.Column('explanation', sa.Text(), nullable=True),
+            sa.Column('is_fixed', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['audit_id'], ['audits.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_issues_id', 'issues', ['id'])
+
+    if 'file_checkpoints' not in tables:
+        op.create_table(
+            'file_checkpoints',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('audit_id', sa.Integer(), nullable=False),
+            sa.Column('file_path', sa.String(), nullable=False),
+            sa.Column('issues_count', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(['audit_id'], ['audits.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('audit_id', 'file_path', name='uq_file_checkpoints_audit_file'),
+        )
+        op.create_index('ix_file_checkpoints_id', 'file_checkpoints', ['id'])
+        op.create_index('ix_file_checkpoints_audit_id', 'file_checkpoints', ['audit_id'])
+
+    if 'audit_counters' not in tables:
+        op.create_table(
+            'audit_counters',
+            sa.Column('status', enum_type(AUDIT_STATUSES, 'auditstatus'), nullable=False),
+            sa.Column('audits', sa.Integer(), nullable=False),
+            sa.Column('issues_found', sa.Integer(), nullable=False),
+            sa.Column('fixes_applied', sa.Integer(), nullable=False),
+            sa.Column('prs_created', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('status'),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('audit_counters')
+    op.drop_table('file_checkpoints')
+    op.drop_table('issues')
+    op.drop_table('audits')
+    op.drop_table('repositories')
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for name in ('auditstatus', 'issuetype', 'issueseverity'):
+            postgresql.ENUM(name=name).drop(bind, checkfirst=True)
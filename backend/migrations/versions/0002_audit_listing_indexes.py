@@ -0,0 +1,39 @@
+"""Audit listing indexes
+
+Composite indexes for keyset pagination of audits on (created_at, id), alone
+and behind the status and repository filters. Built CONCURRENTLY so large
+audits tables stay writable while the indexes are created.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_audits_created_at_id', ['created_at', 'id']),
+    ('ix_audits_status_created_at_id', ['status', 'created_at', 'id']),
+    ('ix_audits_repository_id_created_at_id', ['repository_id', 'created_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'audits', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(name, table_name='audits', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,30 @@
+"""Audit branch and commit
+
+Records the branch and resolved HEAD commit of each audit, the key used to
+coalesce duplicate audit requests.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audits', sa.Column('branch', sa.String(), nullable=True))
+    op.add_column('audits', sa.Column('commit_sha', sa.String(length=40), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('audits', 'commit_sha')
+    op.drop_column('audits', 'branch')
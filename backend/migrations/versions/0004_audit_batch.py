@@ -0,0 +1,32 @@
+"""Audit batch
+
+Adds the batch ID of audits created by a bulk request, indexed for the
+batch status endpoint.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audits', sa.Column('batch_id', sa.String(length=32), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_audits_batch_id', 'audits', ['batch_id'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_audits_batch_id', table_name='audits', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('audits', 'batch_id')
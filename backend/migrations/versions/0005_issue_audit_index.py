@@ -0,0 +1,29 @@
+"""Issue audit_id index
+
+Indexes issues.audit_id, used by set-based audit deletion and by every
+per-audit issue listing.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_issues_audit_id', 'issues', ['audit_id'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_issues_audit_id', table_name='issues', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,55 @@
+"""Issue search indexes
+
+Indexes for GET /api/issues: the severity/type/fixed filters (ending in id,
+so a page of exact matches is read in cursor order), file path
+prefixes (text_pattern_ops, so LIKE 'prefix%' uses the index under any
+collation), the created_at range and a GIN full-text index over the
+description and explanation. Built CONCURRENTLY so the issues table stays
+writable while they are created.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_issues_severity_type_fixed_id', ['severity', 'issue_type', 'is_fixed', 'id']),
+    ('ix_issues_issue_type', ['issue_type']),
+    ('ix_issues_created_at', ['created_at']),
+)
+
+# Must stay identical to app.models.issue_search_vector(), or queries won't use the index
+SEARCH_VECTOR = "to_tsvector('english', (coalesce(description, '') || ' ') || coalesce(explanation, ''))"
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, 'issues', columns, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index(
+            'ix_issues_file_path_pattern', 'issues', ['file_path'],
+            postgresql_ops={'file_path': 'text_pattern_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            'ix_issues_search', 'issues', [sa.text(SEARCH_VECTOR)],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in ('ix_issues_search', 'ix_issues_file_path_pattern', *(name for name, _ in INDEXES)):
+            op.drop_index(name, table_name='issues', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,59 @@
+"""Storage compaction
+
+Adds issues.fix_diff (fixed_code stored as a diff against original_code)
+and the audit timestamps of the compaction job. Archived logs need no new
+column: they live in audits.logs as a compressed JSON object.
+
+Downgrading expands compacted issues and archived logs back first.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.compression import ArchivableJSON, apply_code_diff
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('issues', sa.Column('fix_diff', sa.Text(), nullable=True))
+    op.add_column('audits', sa.Column('compacted_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('audits', sa.Column('logs_archived_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+    issues = sa.table('issues', sa.column('id', sa.Integer), sa.column('original_code', sa.Text),
+                      sa.column('fixed_code', sa.Text), sa.column('fix_diff', sa.Text))
+    audits = sa.table('audits', sa.column('id', sa.Integer), sa.column('logs', ArchivableJSON),
+                      sa.column('logs_archived_at', sa.DateTime(timezone=True)))
+
+    rows = connection.execute(
+        sa.select(issues.c.id, issues.c.original_code, issues.c.fix_diff)
+        .where(issues.c.fix_diff.isnot(None), issues.c.fixed_code.is_(None))
+    ).all()
+    for issue_id, original_code, fix_diff in rows:
+        connection.execute(
+            issues.update().where(issues.c.id == issue_id)
+            .values(fixed_code=apply_code_diff(original_code or '', fix_diff))
+        )
+
+    # Reading through ArchivableJSON expands the archive, writing a list stores it plain
+    audit_ids = connection.scalars(sa.select(audits.c.id).where(audits.c.logs_archived_at.isnot(None))).all()
+    for audit_id in audit_ids:
+        logs = connection.scalar(sa.select(audits.c.logs).where(audits.c.id == audit_id))
+        connection.execute(audits.update().where(audits.c.id == audit_id).values(logs=logs))
+
+    op.drop_column('audits', 'logs_archived_at')
+    op.drop_column('audits', 'compacted_at')
+    op.drop_column('issues', 'fix_diff')
@@ -0,0 +1,31 @@
+"""Audit fan-out state
+
+Adds whether an audit is analyzed in shards, so a resumed audit keeps its
+mode, and the ID of the chord callback of the shards in flight, so the
+shards are never dispatched twice.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audits', sa.Column('fanout', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column('audits', sa.Column('chord_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('audits', 'chord_id')
+    op.drop_column('audits', 'fanout')
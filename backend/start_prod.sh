@@ -2,10 +2,26 @@
 
 echo "🚀 Starting AutoDev 'All-in-One' Service (Backend + Worker)"
 
+# Bring the database schema up to date before anything uses it
+echo "🗄️  Running database migrations..."
+alembic upgrade head || exit 1
+
+# API and worker share metrics files, so the API's /metrics covers the worker too
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-${WORKER_METRICS_DIR:-/tmp/autodev-metrics}}
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Start Celery Worker in the background
 # We use '&' to detach it so the script continues
+# -B embeds the beat scheduler (periodic maintenance tasks): this container is the only one
 echo "👷 Starting Celery Worker..."
-celery -A worker.worker worker --loglevel=info --concurrency=1 &
+celery -A worker.worker worker -B --schedule=/tmp/celerybeat-schedule --loglevel=info --pool=${WORKER_POOL:-prefork} --concurrency=${WORKER_CONCURRENCY:-1} &
+
+# Optional worker reserved for small audits, so a large audit on the main
+# worker doesn't hold them back (costs a second worker's memory; off by default)
+if [ "${WORKER_SMALL_CONCURRENCY:-0}" -gt 0 ]; then
+    echo "👷 Starting Celery Worker for small audits..."
+    WORKER_METRICS_PORT=0 celery -A worker.worker worker -Q ${AUDIT_SMALL_QUEUE:-audits.small} -n small@%h --loglevel=info --pool=${WORKER_POOL:-prefork} --concurrency=${WORKER_SMALL_CONCURRENCY} &
+fi
 
 # Start FastAPI Server in the foreground
 # This keeps the container running and listening on the port
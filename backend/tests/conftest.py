@@ -0,0 +1,113 @@
+"""
+Test fixtures - Offline settings, a SQLite database, synthetic repositories and a stub GitHub API.
+
+The environment is set before any app or worker module is imported, so
+the settings never point at real services. Repositories and the GitHub
+API come from the benchmark fixtures (benchmarks.synthetic, benchmarks.stubs).
+"""
+import os
+
+for name, value in {
+    "GEMINI_API_KEY": "test",
+    "GITHUB_TOKEN": "test",
+    "DATABASE_URL": "postgresql://test@localhost/unused",
+    "EVENTS_BACKEND": "none",
+    "RESPONSE_CACHE_BACKEND": "none",
+    "WORKER_METRICS_DIR": "",
+    "WORKER_METRICS_PORT": "0",
+    "TRACING_EXPORTER": "none",
+    "CLONE_DISK_QUOTA_MB": "0",
+    "CLONE_MIN_FREE_MB": "0",
+    "CLONE_RESERVE_MB": "0",
+}.items():
+    os.environ.setdefault(name, value)
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from benchmarks.stubs import StubGitHub
+from benchmarks.synthetic import create_repository
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a throwaway SQLite database with every table created."""
+    from app.core.database import Base
+    import app.models  # noqa: F401  (registers the tables)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_sessions(tmp_path):
+    """async_sessionmaker on a throwaway SQLite database, for the API routes (use within asyncio.run)."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+    from app.core.database import Base
+    import app.models  # noqa: F401  (registers the tables)
+
+    create_all_engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    Base.metadata.create_all(create_all_engine)
+    create_all_engine.dispose()
+    # NullPool: every test runs its own event loop, connections must not outlive it
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'api.db'}", poolclass=NullPool)
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def clone_dir(tmp_path, monkeypatch):
+    """Empty CLONE_DIR for the test."""
+    path = tmp_path / "clones"
+    path.mkdir()
+    monkeypatch.setattr(settings, "CLONE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def remote_repository(tmp_path):
+    """file:// URL of a small bare repository with source files, assets and node_modules."""
+    root = tmp_path / "remotes"
+    root.mkdir()
+    return create_repository(
+        str(root), "sample", files=6, language_mix={"python": 1, "javascript": 1},
+        lines_per_file=12, files_per_directory=3, noise_ratio=1.0,
+    )
+
+
+class RecordingGitHub(StubGitHub):
+    """StubGitHub that also keeps every call with its JSON body, in order."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+        self.existing_refs = set()  # Refs whose creation fails with 422, as on a re-run
+
+    def respond(self, method: str, path: str, body: dict) -> tuple:
+        self.calls.append((method, path, body))
+        if method == "POST" and path.endswith("/git/refs") and body.get("ref") in self.existing_refs:
+            return 422, {"message": "Reference already exists"}
+        return super().respond(method, path, body)
+
+    def bodies(self, method: str, suffix: str) -> list:
+        """JSON bodies of the calls with this method whose path ends with suffix."""
+        return [body for call_method, path, body in self.calls if call_method == method and path.endswith(suffix)]
+
+
+@pytest.fixture
+def github():
+    """Running stub GitHub API recording its calls."""
+    stub = RecordingGitHub().start()
+    try:
+        yield stub
+    finally:
+        stub.stop()
@@ -0,0 +1,48 @@
+"""
+Tests for the serial audit task: per-file errors, checkpoints and progress counters.
+"""
+from sqlalchemy.orm import Session
+
+from app.models import Audit, AuditStatus, FileCheckpoint, Repository
+from worker.tasks.audit_task import load_checkpoints, process_repository_audit
+
+
+class CheckpointedElsewhere:
+    """Agent stub finding no issues, while another run checkpoints one of the files first."""
+
+    def __init__(self, db, audit_id: int, conflicting_call: int):
+        self.db = db
+        self.audit_id = audit_id
+        self.conflicting_call = conflicting_call
+        self.analyzed = []
+
+    def analyze_file(self, rel_path, content, language, **kwargs):
+        self.analyzed.append(rel_path)
+        if len(self.analyzed) == self.conflicting_call:
+            with Session(self.db.get_bind()) as other:
+                other.add(FileCheckpoint(audit_id=self.audit_id, file_path=rel_path, issues_count=0))
+                other.commit()
+        return []
+
+
+def test_failed_checkpoint_is_rolled_back_and_not_counted(db, remote_repository, clone_dir, monkeypatch):
+    repository = Repository(url=remote_repository, owner="o", name="sample", branch="main")
+    audit = Audit(repository=repository, status=AuditStatus.PENDING, logs=[])
+    db.add(audit)
+    db.commit()
+    agent = CheckpointedElsewhere(db, audit.id, conflicting_call=2)
+    monkeypatch.setattr("worker.tasks.audit_task.get_agent", lambda key=None: agent)
+    finished = []
+    monkeypatch.setattr("worker.tasks.audit_task.fix_and_open_pr",
+                        lambda audit, *args, **kwargs: finished.append(audit.id))
+
+    process_repository_audit.run(audit.id, db=db)
+
+    db.expire_all()
+    audit = db.get(Audit, audit.id)
+    assert finished == [audit.id]  # The error did not fail the audit
+    assert audit.status != AuditStatus.FAILED
+    assert load_checkpoints(db, audit.id) == set(agent.analyzed)
+    assert audit.processed_files == audit.total_files - 1 == len(agent.analyzed) - 1
+    assert any(entry["message"].startswith("❌ Error analyzing") for entry in audit.logs)
+    assert not list(clone_dir.iterdir())
@@ -0,0 +1,72 @@
+"""
+Tests for cloning: sparse checkout of analyzable files and lazy fetches.
+"""
+import os
+
+import pytest
+
+from app.core.config import settings
+from worker.tasks.audit_task import clone_repository, discover_files, ensure_checked_out, fetch_branch
+
+
+def working_tree_files(path) -> set:
+    """Files present in a clone's working tree, relative to its root (without .git)."""
+    files = set()
+    for root, dirs, names in os.walk(path):
+        dirs[:] = [name for name in dirs if name != ".git"]
+        files.update(os.path.relpath(os.path.join(root, name), path) for name in names)
+    return files
+
+
+def committed_files(path) -> set:
+    """Files of the checked-out commit, whether in the working tree or not."""
+    import git
+    return set(git.Repo(path).git.ls_tree("-r", "--name-only", "HEAD").splitlines())
+
+
+@pytest.fixture
+def sparse(monkeypatch):
+    monkeypatch.setattr(settings, "CLONE_MODE", "sparse")
+
+
+def test_sparse_checkout_contains_only_analyzable_files(remote_repository, clone_dir, sparse):
+    clone_path = str(clone_dir / "sample")
+    fetch_branch(remote_repository, clone_path, "main")
+
+    present = working_tree_files(clone_path)
+    committed = committed_files(clone_path)
+    sources = {path for path in committed if path.startswith("src/")}
+
+    assert sources and present == sources
+    assert any(path.startswith("assets/") for path in committed - present)
+    assert any(path.startswith("node_modules/") for path in committed - present)
+    assert {os.path.relpath(path, clone_path) for path, _ in discover_files(clone_path)} == sources
+
+
+def test_full_clone_checks_out_everything(remote_repository, clone_dir, monkeypatch):
+    monkeypatch.setattr(settings, "CLONE_MODE", "full")
+    clone_path = str(clone_dir / "sample")
+    fetch_branch(remote_repository, clone_path, "main")
+
+    assert working_tree_files(clone_path) == committed_files(clone_path)
+
+
+def test_ensure_checked_out_fetches_missing_paths(remote_repository, clone_dir, sparse):
+    clone_path = str(clone_dir / "sample")
+    fetch_branch(remote_repository, clone_path, "main")
+    asset = sorted(path for path in committed_files(clone_path) if path.startswith("assets/"))[0]
+    source = sorted(working_tree_files(clone_path))[0]
+
+    assert ensure_checked_out(clone_path, [asset, source]) == 1
+    assert os.path.isfile(os.path.join(clone_path, asset))
+    # Only that file was added: its neighbours stay out of the working tree
+    assert not any(path.startswith("node_modules/") for path in working_tree_files(clone_path))
+    assert ensure_checked_out(clone_path, [asset, source]) == 0
+
+
+def test_clone_repository_falls_back_to_existing_branch(remote_repository, clone_dir, sparse):
+    clone_path, branch = clone_repository(remote_repository, "master")
+
+    assert branch == "main"
+    assert clone_path.startswith(str(clone_dir))
+    assert working_tree_files(clone_path)
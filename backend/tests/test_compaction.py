@@ -0,0 +1,205 @@
+"""
+Tests for storage compaction: fix diffs, archived logs and the compaction job.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import JSON, select, type_coerce
+from sqlalchemy.orm import Session, load_only
+
+from app.core.compaction import compact_storage
+from app.core.compression import apply_code_diff, archive_logs, expand_logs, make_code_diff
+from app.models import (Audit, AuditStatus, Issue, IssueSeverity, IssueType, Repository,
+                        expand_fixed_code, issue_load_columns)
+
+LONG = "".join(f"line {n}\n" for n in range(40))
+
+
+def stored_fix(original: str, fixed: str):
+    """(fixed_code, fix_diff) as compaction stores them."""
+    diff = make_code_diff(original, fixed)
+    return (None, diff) if diff is not None else (fixed, None)
+
+
+@pytest.mark.parametrize("original, fixed", [
+    (LONG, LONG.replace("line 7\n", "line seven\n")),
+    (LONG, LONG.replace("line 0\n", "")),
+    (LONG, "inserted\n" + LONG),
+    (LONG, LONG + "appended\n"),
+    (LONG, LONG.replace("line 39\n", "line 39")),  # Fix drops the trailing newline
+    (LONG.rstrip("\n"), LONG),  # Fix adds it
+    (LONG.rstrip("\n"), LONG.rstrip("\n").replace("line 39", "last")),  # Neither has one
+    (LONG.rstrip("\n"), LONG.replace("line 2\n", "two\n").rstrip("\n")),
+    (LONG.replace("\n", "\r\n"), LONG.replace("\n", "\r\n").replace("line 3\r\n", "line 3;\r\n")),
+    (LONG.replace("\n", "\r\n"), LONG.replace("\n", "\r\n").replace("line 3\r\n", "line 3\n")),  # CRLF -> LF
+    (LONG, LONG.replace("line 5\n", "line 5\r\n")),
+    (LONG.replace("\n", "\r"), LONG.replace("\n", "\r") + "x"),  # Lone \r is not a line end
+    ("", "x = 1\n"),
+    (LONG, ""),
+    ("", ""),
+    (LONG, LONG),
+    ("\n\n\n", "\n"),
+])
+def test_diff_round_trip(original, fixed):
+    fixed_code, fix_diff = stored_fix(original, fixed)
+
+    assert expand_fixed_code(original, fixed_code, fix_diff) == fixed
+
+
+def test_small_fix_is_stored_as_a_diff():
+    fixed = LONG.replace("line 7\n", "line seven\n")
+    diff = make_code_diff(LONG, fixed)
+
+    assert diff is not None and len(diff) < len(fixed) // 4
+    assert apply_code_diff(LONG, diff) == fixed
+
+
+def test_rewrite_is_kept_in_full():
+    assert make_code_diff("a\nb\n", "completely\ndifferent\ncode\n") is None
+
+
+def test_diff_round_trip_fuzz():
+    rng = random.Random(0)
+    pieces = ["a", "b", "", " ", "\r", "\t"]
+    for _ in range(2000):
+        lines = ["".join(rng.choices(pieces, k=rng.randint(0, 3))) for _ in range(rng.randint(0, 12))]
+        original = "".join(line + rng.choice(["\n", "\n", "\r\n"]) for line in lines)
+        if rng.random() < 0.3:
+            original = original.rstrip("\n")
+        fixed_lines = list(original.splitlines(keepends=True))
+        for _ in range(rng.randint(1, 3)):
+            position = rng.randint(0, len(fixed_lines))
+            action = rng.choice(["insert", "delete", "replace"])
+            if action == "insert" or not fixed_lines:
+                fixed_lines.insert(position, rng.choice(["new\n", "x", "\r\n"]))
+            elif action == "delete":
+                del fixed_lines[min(position, len(fixed_lines) - 1)]
+            else:
+                fixed_lines[min(position, len(fixed_lines) - 1)] = rng.choice(["changed\n", "y"])
+        fixed = "".join(fixed_lines)
+
+        fixed_code, fix_diff = stored_fix(original, fixed)
+        assert expand_fixed_code(original, fixed_code, fix_diff) == fixed, (original, fixed)
+
+
+@pytest.mark.parametrize("logs", [[], [{"level": "INFO", "message": "✅ done", "data": {"files": 3}}] * 50])
+def test_archived_logs_round_trip(logs):
+    archived = archive_logs(logs)
+
+    assert archived["archive"] == "zlib"
+    assert expand_logs(archived) == logs
+
+
+@pytest.mark.parametrize("value", [None, [], [{"message": "x"}], {"archive": "other"}])
+def test_unarchived_values_are_returned_as_is(value):
+    assert expand_logs(value) == value
+
+
+LOGS = [{"timestamp": "2026-01-01T00:00:00", "level": "INFO", "message": f"Processed file {n}"} for n in range(200)]
+
+
+def add_audit(db: Session, status: AuditStatus, finished_days_ago: int, fixes: list) -> int:
+    """Add an audit whose issues carry the given (original, fixed) pairs."""
+    repository = db.scalar(select(Repository)) or Repository(url="https://github.com/o/r", owner="o", name="r", branch="main")
+    audit = Audit(
+        repository=repository,
+        status=status,
+        logs=list(LOGS),
+        completed_at=datetime.utcnow() - timedelta(days=finished_days_ago) if status in (AuditStatus.COMPLETED, AuditStatus.FAILED) else None,
+    )
+    for n, (original, fixed) in enumerate(fixes):
+        audit.issues.append(Issue(
+            file_path=f"src/file_{n}.py", line_number=1, issue_type=IssueType.CODE_SMELL,
+            severity=IssueSeverity.LOW, description="d", original_code=original, fixed_code=fixed,
+            is_fixed=1 if fixed else 0,
+        ))
+    db.add(audit)
+    db.commit()
+    return audit.id
+
+
+def snapshot(db: Session, audit_id: int) -> tuple:
+    """What the API would read of an audit, from freshly loaded objects."""
+    db.expire_all()
+    audit = db.get(Audit, audit_id)
+    issues = db.scalars(select(Issue).where(Issue.audit_id == audit_id).order_by(Issue.id)).all()
+    return audit.logs, [(issue.original_code, issue.fixed_code) for issue in issues]
+
+
+def stored_columns(db: Session, audit_id: int) -> tuple:
+    """Raw stored logs and issue fix columns, bypassing the ORM's expansion."""
+    audits = Audit.__table__
+    logs = db.execute(select(type_coerce(audits.c.logs, JSON)).where(audits.c.id == audit_id)).scalar()
+    table = Issue.__table__
+    fixes = db.execute(select(table.c.fixed_code, table.c.fix_diff).where(table.c.audit_id == audit_id).order_by(table.c.id)).all()
+    return logs, fixes
+
+
+@pytest.fixture
+def audits(db):
+    fixes = [
+        (LONG, LONG.replace("line 7\n", "line seven\n")),
+        ("a\nb\n", "completely\ndifferent\ncode\n"),  # Kept in full
+        (LONG, None),  # No fix
+    ]
+    return {
+        "old": add_audit(db, AuditStatus.COMPLETED, 60, fixes),
+        "recent": add_audit(db, AuditStatus.FAILED, 1, fixes),
+        "running": add_audit(db, AuditStatus.ANALYZING, 0, fixes),
+    }
+
+
+def test_compaction_preserves_what_is_read(db, audits):
+    before = {name: snapshot(db, audit_id) for name, audit_id in audits.items()}
+
+    totals = compact_storage(db, batch_size=1, log_retention_days=30)
+
+    assert totals["issues_compacted"] == 2  # The one-line fix of both finished audits
+    assert totals["issue_bytes_saved"] > 0
+    assert totals["logs_archived"] == 1
+    assert totals["log_bytes_saved"] > 0
+    assert {name: snapshot(db, audit_id) for name, audit_id in audits.items()} == before
+
+    logs, fixes = stored_columns(db, audits["old"])
+    assert logs["archive"] == "zlib"
+    assert fixes[0].fixed_code is None and fixes[0].fix_diff
+    assert fixes[1].fixed_code and fixes[1].fix_diff is None
+    assert isinstance(stored_columns(db, audits["recent"])[0], list)
+    assert stored_columns(db, audits["running"])[1][0].fix_diff is None
+
+    # Partial loads rebuild the fix too, from the columns issue_load_columns adds
+    db.expire_all()
+    issue = db.scalars(
+        select(Issue).where(Issue.audit_id == audits["old"]).order_by(Issue.id)
+        .options(load_only(*issue_load_columns({"fixed_code"})))
+    ).first()
+    assert issue.fixed_code == before["old"][1][0][1]
+
+
+def test_compaction_is_idempotent(db, audits):
+    compact_storage(db, batch_size=10, log_retention_days=30)
+    after_first = {audit_id: (snapshot(db, audit_id), stored_columns(db, audit_id)) for audit_id in audits.values()}
+
+    totals = compact_storage(db, batch_size=10, log_retention_days=30)
+
+    assert totals == {"issues_compacted": 0, "issue_bytes_saved": 0, "logs_archived": 0, "log_bytes_saved": 0}
+    assert {audit_id: (snapshot(db, audit_id), stored_columns(db, audit_id)) for audit_id in audits.values()} == after_first
+
+
+def test_logs_are_never_archived_with_zero_retention(db, audits):
+    totals = compact_storage(db, batch_size=10, log_retention_days=0)
+
+    assert totals["logs_archived"] == 0
+    assert isinstance(stored_columns(db, audits["old"])[0], list)
+
+
+def test_rewritten_archived_logs_are_stored_uncompressed(db, audits):
+    compact_storage(db, batch_size=10, log_retention_days=30)
+    audit = db.get(Audit, audits["old"])
+
+    audit.logs = audit.logs + [{"level": "INFO", "message": "♻️ Resuming audit"}]
+    db.commit()
+
+    logs = stored_columns(db, audits["old"])[0]
+    assert isinstance(logs, list) and len(logs) == len(LOGS) + 1
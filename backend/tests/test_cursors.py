@@ -0,0 +1,56 @@
+"""
+Tests for the opaque keyset cursors of the audit list and the issue search.
+"""
+import base64
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes.audits import decode_cursor, encode_cursor
+from app.api.routes.issues import decode_issue_cursor, encode_issue_cursor
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    datetime(2026, 1, 1),
+])
+def test_audit_cursor_round_trip(created_at):
+    cursor = encode_cursor(SimpleNamespace(created_at=created_at, id=42))
+
+    assert "=" not in cursor  # Safe in a query string as is
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_issue_cursor_round_trip():
+    cursor = encode_issue_cursor(SimpleNamespace(id=1234567))
+
+    assert decode_issue_cursor(cursor) == 1234567
+
+
+def encoded(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encoded(b"not json"),
+    encoded(b"[1]"),
+    encoded(b'["yesterday", 1]'),
+    encoded(b'["2026-01-01T00:00:00", "x"]'),
+    encoded(b"null"),
+])
+def test_invalid_audit_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("cursor", ["%%%", encoded(b"[]"), encoded(b'["x"]'), encoded(b"[1, 2]"), encoded(b"{}")])
+def test_invalid_issue_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_issue_cursor(cursor)
+
+    assert error.value.status_code == 400
@@ -0,0 +1,119 @@
+"""
+Tests for issue export: the SARIF mapping and the chunked, optionally gzipped stream.
+"""
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.core.export import (RULE_INDEX, SARIF_RULES, dumps, encode_chunks, sarif_envelope, sarif_parts,
+                             sarif_result)
+from app.models import IssueSeverity, IssueType
+
+
+def issue_row(**values):
+    row = dict(
+        id=7, file_path="src/app.py", line_number=12, issue_type=IssueType.SECURITY_VULNERABILITY,
+        severity=IssueSeverity.HIGH, description="SQL built from user input", original_code="q = f'{x}'",
+        fixed_code="q = ?", explanation="Use parameters", is_fixed=1,
+    )
+    row.update(values)
+    return SimpleNamespace(**row)
+
+
+def audit(commit_sha="a" * 40, branch=None):
+    repository = SimpleNamespace(url="https://github.com/owner/repo.git", branch="main")
+    return SimpleNamespace(id=42, repository=repository, commit_sha=commit_sha, branch=branch)
+
+
+@pytest.mark.parametrize("severity, level", [
+    (IssueSeverity.CRITICAL, "error"),
+    (IssueSeverity.HIGH, "error"),
+    (IssueSeverity.MEDIUM, "warning"),
+    (IssueSeverity.LOW, "note"),
+])
+def test_severity_maps_to_level(severity, level):
+    assert sarif_result(issue_row(severity=severity))["level"] == level
+
+
+def test_result_of_an_issue():
+    result = sarif_result(issue_row())
+
+    assert result == {
+        "ruleId": "security_vulnerability",
+        "ruleIndex": RULE_INDEX[IssueType.SECURITY_VULNERABILITY],
+        "level": "error",
+        "message": {"text": "SQL built from user input"},
+        "locations": [{"physicalLocation": {
+            "artifactLocation": {"uri": "src/app.py", "uriBaseId": "SRCROOT"},
+            "region": {"startLine": 12, "snippet": {"text": "q = f'{x}'"}},
+        }}],
+        "properties": {"issueId": 7, "severity": "high", "isFixed": True,
+                       "explanation": "Use parameters", "fixedCode": "q = ?"},
+    }
+
+
+@pytest.mark.parametrize("line_number", [None, 0, -1])
+def test_result_without_a_valid_line_has_no_region(line_number):
+    location = sarif_result(issue_row(line_number=line_number))["locations"][0]["physicalLocation"]
+
+    assert "region" not in location
+
+
+def test_optional_properties_are_left_out():
+    properties = sarif_result(issue_row(explanation=None, fixed_code=None, is_fixed=0))["properties"]
+
+    assert properties == {"issueId": 7, "severity": "high", "isFixed": False}
+
+
+def test_every_issue_type_is_a_rule():
+    assert set(SARIF_RULES) == set(IssueType)
+    for issue_type in IssueType:
+        result = sarif_result(issue_row(issue_type=issue_type))
+        assert result["ruleId"] == issue_type.value
+
+
+@pytest.mark.parametrize("commit_sha, branch, revision", [
+    ("a" * 40, "dev", "a" * 40),
+    (None, "dev", "dev"),
+    (None, None, "main"),
+])
+def test_envelope_is_a_sarif_log(commit_sha, branch, revision):
+    head, tail = sarif_envelope(audit(commit_sha, branch))
+    results = [sarif_result(issue_row(id=n)) for n in range(3)]
+
+    log = json.loads(head + ",".join(dumps(result) for result in results) + tail)
+
+    assert log["version"] == "2.1.0"
+    (run,) = log["runs"]
+    assert run["results"] == results
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == [issue_type.value for issue_type in SARIF_RULES]
+    assert run["originalUriBaseIds"]["SRCROOT"]["uri"] == f"https://github.com/owner/repo/blob/{revision}/"
+    assert run["automationDetails"]["id"] == "autodev/audit/42"
+    provenance = run["versionControlProvenance"][0]
+    assert provenance.get("revisionId") == commit_sha
+    assert provenance["branch"] == (branch or "main")
+
+
+async def collect(parts) -> bytes:
+    return b"".join([chunk async for chunk in parts])
+
+
+async def rows(items):
+    for item in items:
+        yield item
+
+
+@pytest.mark.parametrize("count", [0, 1, 500])
+@pytest.mark.parametrize("compress", [False, True])
+def test_streamed_log_is_valid_sarif(count, compress, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_BYTES", 1024)
+    items = [issue_row(id=n) for n in range(count)]
+
+    body = asyncio.run(collect(encode_chunks(sarif_parts(audit(), rows(items)), compress)))
+
+    log = json.loads(gzip.decompress(body) if compress else body)
+    assert [result["properties"]["issueId"] for result in log["runs"][0]["results"]] == list(range(count))
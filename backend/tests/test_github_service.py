@@ -0,0 +1,97 @@
+"""
+Tests for creating fix PRs through the Git Data API, against the stub GitHub.
+"""
+import base64
+import os
+
+import git
+
+from benchmarks.stubs import fake_sha
+from worker.agents.github_service import GitHubService
+from worker.tasks.audit_task import collect_changed_files, fetch_branch
+
+
+def create_pull_request(github, files, branch_name="fix/ai-auto-patch-1"):
+    service = GitHubService(token="test", api_url=github.url)
+    return service.create_pull_request_from_files(
+        repo_full_name="owner/repo",
+        branch_name=branch_name,
+        files=files,
+        commit_message="Fix 2 issues",
+        title="AutoDev Agent: Fix 2 issues",
+        body="Body",
+        base_branch="main",
+    )
+
+
+def test_pull_request_is_built_from_tree_commit_and_ref(github):
+    files = [
+        ("src/a.py", b"print('a')\n", "100644"),
+        ("src/b.py", b"print('a')\n", "100644"),  # Same content: one blob
+        ("bin/run.sh", b"#!/bin/sh\n", "100755"),
+    ]
+
+    url, number = create_pull_request(github, files)
+
+    assert (url, number) == (f"{github.url}/owner/repo/pull/1", 1)
+
+    base_sha = fake_sha("owner/repo", "/repos/owner/repo/git/ref/heads/main")
+    blobs = github.bodies("POST", "/git/blobs")
+    assert [base64.b64decode(blob["content"]) for blob in blobs] == [b"print('a')\n", b"#!/bin/sh\n"]
+
+    (tree,) = github.bodies("POST", "/git/trees")
+    assert tree["base_tree"] == fake_sha("owner/repo", "tree", base_sha)
+    assert [(entry["path"], entry["mode"], entry["type"]) for entry in tree["tree"]] == [
+        (path, mode, "blob") for path, _, mode in files
+    ]
+    assert tree["tree"][0]["sha"] == tree["tree"][1]["sha"] != tree["tree"][2]["sha"]
+
+    (commit,) = github.bodies("POST", "/git/commits")
+    assert commit["message"] == "Fix 2 issues"
+    assert commit["parents"] == [base_sha]
+
+    (ref,) = github.bodies("POST", "/git/refs")
+    assert ref["ref"] == "refs/heads/fix/ai-auto-patch-1"
+
+    (pull,) = github.bodies("POST", "/pulls")
+    assert pull == {"title": "AutoDev Agent: Fix 2 issues", "body": "Body", "head": "fix/ai-auto-patch-1", "base": "main"}
+    assert not github.bodies("PATCH", "/git/refs/heads/fix/ai-auto-patch-1")
+
+
+def test_existing_branch_is_force_updated(github):
+    github.existing_refs.add("refs/heads/fix/ai-auto-patch-1")
+
+    url, number = create_pull_request(github, [("src/a.py", b"x = 1\n", "100644")])
+
+    assert number == 1
+    (update,) = github.bodies("PATCH", "/git/refs/heads/fix/ai-auto-patch-1")
+    assert update["force"] is True
+    assert update["sha"] == github.bodies("POST", "/git/refs")[0]["sha"]
+
+
+def test_failed_call_returns_no_pull_request(github):
+    service = GitHubService(token="test", api_url=github.url)
+
+    assert service.create_pull_request_from_files("not-a-repo", "fix/x", [], "m", "t", "b") == (None, None)
+    assert not github.bodies("POST", "/pulls")
+
+
+def test_changed_files_of_a_sparse_clone_become_the_pull_request(github, remote_repository, clone_dir, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "CLONE_MODE", "sparse")
+    clone_path = str(clone_dir / "sample")
+    fetch_branch(remote_repository, clone_path, "main")
+    changed = sorted(git.Repo(clone_path).git.ls_files("src").splitlines())[0]
+    with open(os.path.join(clone_path, changed), "a") as f:
+        f.write("# fixed\n")
+
+    files = collect_changed_files(git.Repo(clone_path))
+    url, number = create_pull_request(github, files)
+
+    assert number == 1
+    assert [(path, mode) for path, _, mode in files] == [(changed, "100644")]
+    (blob,) = github.bodies("POST", "/git/blobs")
+    assert base64.b64decode(blob["content"]).endswith(b"# fixed\n")
+    (tree,) = github.bodies("POST", "/git/trees")
+    assert [entry["path"] for entry in tree["tree"]] == [changed]
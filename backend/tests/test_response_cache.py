@@ -0,0 +1,61 @@
+"""
+Tests for the response cache of audit details: what is cached, and when.
+"""
+import asyncio
+import json
+
+import pytest
+from starlette.requests import Request
+
+from app.api.routes.audits import get_audit, request_variant
+from app.core import response_cache
+from app.core.response_cache import LocalResponseCache, load_response
+from app.models import Audit, AuditStatus, Repository
+
+
+@pytest.fixture(autouse=True)
+def local_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "_cache", LocalResponseCache(1024 * 1024, ttl=3600))
+
+
+def detail_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/audits/1", "query_string": b"", "headers": []})
+
+
+def get_twice(sessions, update: dict, **values) -> tuple:
+    """GET an audit, apply `update` to it, GET it again; return both bodies and whether the first was cached."""
+    async def run():
+        async with sessions() as db:
+            repository = Repository(url="https://github.com/o/r", owner="o", name="r", branch="main")
+            audit = Audit(repository=repository, logs=[], **values)
+            db.add(audit)
+            await db.commit()
+        request = detail_request()
+        async with sessions() as db:
+            first = await get_audit(audit.id, request, include=None, fields=None, db=db)
+        cached = await load_response(audit.id, request_variant(request)) is not None
+        async with sessions() as db:
+            stored = await db.get(Audit, audit.id)
+            for name, value in update.items():
+                setattr(stored, name, value)
+            await db.commit()
+        async with sessions() as db:
+            second = await get_audit(audit.id, request, include=None, fields=None, db=db)
+        return json.loads(first.body), json.loads(second.body), cached
+
+    return asyncio.run(run())
+
+
+def test_failed_audit_is_cached(async_sessions):
+    first, second, cached = get_twice(async_sessions, {"processed_files": 8}, status=AuditStatus.FAILED, processed_files=7)
+
+    assert cached
+    assert second == first  # Served from the cache
+
+
+def test_failed_fanout_audit_is_not_cached_while_its_shards_run(async_sessions):
+    first, second, cached = get_twice(async_sessions, {"processed_files": 8}, status=AuditStatus.FAILED,
+                                      processed_files=7, fanout=True, chord_id="finalize")
+
+    assert not cached
+    assert (first["processed_files"], second["processed_files"]) == (7, 8)
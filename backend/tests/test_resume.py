@@ -0,0 +1,91 @@
+"""
+Tests for resuming audits: only failed or provably stale audits are re-queued, once.
+"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.routes import audits as routes
+from app.models import Audit, AuditStatus, Repository
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    """Records sent tasks; task IDs in `finished` are reported as finished."""
+    state = {"sent": [], "finished": set()}
+
+    def send_task(name, args=(), kwargs=None, **options):
+        state["sent"].append(options["task_id"])
+
+    monkeypatch.setattr(routes, "send_task", send_task)
+    monkeypatch.setattr(routes, "task_finished", lambda task_id: task_id in state["finished"])
+    return state
+
+
+def resume(sessions, **values):
+    """Resume an audit created with the given column values; return it and the HTTP error, if any."""
+    async def run():
+        async with sessions() as db:
+            repository = Repository(url="https://github.com/o/r", owner="o", name="r", branch="main")
+            audit = Audit(repository=repository, logs=[], **values)
+            db.add(audit)
+            await db.commit()
+        async with sessions() as db:
+            try:
+                await routes.resume_audit(audit.id, None, db=db)
+                error = None
+            except HTTPException as e:
+                error = e
+        async with sessions() as db:
+            return await db.get(Audit, audit.id), error
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("values, finished", [
+    ({"status": AuditStatus.FAILED, "task_id": "orchestrator"}, set()),  # Failed: its task has ended
+    ({"status": AuditStatus.FAILED, "task_id": "orchestrator", "chord_id": "finalize"}, {"finalize"}),
+    ({"status": AuditStatus.ANALYZING, "task_id": "orchestrator"}, {"orchestrator"}),  # Killed by the hard limit
+    ({"status": AuditStatus.ANALYZING, "task_id": "orchestrator", "chord_id": "finalize"}, {"orchestrator", "finalize"}),
+])
+def test_failed_or_stale_audit_is_requeued(async_sessions, queue, values, finished):
+    queue["finished"] = finished
+
+    audit, error = resume(async_sessions, fanout=True, **values)
+
+    assert error is None
+    assert queue["sent"] == [audit.task_id] and audit.task_id != "orchestrator"
+    assert audit.status == AuditStatus.PENDING
+    assert audit.chord_id is None
+    assert audit.fanout  # The worker reads the mode back from the audit
+
+
+@pytest.mark.parametrize("values, finished", [
+    ({"status": AuditStatus.COMPLETED, "task_id": "orchestrator"}, {"orchestrator"}),
+    ({"status": AuditStatus.PENDING, "task_id": "orchestrator"}, set()),  # Still queued
+    ({"status": AuditStatus.ANALYZING, "task_id": "orchestrator"}, set()),  # Still running
+    ({"status": AuditStatus.ANALYZING, "task_id": "orchestrator", "chord_id": "finalize"}, {"orchestrator"}),  # Shards running
+    ({"status": AuditStatus.FAILED, "task_id": "orchestrator", "chord_id": "finalize"}, {"orchestrator"}),  # Shards stopping
+])
+def test_running_or_completed_audit_is_a_conflict(async_sessions, queue, values, finished):
+    queue["finished"] = finished
+
+    audit, error = resume(async_sessions, **values)
+
+    assert error is not None and error.status_code == 409
+    assert queue["sent"] == []
+    assert (audit.status, audit.task_id, audit.chord_id) == (values["status"], "orchestrator", values.get("chord_id"))
+
+
+def test_unqueued_resume_fails_the_audit(async_sessions, queue, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(routes, "send_task", unavailable)
+
+    audit, error = resume(async_sessions, status=AuditStatus.FAILED, task_id="orchestrator")
+
+    assert error.status_code == 503
+    assert audit.status == AuditStatus.FAILED
+    assert audit.error_message == "Queue Error: broker down"
@@ -0,0 +1,177 @@
+"""
+Tests for fan-out audits: shard splitting, soft-time-limit retries and finalization.
+"""
+import git
+import pytest
+from celery.exceptions import Retry, SoftTimeLimitExceeded
+
+from app.core.config import settings
+from app.models import Audit, AuditStatus, FileCheckpoint, Repository
+from worker.tasks.audit_task import (analyze_audit_shard, finalize_sharded_audit, load_checkpoints,
+                                     process_repository_audit, split_into_shards)
+
+
+@pytest.mark.parametrize("count, size, expected", [
+    (10, 3, [3, 3, 3, 1]),
+    (9, 3, [3, 3, 3]),
+    (2, 5, [2]),
+    (0, 5, []),
+    (3, 0, [1, 1, 1]),  # Sizes below 1 are treated as 1
+])
+def test_split_into_shards(count, size, expected):
+    items = list(range(count))
+
+    shards = split_into_shards(items, size)
+
+    assert [len(shard) for shard in shards] == expected
+    assert [item for shard in shards for item in shard] == items
+
+
+def add_sharded_audit(db, total_files: int, checkpointed: int, processed_files: int = None) -> int:
+    repository = Repository(url="https://github.com/o/r", owner="o", name="r", branch="main")
+    audit = Audit(repository=repository, status=AuditStatus.ANALYZING, logs=[], total_files=total_files,
+                  processed_files=checkpointed if processed_files is None else processed_files, issues_found=0,
+                  fanout=True, chord_id="finalize-task")
+    audit.checkpoints = [FileCheckpoint(file_path=f"src/file_{n}.py", issues_count=0) for n in range(checkpointed)]
+    db.add(audit)
+    db.commit()
+    return audit.id
+
+
+def test_finalize_fails_audit_with_unanalyzed_files(db, monkeypatch):
+    audit_id = add_sharded_audit(db, total_files=50, checkpointed=40)
+    monkeypatch.setattr("worker.tasks.audit_task.fix_and_open_pr", pytest.fail)
+
+    finalize_sharded_audit.run([3, 0], audit_id, db=db)
+
+    audit = db.get(Audit, audit_id)
+    assert audit.status == AuditStatus.FAILED
+    assert audit.error_message == "10 files were not analyzed"
+    assert audit.completed_at is not None
+    assert audit.chord_id is None
+
+
+def test_finalize_trusts_checkpoints_over_the_progress_counter(db, monkeypatch):
+    audit_id = add_sharded_audit(db, total_files=50, checkpointed=49, processed_files=50)
+    monkeypatch.setattr("worker.tasks.audit_task.fix_and_open_pr", pytest.fail)
+
+    finalize_sharded_audit.run([0], audit_id, db=db)
+
+    audit = db.get(Audit, audit_id)
+    assert audit.status == AuditStatus.FAILED
+    assert audit.processed_files == 49
+
+
+def test_finalize_opens_pr_once_every_file_is_analyzed(db, monkeypatch):
+    audit_id = add_sharded_audit(db, total_files=50, checkpointed=50)
+    finished = []
+    monkeypatch.setattr("worker.tasks.audit_task.fix_and_open_pr",
+                        lambda audit, *args, **kwargs: finished.append(audit.id))
+
+    finalize_sharded_audit.run([0, 0], audit_id, db=db)
+
+    assert finished == [audit_id]
+    audit = db.get(Audit, audit_id)
+    assert audit.status != AuditStatus.FAILED
+    assert audit.chord_id is None  # A resume may dispatch shards again
+
+
+class StopAfter:
+    """Agent stub finding no issues, hitting the soft time limit on the given call."""
+
+    def __init__(self, limit_on_call: int = None):
+        self.limit_on_call = limit_on_call
+        self.analyzed = []
+
+    def analyze_file(self, rel_path, content, language, **kwargs):
+        if len(self.analyzed) + 1 == self.limit_on_call:
+            raise SoftTimeLimitExceeded()
+        self.analyzed.append(rel_path)
+        return []
+
+
+def add_remote_audit(db, remote_repository: str) -> tuple:
+    """Add an analyzing audit of the sample repository, with its (path, language) files."""
+    bare = git.Repo(remote_repository[len("file://"):])
+    files = [(path, "python") for path in bare.git.ls_tree("-r", "--name-only", "HEAD").splitlines() if path.startswith("src/")]
+    repository = Repository(url=remote_repository, owner="o", name="sample", branch="main")
+    audit = Audit(repository=repository, status=AuditStatus.ANALYZING, logs=[],
+                  total_files=len(files), processed_files=0, issues_found=0)
+    db.add(audit)
+    db.commit()
+    return audit, files
+
+
+def test_shard_hitting_soft_time_limit_is_retried_and_resumes(db, remote_repository, clone_dir, monkeypatch):
+    audit, files = add_remote_audit(db, remote_repository)
+
+    interrupted = StopAfter(limit_on_call=3)
+    monkeypatch.setattr("worker.tasks.audit_task.get_agent", lambda key=None: interrupted)
+    with pytest.raises(Retry):
+        analyze_audit_shard.run(audit.id, files, db=db)
+
+    assert interrupted.analyzed == [path for path, _ in files[:2]]
+    assert load_checkpoints(db, audit.id) == set(interrupted.analyzed)
+    db.expire_all()
+    assert db.get(Audit, audit.id).processed_files == 2
+
+    resumed = StopAfter()
+    monkeypatch.setattr("worker.tasks.audit_task.get_agent", lambda key=None: resumed)
+    analyze_audit_shard.run(audit.id, files, db=db)
+
+    assert resumed.analyzed == [path for path, _ in files[2:]]
+    db.expire_all()
+    assert db.get(Audit, audit.id).processed_files == len(files)
+    assert not list(clone_dir.iterdir())  # Both deliveries removed their clone
+
+
+class FailOn(StopAfter):
+    """Agent stub raising an analysis error for one file."""
+
+    def __init__(self, failing_path: str):
+        super().__init__()
+        self.failing_path = failing_path
+
+    def analyze_file(self, rel_path, content, language, **kwargs):
+        if rel_path == self.failing_path:
+            raise ValueError("malformed model response")
+        return super().analyze_file(rel_path, content, language, **kwargs)
+
+
+def test_failed_file_is_neither_checkpointed_nor_counted(db, remote_repository, clone_dir, monkeypatch):
+    audit, files = add_remote_audit(db, remote_repository)
+    failing = files[1][0]
+    monkeypatch.setattr("worker.tasks.audit_task.get_agent", lambda key=None: FailOn(failing))
+
+    analyze_audit_shard.run(audit.id, files, db=db)
+
+    assert load_checkpoints(db, audit.id) == {path for path, _ in files} - {failing}
+    db.expire_all()
+    assert db.get(Audit, audit.id).processed_files == len(files) - 1
+
+
+def test_redelivered_orchestrator_leaves_dispatched_shards_alone(db, monkeypatch):
+    audit_id = add_sharded_audit(db, total_files=50, checkpointed=10)
+    monkeypatch.setattr("worker.tasks.audit_task.clone_repository", pytest.fail)
+    monkeypatch.setattr("worker.tasks.audit_task.dispatch_shards", pytest.fail)
+
+    process_repository_audit.run(audit_id, db=db)
+
+    audit = db.get(Audit, audit_id)
+    assert audit.status == AuditStatus.ANALYZING
+    assert audit.chord_id == "finalize-task"
+
+
+def test_resumed_audit_keeps_its_fanout_mode(db, remote_repository, clone_dir, monkeypatch):
+    audit, files = add_remote_audit(db, remote_repository)
+    audit.status, audit.fanout = AuditStatus.FAILED, True
+    db.commit()
+    monkeypatch.setattr(settings, "AUDIT_SHARD_SIZE", 2)
+    monkeypatch.setattr(settings, "AUDIT_FANOUT_MIN_FILES", 0)
+    dispatched = []
+    monkeypatch.setattr("worker.tasks.audit_task.dispatch_shards",
+                        lambda audit, db, clone_path, files, *args: dispatched.append(len(files)))
+
+    process_repository_audit.run(audit.id, db=db)  # Queued without fanout=True, as resume_audit does
+
+    assert dispatched == [len(files)]
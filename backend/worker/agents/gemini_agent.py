@@ -4,10 +4,13 @@ Gemini AI Agent - The brain of the AutoDev Agent.
 This module uses Google's Gemini 1.5 Pro API to analyze code and generate fixes.
 """
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 import time
 from typing import List, Dict, Optional
 from app.core.config import settings
+from app.core.tracing import start_span
 from app.models import IssueType, IssueSeverity
+from worker.metrics import LLM_BACKOFF_SECONDS, LLM_REQUESTS, LLM_RETRIES, record_llm_tokens
 import logging
 import json
 
@@ -31,9 +34,11 @@ class GeminiAgent:
     def __init__(self, api_key: Optional[str] = None):
         """Initialize the Gemini AI model."""
         self._api_key = api_key or settings.GEMINI_API_KEY
-        genai.configure(api_key=self._api_key)
             
         self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # Each agent owns its client, so concurrent audits with different keys
+        # (gevent/threaded workers) never race on the global genai.configure()
+        self.model._client = glm.GenerativeServiceClient(client_options={"api_key": self._api_key})
         
         # System prompt with Chain of Thought structure
         self.system_prompt = """You are a Senior Software Engineer with expertise in:
@@ -89,6 +94,26 @@ Issue types: syntax_error, logic_error, security_vulnerability, code_smell, perf
 Severity levels: low, medium, high, critical
 """
     
+    def _generate(self, prompt: str, operation: str, attempt: int = 0):
+        """
+        Call the model in a span, counting the request by outcome and its tokens.
+        
+        Args:
+            prompt: Full prompt text
+            operation: Metrics label of the caller (analyze, scan_secrets, validate_fix)
+            attempt: Retry attempt of the caller (0 = first)
+        """
+        try:
+            with start_span("gemini.generate_content", {"llm.operation": operation, "llm.attempt": attempt}):
+                response = self.model.generate_content(prompt)
+        except Exception as e:
+            outcome = "rate_limited" if "429" in str(e) else "error"
+            LLM_REQUESTS.labels(operation=operation, outcome=outcome).inc()
+            raise
+        LLM_REQUESTS.labels(operation=operation, outcome="success").inc()
+        record_llm_tokens(prompt, response)
+        return response
+    
     def analyze_file(self, file_path: str, file_content: str, language: str, audit=None, db=None) -> List[Dict]:
         """
         Analyze a single file and detect issues.
@@ -97,9 +122,6 @@ Severity levels: low, medium, high, critical
         
         for attempt in range(max_retries):
             try:
-                # Ensure the correct key is configured before every call
-                genai.configure(api_key=self._api_key)
-                
                 prompt = f"""{self.system_prompt}
 
 **File to Analyze**: {file_path}
@@ -113,7 +135,7 @@ Analyze this file and return ONLY a valid JSON object with detected issues.
 If no issues are found, return: {{"issues": []}}
 """
                 
-                response = self.model.generate_content(prompt)
+                response = self._generate(prompt, "analyze", attempt=attempt)
                 result_text = response.text.strip()
                 
                 # Extract JSON from markdown code blocks if present
@@ -161,12 +183,16 @@ If no issues are found, return: {{"issues": []}}
                     if attempt < max_retries - 1:
                         wait_time = 60 if "quota" in err_str else 30
                         logger.warning(f"Retrying in {wait_time}s (Attempt {attempt + 1}/{max_retries})...")
-                        time.sleep(wait_time)
+                        LLM_RETRIES.labels(reason="rate_limited").inc()
+                        LLM_BACKOFF_SECONDS.labels(reason="rate_limited").inc(wait_time)
+                        with start_span("retry_sleep", {"retry.reason": "rate_limited", "retry.wait_seconds": wait_time}):
+                            time.sleep(wait_time)
                         continue
                 
                 logger.error(f"Error analyzing {file_path}: {e}")
                 if attempt == max_retries - 1:
                     raise e
+                LLM_RETRIES.labels(reason="error").inc()
         return []
         return []
     
@@ -210,7 +236,7 @@ If no secrets found, return: {{"secrets": []}}
 """
         
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, "scan_secrets")
             result_text = response.text.strip()
             
             # Extract JSON
@@ -254,7 +280,7 @@ Respond with ONLY: {{"valid": true}} or {{"valid": false}}
 """
         
         try:
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, "validate_fix")
             result_text = response.text.strip()
             
             # Extract JSON
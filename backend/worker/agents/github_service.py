@@ -3,19 +3,52 @@ GitHub service - Handles repository operations and PR creation.
 """
 from github import Github, GithubException
 from app.core.config import settings
+from app.core.tracing import annotate_span, start_span, traced
+import base64
+import hashlib
+import httpx
 import logging
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+class TracedTransport(httpx.HTTPTransport):
+    """HTTP transport recording a span per GitHub API call."""
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with start_span(f"github {request.method}", {"http.method": request.method, "http.url": str(request.url)}):
+            response = super().handle_request(request)
+            annotate_span({"http.status_code": response.status_code})
+            return response
+
+
 class GitHubService:
     """Service for interacting with GitHub API."""
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, api_url: Optional[str] = None):
         """Initialize GitHub API client."""
-        self.github = Github(token or settings.GITHUB_TOKEN)
+        self._token = token or settings.GITHUB_TOKEN
+        self._api_url = (api_url or settings.GITHUB_API_URL).rstrip("/")
+        self.github = Github(self._token)
+        self._http = None
+    
+    @property
+    def http(self) -> httpx.Client:
+        """Pooled HTTP session for the REST (Git Data) API, created on first use."""
+        if self._http is None:
+            self._http = httpx.Client(
+                base_url=self._api_url,
+                headers={
+                    "Authorization": f"Bearer {self._token}",
+                    "Accept": "application/vnd.github+json",
+                },
+                timeout=settings.GITHUB_API_TIMEOUT,
+                transport=TracedTransport(),
+            )
+        return self._http
     
+    @traced("github.create_pull")
     def create_pull_request(
         self,
         repo_full_name: str,
@@ -54,6 +87,121 @@ class GitHubService:
             logger.error(f"Failed to create PR: {e}")
             return None, None
     
+    @staticmethod
+    def git_blob_sha(content: bytes) -> str:
+        """Compute the git object SHA of a blob, as GitHub would."""
+        header = f"blob {len(content)}\0".encode()
+        return hashlib.sha1(header + content).hexdigest()
+    
+    @traced("github.create_pull_request_from_files")
+    def create_pull_request_from_files(
+        self,
+        repo_full_name: str,
+        branch_name: str,
+        files: List[Tuple[str, bytes, str]],
+        commit_message: str,
+        title: str,
+        body: str,
+        base_branch: str = "main"
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Create a pull request without pushing, via the Git Data API.
+        
+        The commit is built server-side from only the changed files: blobs
+        (skipping those GitHub already has), a tree on top of the base tree,
+        a commit, and the branch ref. All calls share one pooled session.
+        
+        Args:
+            repo_full_name: Full repository name (owner/repo)
+            branch_name: Name of the branch to create
+            files: List of (path, content, mode) for every changed file
+            commit_message: Commit message
+            title: PR title
+            body: PR description
+            base_branch: Base branch to merge into
+            
+        Returns:
+            Tuple of (PR URL, PR number) or (None, None) on failure
+        """
+        repo_path = f"/repos/{repo_full_name}"
+        
+        try:
+            # Base commit and tree
+            ref = self._request("GET", f"{repo_path}/git/ref/heads/{base_branch}")
+            base_sha = ref["object"]["sha"]
+            base_commit = self._request("GET", f"{repo_path}/git/commits/{base_sha}")
+            base_tree_sha = base_commit["tree"]["sha"]
+            
+            # Blobs, deduplicated locally and against the repository
+            tree_entries = []
+            known_blobs = {}  # local blob SHA -> SHA on GitHub
+            for path, content, mode in files:
+                sha = self.git_blob_sha(content)
+                if sha not in known_blobs:
+                    if self._blob_exists(repo_path, sha):
+                        known_blobs[sha] = sha
+                    else:
+                        created = self._request("POST", f"{repo_path}/git/blobs", json={
+                            "content": base64.b64encode(content).decode("ascii"),
+                            "encoding": "base64",
+                        })
+                        known_blobs[sha] = created["sha"]
+                tree_entries.append({"path": path, "mode": mode, "type": "blob", "sha": known_blobs[sha]})
+            
+            # Tree, commit and branch
+            tree = self._request("POST", f"{repo_path}/git/trees", json={
+                "base_tree": base_tree_sha,
+                "tree": tree_entries,
+            })
+            commit = self._request("POST", f"{repo_path}/git/commits", json={
+                "message": commit_message,
+                "tree": tree["sha"],
+                "parents": [base_sha],
+            })
+            self._create_or_update_ref(repo_path, branch_name, commit["sha"])
+            
+            pr = self._request("POST", f"{repo_path}/pulls", json={
+                "title": title,
+                "body": body,
+                "head": branch_name,
+                "base": base_branch,
+            })
+            
+            logger.info(f"Created PR #{pr['number']} for {repo_full_name} via Git Data API ({len(files)} files)")
+            return pr["html_url"], pr["number"]
+            
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Failed to create PR via Git Data API: {e.response.status_code} {e.response.text[:300]}")
+            return None, None
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to create PR via Git Data API: {e}")
+            return None, None
+    
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        """Send a REST API request and return the decoded JSON body."""
+        response = self.http.request(method, path, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    
+    def _blob_exists(self, repo_path: str, sha: str) -> bool:
+        """Check whether the repository already has a blob (HEAD avoids downloading it)."""
+        response = self.http.head(f"{repo_path}/git/blobs/{sha}")
+        return response.status_code == 200
+    
+    def _create_or_update_ref(self, repo_path: str, branch_name: str, sha: str):
+        """Point a branch at a commit, creating it or force-updating it (re-runs of an audit)."""
+        response = self.http.post(f"{repo_path}/git/refs", json={
+            "ref": f"refs/heads/{branch_name}",
+            "sha": sha,
+        })
+        if response.status_code == 422:
+            # Reference already exists
+            response = self.http.patch(f"{repo_path}/git/refs/heads/{branch_name}", json={
+                "sha": sha,
+                "force": True,
+            })
+        response.raise_for_status()
+    
     def fork_repository(self, repo_full_name: str) -> Optional[str]:
         """
         Fork a repository to the authenticated user's account.
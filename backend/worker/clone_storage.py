@@ -0,0 +1,206 @@
+"""
+Clone storage manager - Disk quota and janitor for CLONE_DIR.
+
+Every clone gets a sidecar owner file (`<clone>.owner.json`) recording the
+host, process and task that created it. Before cloning, workers check the
+quota and free disk space; when storage is full they first reclaim orphaned
+clones (left behind by workers killed by the hard time limit or OOM) and
+otherwise refuse with CloneStorageFull so the task can be re-queued.
+"""
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+OWNER_SUFFIX = ".owner.json"
+
+# Short-lived cache of the CLONE_DIR size, which requires a full tree walk
+_usage_cache = {"bytes": 0, "at": 0.0}
+
+
+class CloneStorageFull(Exception):
+    """Raised when a new clone would exceed the clone storage quota."""
+
+
+def owner_file(clone_path: str) -> str:
+    """Path of the sidecar owner file for a clone directory."""
+    return clone_path.rstrip(os.sep) + OWNER_SUFFIX
+
+
+def register_clone(clone_path: str, task_id: Optional[str] = None):
+    """Record which host, process and task own a clone directory."""
+    owner = {
+        "hostname": socket.gethostname(),
+        "pid": os.getpid(),
+        "task_id": task_id,
+        "created_at": time.time(),
+    }
+    with open(owner_file(clone_path), "w") as f:
+        json.dump(owner, f)
+
+
+def release_clone(clone_path: str):
+    """Remove a clone directory and its owner file."""
+    if os.path.exists(clone_path):
+        shutil.rmtree(clone_path)
+    try:
+        os.remove(owner_file(clone_path))
+    except FileNotFoundError:
+        pass
+    _usage_cache["at"] = 0.0
+
+
+def directory_size(path: str) -> int:
+    """Total size in bytes of the regular files under a directory."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_blocks * 512
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def used_bytes(max_age: float = 15.0) -> int:
+    """Bytes used by CLONE_DIR, cached for max_age seconds."""
+    if time.monotonic() - _usage_cache["at"] > max_age:
+        _usage_cache["bytes"] = directory_size(settings.CLONE_DIR) if os.path.isdir(settings.CLONE_DIR) else 0
+        _usage_cache["at"] = time.monotonic()
+    return _usage_cache["bytes"]
+
+
+def storage_usage() -> dict:
+    """Report clone storage usage (used by logs, the stats API and metrics)."""
+    os.makedirs(settings.CLONE_DIR, exist_ok=True)
+    clones = [
+        name for name in os.listdir(settings.CLONE_DIR)
+        if not name.endswith(OWNER_SUFFIX)
+    ]
+    disk = shutil.disk_usage(settings.CLONE_DIR)
+    return {
+        "clone_dir": settings.CLONE_DIR,
+        "clone_count": len(clones),
+        "used_bytes": used_bytes(),
+        "quota_bytes": settings.CLONE_DISK_QUOTA_MB * MB,
+        "disk_free_bytes": disk.free,
+    }
+
+
+def _process_alive(pid: int) -> bool:
+    """Return True if a process with this PID exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def is_orphan(clone_path: str) -> bool:
+    """
+    Decide whether a clone directory's owning task is gone.
+
+    Clones on this host are orphaned once their process is dead. Clones from
+    other hosts (shared volumes) or without an owner file are orphaned once
+    older than CLONE_ORPHAN_AGE_SECONDS, which exceeds the task hard time limit.
+    """
+    try:
+        with open(owner_file(clone_path)) as f:
+            owner = json.load(f)
+    except (OSError, ValueError):
+        owner = None
+
+    if owner is None:
+        try:
+            created_at = os.path.getmtime(clone_path)
+        except OSError:
+            return False
+        return time.time() - created_at > settings.CLONE_ORPHAN_AGE_SECONDS
+
+    if owner.get("hostname") == socket.gethostname() and not _process_alive(owner.get("pid", 0)):
+        return True
+    return time.time() - owner.get("created_at", 0) > settings.CLONE_ORPHAN_AGE_SECONDS
+
+
+def reclaim_orphans() -> int:
+    """
+    Remove orphaned clone directories (and stray owner files).
+
+    Returns:
+        Number of bytes reclaimed
+    """
+    if not os.path.isdir(settings.CLONE_DIR):
+        return 0
+
+    reclaimed = 0
+    for name in os.listdir(settings.CLONE_DIR):
+        path = os.path.join(settings.CLONE_DIR, name)
+
+        if name.endswith(OWNER_SUFFIX):
+            # Owner file whose clone is already gone
+            if not os.path.exists(path[:-len(OWNER_SUFFIX)]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            continue
+
+        if os.path.isdir(path) and is_orphan(path):
+            size = directory_size(path)
+            try:
+                release_clone(path)
+            except OSError as e:
+                logger.error(f"Failed to reclaim orphaned clone {path}: {e}")
+                continue
+            reclaimed += size
+            logger.warning(f"Reclaimed orphaned clone {path} ({size / MB:.1f}MB)")
+
+    return reclaimed
+
+
+def ensure_capacity():
+    """
+    Make sure a new clone fits, reclaiming orphans if needed.
+
+    Raises:
+        CloneStorageFull: If the quota or free disk space is still insufficient
+    """
+    os.makedirs(settings.CLONE_DIR, exist_ok=True)
+    reserve = settings.CLONE_RESERVE_MB * MB
+    quota = settings.CLONE_DISK_QUOTA_MB * MB
+
+    def has_room() -> bool:
+        disk_ok = shutil.disk_usage(settings.CLONE_DIR).free - reserve >= settings.CLONE_MIN_FREE_MB * MB
+        quota_ok = quota <= 0 or used_bytes() + reserve <= quota
+        return disk_ok and quota_ok
+
+    if has_room():
+        return
+
+    reclaimed = reclaim_orphans()
+    if reclaimed and has_room():
+        return
+
+    usage = storage_usage()
+    raise CloneStorageFull(
+        f"Clone storage full: {usage['used_bytes'] / MB:.0f}MB used of "
+        f"{usage['quota_bytes'] / MB:.0f}MB quota, {usage['disk_free_bytes'] / MB:.0f}MB free on disk"
+    )
@@ -0,0 +1,61 @@
+"""
+File filters - Which repository files the agent analyzes.
+
+Kept free of heavy imports so the API can reuse them (e.g. for queue routing).
+"""
+from pathlib import PurePosixPath
+from typing import Optional
+
+# File extensions to analyze
+SUPPORTED_EXTENSIONS = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.jsx': 'javascript',
+    '.tsx': 'typescript',
+    '.java': 'java',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.rb': 'ruby',
+    '.php': 'php',
+}
+
+# Files/directories to skip (RAG - Intelligent Context Retrieval)
+SKIP_PATTERNS = {
+    'node_modules', '.git', '__pycache__', 'venv', 'env', '.venv',
+    'dist', 'build', 'target', '.idea', '.vscode', 'coverage',
+    '.next', 'out', '.cache', 'vendor', 'pkg'
+}
+
+
+def language_for_path(rel_path: str) -> Optional[str]:
+    """
+    Return the language of a repository-relative path, or None if it is skipped.
+    
+    Args:
+        rel_path: POSIX-style path relative to the repository root
+        
+    Returns:
+        Language name, or None for unsupported extensions and skipped directories
+    """
+    path = PurePosixPath(rel_path)
+    if any(part in SKIP_PATTERNS for part in path.parts[:-1]):
+        return None
+    return SUPPORTED_EXTENSIONS.get(path.suffix.lower())
+
+
+def sparse_checkout_patterns() -> list:
+    """
+    Non-cone sparse-checkout patterns matching exactly the analyzable files.
+    
+    Extensions are included in lower and upper case (discovery is
+    case-insensitive); skipped directories are excluded at any depth.
+    """
+    patterns = []
+    for ext in sorted(SUPPORTED_EXTENSIONS):
+        patterns.append(f"*{ext}")
+        patterns.append(f"*{ext.upper()}")
+    patterns.extend(f"!**/{name}/**" for name in sorted(SKIP_PATTERNS))
+    return patterns
@@ -0,0 +1,43 @@
+"""
+I/O pool support - Lets one worker process drive dozens of audits.
+
+Audits spend nearly all their time waiting on Gemini, git and GitHub, so
+running the worker with the gevent pool (`WORKER_POOL=gevent`) is far
+cheaper than one prefork process per audit. Celery monkey-patches the
+standard library (sockets, subprocess, time.sleep) before loading the app;
+this module patches the C-level clients it cannot reach.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_gevent_patched() -> bool:
+    """Return True if the process runs under gevent monkey-patching."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched("socket")
+
+
+def patch_for_gevent() -> bool:
+    """
+    Make psycopg2 and gRPC cooperative when running under gevent.
+    
+    Returns:
+        True if patches were applied
+    """
+    if not is_gevent_patched():
+        return False
+    
+    # psycopg2 blocks in C code; psycogreen yields to other greenlets while waiting
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+    
+    # The Gemini client talks gRPC, which needs its own gevent integration
+    import grpc.experimental.gevent as grpc_gevent
+    grpc_gevent.init_gevent()
+    
+    logger.info("Gevent pool detected: patched psycopg2 and gRPC for cooperative I/O")
+    return True
@@ -0,0 +1,102 @@
+"""
+Memory accounting - Per-stage RSS and tracemalloc measurements for audits.
+
+Each audit creates a MemoryTracker and marks its stages (clone, discover,
+analyze, fix, pr). Per stage we record the RSS delta and the process peak
+RSS, plus the Python heap peak and top allocation sites when tracemalloc
+is enabled (WORKER_TRACEMALLOC, off by default because of its overhead).
+The peak RSS of every finished stage is also observed in the
+autodev_stage_peak_rss_bytes histogram.
+
+Under the gevent pool, RSS is shared by all concurrent audits in the
+process, so per-stage deltas are only indicative there.
+"""
+import os
+import resource
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+from app.core.config import settings
+from worker.metrics import STAGE_PEAK_RSS_BYTES
+
+MB = 1024 * 1024
+
+
+def current_rss_bytes() -> int:
+    """Return the current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Non-Linux fallback: the peak is the best we have
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryTracker:
+    """Records memory usage for consecutive stages of one audit."""
+
+    def __init__(self, trace: Optional[bool] = None, top_n: int = 5):
+        """
+        Args:
+            trace: Enable tracemalloc (defaults to settings.WORKER_TRACEMALLOC)
+            top_n: Number of top allocation sites to keep per stage
+        """
+        self.trace = settings.WORKER_TRACEMALLOC if trace is None else trace
+        self.top_n = top_n
+        self.stages: Dict[str, dict] = {}
+        self._current: Optional[str] = None
+        self._rss_before = 0
+        self._started_at = 0.0
+
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def mark(self, stage: str):
+        """End the current stage (if any) and start measuring a new one."""
+        self.finish()
+        self._current = stage
+        self._rss_before = current_rss_bytes()
+        self._started_at = time.monotonic()
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def finish(self):
+        """End the current stage and record its measurements."""
+        if self._current is None:
+            return
+
+        rss = current_rss_bytes()
+        peak_rss = peak_rss_bytes()
+        STAGE_PEAK_RSS_BYTES.labels(stage=self._current).observe(peak_rss)
+        stats = {
+            "rss_mb": round(rss / MB, 1),
+            "rss_delta_mb": round((rss - self._rss_before) / MB, 1),
+            "peak_rss_mb": round(peak_rss / MB, 1),
+            "seconds": round(time.monotonic() - self._started_at, 2),
+        }
+
+        if self.trace and tracemalloc.is_tracing():
+            traced_current, traced_peak = tracemalloc.get_traced_memory()
+            stats["traced_mb"] = round(traced_current / MB, 1)
+            stats["traced_peak_mb"] = round(traced_peak / MB, 1)
+            top = tracemalloc.take_snapshot().statistics("lineno")[:self.top_n]
+            stats["top_allocations"] = [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size / MB:.1f}MB"
+                for stat in top
+            ]
+
+        self.stages[self._current] = stats
+        self._current = None
+
+    def summary(self) -> str:
+        """One-line human-readable summary of all recorded stages."""
+        self.finish()
+        parts = [f"{name} {stats['rss_delta_mb']:+.1f}MB" for name, stats in self.stages.items()]
+        return f"{', '.join(parts)} (peak RSS {peak_rss_bytes() / MB:.0f}MB)"
@@ -0,0 +1,199 @@
+"""
+Worker metrics - Prometheus instrumentation of the audit pipeline.
+
+Stage latencies (clone, discover, per-file analysis, fixes, PR creation),
+peak RSS per stage, LLM request/429/retry/token counters and database time
+per task are recorded here and served by the worker's main process on
+WORKER_METRICS_PORT.
+
+Prefork children are separate processes, so values are written to
+PROMETHEUS_MULTIPROC_DIR (set before prometheus_client is imported, see
+worker.worker) and aggregated at scrape time. When the API shares that
+directory (all-in-one deployment), its /metrics includes these too.
+
+Every metric has labels, so no value (and no multiprocess file) exists
+until it is first recorded: the directory can be emptied when the worker
+starts, after the task modules were imported.
+
+Clone storage usage and quota are read from CLONE_DIR at scrape time by
+the main process (CloneStorageCollector), so they describe the volume the
+worker actually clones into.
+"""
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+STAGE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+FILE_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+DB_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (128, 256, 384, 512, 768, 1024, 1536, 2048, 3072, 4096, 8192))
+
+STAGE_SECONDS = Histogram(
+    "autodev_stage_duration_seconds",
+    "Duration of audit pipeline stages (clone, discover, fix, pr)",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_PEAK_RSS_BYTES = Histogram(
+    "autodev_stage_peak_rss_bytes",
+    "Peak RSS of the worker process at the end of each audit stage (see worker.memory)",
+    ["stage"],
+    buckets=MEMORY_BUCKETS,
+)
+FILE_ANALYSIS_SECONDS = Histogram(
+    "autodev_file_analysis_seconds",
+    "Duration of the analysis of one file, including LLM retries and backoff",
+    ["language"],
+    buckets=FILE_BUCKETS,
+)
+LLM_REQUESTS = Counter(
+    "autodev_llm_requests_total",
+    "LLM requests by operation and outcome (success, rate_limited = HTTP 429, error)",
+    ["operation", "outcome"],
+)
+LLM_RETRIES = Counter(
+    "autodev_llm_retries_total",
+    "LLM requests retried, by reason",
+    ["reason"],
+)
+LLM_BACKOFF_SECONDS = Counter(
+    "autodev_llm_backoff_seconds_total",
+    "Seconds spent sleeping before LLM retries, by reason",
+    ["reason"],
+)
+LLM_TOKENS = Counter(
+    "autodev_llm_tokens_total",
+    "LLM tokens by kind (prompt, response); estimated at 4 characters per token when the SDK reports no usage",
+    ["kind"],
+)
+TASK_DB_SECONDS = Histogram(
+    "autodev_task_db_seconds",
+    "Database time of one audit task run (sum of its statement durations)",
+    ["task"],
+    buckets=DB_BUCKETS,
+)
+
+# Per-task accumulator of statement time (contextvars are greenlet-local under gevent)
+_task_db_seconds: ContextVar[Optional[list]] = ContextVar("task_db_seconds", default=None)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a pipeline stage; usable as a context manager or decorator."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage=stage).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def file_analysis_timer(language: str):
+    """Time the analysis of one file."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        FILE_ANALYSIS_SECONDS.labels(language=language).observe(time.perf_counter() - started)
+
+
+def record_llm_tokens(prompt: str, response):
+    """Count the tokens of one LLM call, from the reported usage if available."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", 0):
+        prompt_tokens = usage.prompt_token_count
+        response_tokens = usage.candidates_token_count
+    else:
+        prompt_tokens = len(prompt) // 4
+        try:
+            response_tokens = len(response.text) // 4
+        except (ValueError, AttributeError):
+            response_tokens = 0  # Blocked or empty responses have no text
+    LLM_TOKENS.labels(kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(kind="response").inc(response_tokens)
+
+
+def install_db_timing(engine):
+    """Time every statement executed through the engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _statement_started(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        accumulator = _task_db_seconds.get()
+        if accumulator is not None:
+            accumulator[0] += elapsed
+
+
+def current_db_seconds() -> float:
+    """Database time of the running task so far."""
+    accumulator = _task_db_seconds.get()
+    return round(accumulator[0], 3) if accumulator is not None else 0.0
+
+
+@contextmanager
+def track_db_time(task: str):
+    """Observe the database time of the enclosed task run in TASK_DB_SECONDS."""
+    accumulator = [0.0]
+    token = _task_db_seconds.set(accumulator)
+    try:
+        yield
+    finally:
+        _task_db_seconds.reset(token)
+        TASK_DB_SECONDS.labels(task=task).observe(accumulator[0])
+
+
+class CloneStorageCollector:
+    """Scrape-time gauges: clone storage used on this worker, its quota and free disk space."""
+
+    def collect(self):
+        from worker.clone_storage import storage_usage
+
+        try:
+            usage = storage_usage()
+        except OSError as e:
+            logger.warning(f"Failed to read clone storage usage: {e}")
+            return
+        yield GaugeMetricFamily("autodev_clone_storage_used_bytes", "Bytes used by the clones in CLONE_DIR", value=usage["used_bytes"])
+        yield GaugeMetricFamily("autodev_clone_storage_quota_bytes", "Clone storage quota (CLONE_DISK_QUOTA_MB)", value=usage["quota_bytes"])
+        yield GaugeMetricFamily("autodev_clone_storage_disk_free_bytes", "Free space on the CLONE_DIR filesystem", value=usage["disk_free_bytes"])
+        yield GaugeMetricFamily("autodev_clone_storage_clones", "Clones present in CLONE_DIR", value=usage["clone_count"])
+
+
+def reset_multiprocess_dir():
+    """Empty PROMETHEUS_MULTIPROC_DIR, so a restarted worker doesn't re-count old values."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def start_metrics_server(port: int):
+    """Serve the aggregated metrics of all worker processes, and clone storage, on the given port."""
+    from prometheus_client import start_http_server
+    from app.core.metrics import process_registry
+
+    registry = process_registry()
+    registry.register(CloneStorageCollector())
+    start_http_server(port, registry=registry)
+
+
+def mark_process_dead(pid: int):
+    """Drop the live-gauge files of an exited pool process."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
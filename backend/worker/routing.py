@@ -0,0 +1,178 @@
+"""
+Queue routing - Picks the Celery queue and priority for each audit.
+
+Audits are split between a small and a large queue based on a cheap
+pre-listing of the repository (one GitHub tree API call), so large
+monorepo audits never sit in front of small ones. Within a queue, owners
+with fewer audits in flight get a higher priority.
+"""
+import logging
+from typing import Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import Audit, Repository, AuditStatus
+from worker.file_filters import language_for_path
+
+logger = logging.getLogger(__name__)
+
+# Audits that hold (or are about to hold) a worker slot
+IN_FLIGHT_STATUSES = [
+    AuditStatus.PENDING,
+    AuditStatus.CLONING,
+    AuditStatus.ANALYZING,
+    AuditStatus.FIXING,
+    AuditStatus.VALIDATING,
+    AuditStatus.CREATING_PR,
+]
+
+# Audits actively using a worker
+RUNNING_STATUSES = IN_FLIGHT_STATUSES[1:]
+
+
+def github_headers(github_token: str = None) -> dict:
+    """GitHub REST API headers, authenticated with the custom or configured token."""
+    headers = {"Accept": "application/vnd.github+json"}
+    token = github_token or settings.GITHUB_TOKEN
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def resolve_head_commit(owner: str, name: str, branch: str, github_token: str = None) -> Optional[str]:
+    """
+    Resolve the commit SHA a branch points to (one lightweight GitHub call).
+    
+    Args:
+        owner: Repository owner
+        name: Repository name
+        branch: Branch to audit
+        github_token: Optional custom GitHub token
+        
+    Returns:
+        The 40-character commit SHA, or None if it could not be resolved
+    """
+    import httpx  # Deferred: not needed at API import time
+    
+    headers = github_headers(github_token)
+    headers["Accept"] = "application/vnd.github.sha"  # Plain-text SHA instead of the full commit
+    
+    try:
+        with httpx.Client(base_url=settings.GITHUB_API_URL, headers=headers, timeout=settings.AUDIT_SIZE_ESTIMATE_TIMEOUT) as client:
+            response = client.get(f"/repos/{owner}/{name}/commits/{branch}")
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not resolve {owner}/{name}@{branch}: {e}")
+        return None
+    
+    sha = response.text.strip()
+    if response.status_code != 200 or len(sha) != 40:
+        return None
+    return sha
+
+
+def estimate_repository_size(owner: str, name: str, branch: str, github_token: str = None) -> Optional[Tuple[int, int]]:
+    """
+    Estimate audit size from the repository's git tree without cloning.
+    
+    Args:
+        owner: Repository owner
+        name: Repository name
+        branch: Branch to audit (falls back to the default branch)
+        github_token: Optional custom GitHub token
+        
+    Returns:
+        Tuple of (analyzable file count, analyzable bytes), or None if unknown
+    """
+    import httpx
+    
+    try:
+        with httpx.Client(base_url=settings.GITHUB_API_URL, headers=github_headers(github_token), timeout=settings.AUDIT_SIZE_ESTIMATE_TIMEOUT) as client:
+            response = client.get(f"/repos/{owner}/{name}/git/trees/{branch}", params={"recursive": "1"})
+            
+            if response.status_code == 404:
+                # Branch may not exist; the worker falls back too, so use the default branch
+                repo_response = client.get(f"/repos/{owner}/{name}")
+                if repo_response.status_code != 200:
+                    return None
+                default_branch = repo_response.json().get("default_branch")
+                response = client.get(f"/repos/{owner}/{name}/git/trees/{default_branch}", params={"recursive": "1"})
+            
+            if response.status_code != 200:
+                return None
+            
+            tree = response.json()
+    except httpx.HTTPError as e:
+        logger.warning(f"Size estimate failed for {owner}/{name}: {e}")
+        return None
+    
+    if tree.get("truncated"):
+        # Too many entries for a single tree response - definitely large
+        logger.info(f"Tree listing truncated for {owner}/{name}")
+        return None
+    
+    file_count = 0
+    total_bytes = 0
+    for entry in tree.get("tree", []):
+        if entry.get("type") == "blob" and language_for_path(entry.get("path", "")):
+            file_count += 1
+            total_bytes += entry.get("size", 0)
+    
+    return file_count, total_bytes
+
+
+def select_queue(estimate: Optional[Tuple[int, int]]) -> str:
+    """
+    Pick the queue for an audit from its size estimate.
+    
+    Unknown sizes go to the large queue so they can never delay small audits.
+    """
+    if estimate is None:
+        return settings.AUDIT_LARGE_QUEUE
+    
+    file_count, total_bytes = estimate
+    if file_count >= settings.AUDIT_LARGE_MIN_FILES or total_bytes >= settings.AUDIT_LARGE_MIN_BYTES:
+        return settings.AUDIT_LARGE_QUEUE
+    return settings.AUDIT_SMALL_QUEUE
+
+
+def owner_audits_count_statement(owner: str, statuses: list, exclude_audit_id: int = None):
+    """SELECT counting audits for an owner's repositories in the given statuses."""
+    statement = select(func.count(Audit.id)).join(Repository).where(
+        Repository.owner == owner,
+        Audit.status.in_(statuses),
+    )
+    if exclude_audit_id is not None:
+        statement = statement.where(Audit.id != exclude_audit_id)
+    return statement
+
+
+def count_owner_audits(db: Session, owner: str, statuses: list, exclude_audit_id: int = None) -> int:
+    """Count audits for an owner's repositories in the given statuses."""
+    return db.execute(owner_audits_count_statement(owner, statuses, exclude_audit_id)).scalar()
+
+
+def owner_priority(db: Session, owner: str, exclude_audit_id: int = None) -> int:
+    """
+    Priority for an owner's next audit (0 = highest, 9 = lowest).
+    
+    Each audit the owner already has in flight lowers the priority by one step,
+    so a tenant submitting many audits can't starve others.
+    """
+    in_flight = count_owner_audits(db, owner, IN_FLIGHT_STATUSES, exclude_audit_id)
+    return min(9, in_flight)
+
+
+async def owner_priority_async(db: AsyncSession, owner: str, exclude_audit_id: int = None) -> int:
+    """Async variant of owner_priority, for API routes."""
+    in_flight = await db.scalar(owner_audits_count_statement(owner, IN_FLIGHT_STATUSES, exclude_audit_id))
+    return min(9, in_flight)
+
+
+def owner_at_capacity(db: Session, owner: str, audit_id: int) -> bool:
+    """Return True if the owner already runs the maximum allowed concurrent audits."""
+    if settings.AUDIT_MAX_RUNNING_PER_OWNER <= 0:
+        return False
+    running = count_owner_audits(db, owner, RUNNING_STATUSES, exclude_audit_id=audit_id)
+    return running >= settings.AUDIT_MAX_RUNNING_PER_OWNER
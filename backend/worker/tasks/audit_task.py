@@ -1,11 +1,15 @@
 """
 Main repository audit task - The orchestrator of the self-healing process.
 """
-from celery import Task
+from celery import Task, chord, group
+from celery.exceptions import SoftTimeLimitExceeded, MaxRetriesExceededError
 from sqlalchemy.orm import Session
 import git
 import os
-import shutil
+import uuid
+from collections import namedtuple
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -13,49 +17,40 @@ import logging
 from worker.worker import celery_app
 from app.core.database import SessionLocal
 from app.core.config import settings
-from app.models import Audit, Repository, Issue, AuditStatus, IssueType, IssueSeverity
+from app.core.events import publish_audit_progress
+from app.core.tracing import annotate_span, start_span, traced
+from app.models import Audit, Repository, Issue, FileCheckpoint, AuditStatus, IssueType, IssueSeverity
 from worker.agents.gemini_agent import GeminiAgent, gemini_agent
 from worker.agents.github_service import GitHubService, github_service
+from worker.file_filters import SUPPORTED_EXTENSIONS, SKIP_PATTERNS, sparse_checkout_patterns
+from worker.routing import owner_at_capacity, owner_priority
+from worker.memory import MemoryTracker
+from worker.metrics import current_db_seconds, file_analysis_timer, stage_timer, track_db_time
+from worker.clone_storage import CloneStorageFull, ensure_capacity, register_clone, release_clone
 
 logger = logging.getLogger(__name__)
 
-# File extensions to analyze
-SUPPORTED_EXTENSIONS = {
-    '.py': 'python',
-    '.js': 'javascript',
-    '.ts': 'typescript',
-    '.jsx': 'javascript',
-    '.tsx': 'typescript',
-    '.java': 'java',
-    '.go': 'go',
-    '.rs': 'rust',
-    '.cpp': 'cpp',
-    '.c': 'c',
-    '.rb': 'ruby',
-    '.php': 'php',
-}
-
-# Files/directories to skip (RAG - Intelligent Context Retrieval)
-SKIP_PATTERNS = {
-    'node_modules', '.git', '__pycache__', 'venv', 'env', '.venv',
-    'dist', 'build', 'target', '.idea', '.vscode', 'coverage',
-    '.next', 'out', '.cache', 'vendor', 'pkg'
-}
+# Lightweight view of an Issue (no code blocks), used for PR text
+IssueSummary = namedtuple(
+    'IssueSummary',
+    ['id', 'file_path', 'line_number', 'issue_type', 'severity', 'description'],
+)
 
 
 class AuditTask(Task):
     """Custom Celery task class with database session management."""
     
     def __call__(self, *args, **kwargs):
-        """Override call to manage database sessions."""
+        """Override call to manage database sessions (and measure their time)."""
         db = SessionLocal()
         try:
-            return super().__call__(*args, db=db, **kwargs)
+            with track_db_time(self.name.rsplit('.', 1)[-1]):
+                return super().__call__(*args, db=db, **kwargs)
         finally:
             db.close()
 
 
-def append_log(audit, db, level: str, message: str):
+def append_log(audit, db, level: str, message: str, data: dict = None):
     """
     Append a log entry to the audit.
     
@@ -64,6 +59,7 @@ def append_log(audit, db, level: str, message: str):
         db: Database session
         level: Log level (INFO, WARNING, ERROR, SUCCESS)
         message: Log message
+        data: Optional structured payload stored with the entry
     """
     from datetime import datetime
     
@@ -75,6 +71,8 @@ def append_log(audit, db, level: str, message: str):
         'level': level,
         'message': message
     }
+    if data is not None:
+        log_entry['data'] = data
     
     # Append to logs
     audit.logs = audit.logs + [log_entry]
@@ -90,11 +88,170 @@ def append_log(audit, db, level: str, message: str):
     )
 
 
+def is_quota_error(e: Exception) -> bool:
+    """Return True if the exception signals a hard AI quota/billing limit."""
+    err_str = str(e).lower()
+    return ("429" in err_str and "quota" in err_str) or "quota exceeded" in err_str
+
+
+def fail_audit_for_quota(audit, db, e: Exception):
+    """Mark the audit as failed because the AI quota was exhausted."""
+    logger.error("Quota exceeded. Force-terminating audit.")
+    db.rollback()
+    audit.status = AuditStatus.FAILED
+    audit.error_message = f"AI Quota Exceeded: {str(e)}"
+    audit.completed_at = datetime.utcnow()
+    append_log(audit, db, 'ERROR', '🛑 Audit terminated: AI Quota Exceeded. Please check your plan/billing.')
+    db.commit()
+
+
+def save_issues(audit, db, rel_path: str, issues: list) -> list:
+    """
+    Persist the issues returned by the agent for a single file.
+
+    Args:
+        audit: Audit model instance
+        db: Database session
+        rel_path: Path of the analyzed file relative to the clone root
+        issues: Issue dicts returned by the agent
+
+    Returns:
+        List of Issue objects added to the session
+    """
+    saved = []
+    for issue_data in issues:
+        issue = Issue(
+            audit_id=audit.id,
+            file_path=issue_data.get('file_path', rel_path),
+            line_number=issue_data.get('line_number'),
+            issue_type=IssueType(issue_data.get('issue_type', 'code_smell')),
+            severity=IssueSeverity(issue_data.get('severity', 'medium')),
+            description=issue_data.get('description', ''),
+            original_code=issue_data.get('original_code'),
+            fixed_code=issue_data.get('fixed_code'),
+            explanation=issue_data.get('explanation', ''),
+            is_fixed=1 if issue_data.get('fixed_code') else 0
+        )
+        db.add(issue)
+        saved.append(issue)
+    return saved
+
+
+def count_issues(db, audit_id: int) -> int:
+    """Count the issues persisted for an audit."""
+    return db.query(Issue).filter(Issue.audit_id == audit_id).count()
+
+
+def iter_fixable_issues(db, audit_id: int):
+    """
+    Stream the issues that carry a fix, ordered by file.
+
+    Rows are fetched in batches so the code blocks of a large audit are never
+    all in memory at once; the file ordering lets apply_fixes rewrite each
+    file only once.
+    """
+    query = (
+        db.query(Issue)
+        .filter(Issue.audit_id == audit_id, Issue.is_fixed == 1)
+        .order_by(Issue.file_path, Issue.id)
+        .yield_per(200)
+    )
+    yield from query
+
+
+def load_issue_summaries(db, audit_id: int) -> list:
+    """Load IssueSummary tuples (without code blocks) for an audit."""
+    rows = (
+        db.query(
+            Issue.id, Issue.file_path, Issue.line_number,
+            Issue.issue_type, Issue.severity, Issue.description,
+        )
+        .filter(Issue.audit_id == audit_id)
+        .order_by(Issue.id)
+        .all()
+    )
+    return [IssueSummary(*row) for row in rows]
+
+
+def load_checkpoints(db, audit_id: int) -> set:
+    """Return the relative paths of files already analyzed for an audit."""
+    rows = db.query(FileCheckpoint.file_path).filter(FileCheckpoint.audit_id == audit_id).all()
+    return {row[0] for row in rows}
+
+
+def count_checkpoints(db, audit_id: int) -> int:
+    """Count the files checkpointed (fully analyzed) for an audit."""
+    return db.query(FileCheckpoint).filter(FileCheckpoint.audit_id == audit_id).count()
+
+
+def save_checkpoint(audit, db, rel_path: str, issues_count: int = 0):
+    """
+    Record that a file has been analyzed.
+
+    The checkpoint is added to the same transaction as the file's issues,
+    so a file is either fully persisted or re-analyzed on resume.
+    """
+    db.add(FileCheckpoint(audit_id=audit.id, file_path=rel_path, issues_count=issues_count))
+
+
+@lru_cache(maxsize=settings.GEMINI_AGENT_CACHE_SIZE)
+def _agent_for_key(gemini_api_key: str) -> GeminiAgent:
+    """Build (once per key) an agent for a custom Gemini API key."""
+    return GeminiAgent(api_key=gemini_api_key)
+
+
+def get_agent(gemini_api_key: str = None) -> GeminiAgent:
+    """
+    Return the AI agent to use for an audit (custom key or global instance).
+
+    Agents are shared between concurrent audits using the same key, so an
+    I/O pool running dozens of audits keeps one client per key, not per audit.
+    """
+    if gemini_api_key:
+        return _agent_for_key(gemini_api_key)
+    return gemini_agent
+
+
+def requeue_audit(task, audit, db, countdown: int):
+    """
+    Publish a fresh copy of the audit task on the same queue after a delay.
+
+    A new message is used instead of task.retry(), so deferrals don't use up
+    the retry budget reserved for soft-time-limit resumes.
+    """
+    queue = (task.request.delivery_info or {}).get('routing_key') or settings.AUDIT_SMALL_QUEUE
+    deferred = task.apply_async(
+        args=task.request.args,
+        kwargs=task.request.kwargs,
+        queue=queue,
+        countdown=countdown,
+        priority=owner_priority(db, audit.repository.owner, exclude_audit_id=audit.id),
+    )
+    audit.task_id = deferred.id
+    db.commit()
+
+
+def defer_audit(task, audit, db):
+    """Re-enqueue an audit whose owner is at capacity, on the same queue."""
+    owner = audit.repository.owner
+    requeue_audit(task, audit, db, settings.AUDIT_FAIRNESS_DELAY)
+
+    last_message = audit.logs[-1]['message'] if audit.logs else ''
+    if not last_message.startswith('⏸️'):
+        append_log(audit, db, 'INFO', f'⏸️ {owner} already has {settings.AUDIT_MAX_RUNNING_PER_OWNER} audits running. Waiting for a free slot...')
+
+
+def split_into_shards(items: list, shard_size: int) -> list:
+    """Split a list into consecutive chunks of at most shard_size items."""
+    shard_size = max(1, shard_size)
+    return [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+
+
 @celery_app.task(base=AuditTask, bind=True, name="worker.tasks.audit_task.process_repository_audit")
-def process_repository_audit(self, audit_id: int, github_token: str = None, gemini_api_key: str = None, **kwargs):
+def process_repository_audit(self, audit_id: int, github_token: str = None, gemini_api_key: str = None, fanout: bool = False, **kwargs):
     """
     Main task to process a repository audit.
-    
+
     This is the orchestrator that:
     1. Clones the repository
     2. Maps the file structure (with RAG filtering)
@@ -102,40 +259,72 @@ def process_repository_audit(self, audit_id: int, github_token: str = None, gemi
     4. Generates fixes
     5. Validates fixes
     6. Creates a Pull Request
-    
+
+    In fan-out mode (requested, or automatic above AUDIT_FANOUT_MIN_FILES),
+    step 3 is split into shards dispatched as a chord of analyze_audit_shard
+    subtasks, and finalize_sharded_audit runs steps 4-6 once all shards finish.
+
+    Every analyzed file is checkpointed, so a redelivered (acks_late) or
+    resumed audit skips files that were already analyzed. Hitting the soft
+    time limit re-queues the task to continue from the last checkpoint.
+    The fan-out mode is stored on the audit, so a resumed audit keeps it,
+    and a redelivery never dispatches the shards again while they run.
+
     Args:
         audit_id: ID of the audit job
+        fanout: Force sharded analysis across multiple workers (also read from audit.fanout)
         **kwargs: Contains db session injected by AuditTask
     """
     db = kwargs.get('db')
+    annotate_span({"audit.id": audit_id})
     audit = db.query(Audit).filter(Audit.id == audit_id).first()
-    
+
     if not audit:
         logger.error(f"Audit {audit_id} not found")
         return
-        
+
+    if audit.status == AuditStatus.COMPLETED:
+        logger.info(f"Audit {audit_id} already completed, ignoring redelivery")
+        return
+
+    if audit.chord_id:
+        logger.info(f"Shards of audit {audit_id} already dispatched, ignoring redelivery")
+        return
+
+    # Per-owner fairness: don't hold a worker while the owner is at capacity
+    if owner_at_capacity(db, audit.repository.owner, audit.id):
+        defer_audit(self, audit, db)
+        return
+
     # Select AI Agent
-    agent = gemini_agent
-    if gemini_api_key:
-        agent = GeminiAgent(api_key=gemini_api_key)
-    
+    agent = get_agent(gemini_api_key)
+
     repository = audit.repository
     clone_path = None
-    
+    memory = MemoryTracker()
+
     try:
+        done_files = load_checkpoints(db, audit_id)
+
         # Update status: Starting
         audit.status = AuditStatus.PENDING
-        audit.started_at = datetime.utcnow()
-        append_log(audit, db, 'INFO', f'🚀 Starting audit for {repository.owner}/{repository.name}')
+        audit.started_at = audit.started_at or datetime.utcnow()
+        audit.error_message = None
+        audit.completed_at = None
+        if done_files:
+            append_log(audit, db, 'INFO', f'♻️ Resuming audit for {repository.owner}/{repository.name} ({len(done_files)} files already analyzed)')
+        else:
+            append_log(audit, db, 'INFO', f'🚀 Starting audit for {repository.owner}/{repository.name}')
         db.commit()
-        
+
         # Step 1: Clone repository
         append_log(audit, db, 'INFO', f'📥 Step 1: Cloning repository...')
         audit.status = AuditStatus.CLONING
         db.commit()
-        
-        clone_path, actual_branch = clone_repository(repository.url, repository.branch)
-        
+
+        memory.mark('clone')
+        clone_path, actual_branch = clone_repository(repository.url, repository.branch, task_id=self.request.id)
+
         # Update branch if detected differently
         if actual_branch != repository.branch:
              logger.info(f"Updated branch from {repository.branch} to {actual_branch}")
@@ -143,21 +332,43 @@ def process_repository_audit(self, audit_id: int, github_token: str = None, gemi
              repository.branch = actual_branch
              db.commit()
         append_log(audit, db, 'SUCCESS', f'✅ Repository cloned successfully')
-        
+
         # Step 2: Analyze files
         append_log(audit, db, 'INFO', f'🔍 Step 2: Discovering files to analyze...')
         audit.status = AuditStatus.ANALYZING
         db.commit()
-        
+
+        memory.mark('discover')
         files_to_analyze = discover_files(clone_path)
         audit.total_files = len(files_to_analyze)
         db.commit()
-        
+
         append_log(audit, db, 'INFO', f'📁 Found {len(files_to_analyze)} files to analyze')
-        
-        all_issues = []
-        
-        for idx, (file_path, language) in enumerate(files_to_analyze):
+
+        # Skip files checkpointed by a previous (interrupted) run
+        if done_files:
+            files_to_analyze = [
+                (path, language) for path, language in files_to_analyze
+                if os.path.relpath(path, clone_path) not in done_files
+            ]
+            audit.processed_files = len(done_files)
+            db.commit()
+            append_log(audit, db, 'INFO', f'⏭️  Skipping {len(done_files)} checkpointed files, {len(files_to_analyze)} remaining')
+
+        auto_fanout = (
+            settings.AUDIT_FANOUT_MIN_FILES > 0
+            and audit.total_files >= settings.AUDIT_FANOUT_MIN_FILES
+        )
+        if (fanout or audit.fanout or auto_fanout) and len(files_to_analyze) > settings.AUDIT_SHARD_SIZE:
+            dispatch_shards(audit, db, clone_path, files_to_analyze, github_token, gemini_api_key)
+            return
+
+        # Only counts are kept in memory; issues are streamed back from the DB later
+        memory.mark('analyze')
+        issues_found = count_issues(db, audit_id) if done_files else 0
+        processed = len(done_files)
+
+        for file_path, language in files_to_analyze:
             try:
                 # RE-CHECK: If the audit was deleted from the UI, STOP IMMEDIATELY
                 # This is the "proper" way to kill a zombie process on Render
@@ -166,104 +377,399 @@ def process_repository_audit(self, audit_id: int, github_token: str = None, gemi
                 if not check_audit:
                     logger.warning(f"Audit {audit_id} was deleted. Terminating worker process.")
                     return
+                db.commit()  # Return the connection to the pool while waiting on the LLM
+
+                # Get relative path
+                rel_path = os.path.relpath(file_path, clone_path)
+
+                # Skip files that are too large (checked before reading them)
+                if os.path.getsize(file_path) > settings.MAX_FILE_SIZE:
+                    logger.warning(f"Skipping {file_path}: too large")
+                    save_checkpoint(audit, db, rel_path)
+                    audit.processed_files = processed + 1
+                    db.commit()
+                    processed += 1
+                    continue
 
                 # Read file content
                 with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
-                
-                # Skip files that are too large
-                if len(content) > settings.MAX_FILE_SIZE:
-                    logger.warning(f"Skipping {file_path}: too large")
-                    continue
-                
-                # Get relative path
-                rel_path = os.path.relpath(file_path, clone_path)
-                
+
                 # Analyze with Gemini
-                issues = agent.analyze_file(rel_path, content, language, audit=audit, db=db)
-                
-                # Save issues to database
-                for issue_data in issues:
-                    issue = Issue(
-                        audit_id=audit.id,
-                        file_path=issue_data.get('file_path', rel_path),
-                        line_number=issue_data.get('line_number'),
-                        issue_type=IssueType(issue_data.get('issue_type', 'code_smell')),
-                        severity=IssueSeverity(issue_data.get('severity', 'medium')),
-                        description=issue_data.get('description', ''),
-                        original_code=issue_data.get('original_code'),
-                        fixed_code=issue_data.get('fixed_code'),
-                        explanation=issue_data.get('explanation', ''),
-                        is_fixed=1 if issue_data.get('fixed_code') else 0
-                    )
-                    db.add(issue)
-                    all_issues.append(issue)
-                
-                audit.processed_files = idx + 1
-                audit.issues_found = len(all_issues)
+                with file_analysis_timer(language), start_span("analyze_file", {"file.path": rel_path, "file.language": language}):
+                    issues = agent.analyze_file(rel_path, content, language, audit=audit, db=db)
+
+                # Save issues and checkpoint to database; like a shard, a file
+                # only counts as processed once its checkpoint is committed
+                found = len(save_issues(audit, db, rel_path, issues))
+                save_checkpoint(audit, db, rel_path, found)
+                del content, issues
+
+                audit.processed_files = processed + 1
+                audit.issues_found = issues_found + found
                 db.commit()
-                
-                if (idx + 1) % 5 == 0 or (idx + 1) == len(files_to_analyze):
-                    append_log(audit, db, 'INFO', f'⚙️  Processed {idx + 1}/{len(files_to_analyze)} files ({len(all_issues)} issues found)')
-                
+                processed += 1
+                issues_found += found
+
+                if processed % 5 == 0 or processed == audit.total_files:
+                    append_log(audit, db, 'INFO', f'⚙️  Processed {processed}/{audit.total_files} files ({issues_found} issues found)')
+
+            except SoftTimeLimitExceeded:
+                raise
             except Exception as e:
+                # Discard the file's issues and checkpoint; a resume retries it
+                db.rollback()
                 logger.error(f"Error analyzing {file_path}: {e}")
-                err_str = str(e).lower()
                 append_log(audit, db, 'ERROR', f'❌ Error analyzing {os.path.basename(file_path)}: {str(e)[:100]}...')
-                
+
                 # If we hit a quota or persistent rate limit error, stop the entire audit
                 # to prevent looping errors for every single file.
-                if ("429" in err_str and "quota" in err_str) or "quota exceeded" in err_str:
-                    logger.error("Quota exceeded. Force-terminating audit.")
-                    db.rollback() 
-                    audit.status = AuditStatus.FAILED
-                    audit.error_message = f"AI Quota Exceeded: {str(e)}"
-                    audit.completed_at = datetime.utcnow()
-                    append_log(audit, db, 'ERROR', '🛑 Audit terminated: AI Quota Exceeded. Please check your plan/billing.')
-                    db.commit()
-                    return 
-                    
+                if is_quota_error(e):
+                    fail_audit_for_quota(audit, db, e)
+                    return
+
                 continue
-        
-        # Step 3: Apply fixes
-        if all_issues:
-            append_log(audit, db, 'INFO', f'🔧 Step 3: Applying fixes for {len(all_issues)} issues...')
-            audit.status = AuditStatus.FIXING
-            db.commit()
-            
-            fixes_applied = apply_fixes(clone_path, all_issues)
-            audit.fixes_applied = fixes_applied
-            db.commit()
-            append_log(audit, db, 'SUCCESS', f'✅ Applied {fixes_applied} fixes')
-        
-        # Step 4: Create Pull Request
-        if audit.fixes_applied > 0:
-            append_log(audit, db, 'INFO', f'📤 Step 4: Creating Pull Request...')
-            audit.status = AuditStatus.CREATING_PR
+
+        # Steps 3 & 4: Apply fixes and create Pull Request
+        fix_and_open_pr(audit, db, repository, clone_path, github_token=github_token, memory=memory)
+
+    except CloneStorageFull as e:
+        # Wait for disk space instead of failing the audit
+        db.rollback()
+        logger.warning(f"Audit {audit_id} deferred: {e}")
+        append_log(audit, db, 'WARNING', f'💽 {e}. Waiting for clone storage to free up...')
+        audit.status = AuditStatus.PENDING
+        requeue_audit(self, audit, db, settings.CLONE_STORAGE_RETRY_DELAY)
+
+    except SoftTimeLimitExceeded as e:
+        db.rollback()
+        try:
+            append_log(audit, db, 'WARNING', '⏱️ Soft time limit reached. Re-queuing audit to resume from the last checkpoint...')
+            raise self.retry(countdown=5, max_retries=settings.AUDIT_MAX_RESUMES)
+        except MaxRetriesExceededError:
+            append_log(audit, db, 'ERROR', f'❌ Audit failed: time limit exceeded after {settings.AUDIT_MAX_RESUMES} resumes')
+            audit.status = AuditStatus.FAILED
+            audit.error_message = "Time limit exceeded"
+            audit.completed_at = datetime.utcnow()
             db.commit()
-            
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Audit failed: {e}")
+        append_log(audit, db, 'ERROR', f'❌ Audit failed: {str(e)}')
+        audit.status = AuditStatus.FAILED
+        audit.error_message = str(e)
+        audit.completed_at = datetime.utcnow()
+        db.commit()
+
+    finally:
+        # Cleanup: Remove cloned repository
+        remove_clone(clone_path)
+
+
+def fix_and_open_pr(audit, db, repository, clone_path: str, github_token: str = None, memory: MemoryTracker = None):
+    """
+    Run the fix and Pull Request stages, then mark the audit as completed.
+
+    Issues are streamed from the database rather than passed in, so the
+    analysis stage never has to keep them in memory.
+
+    Args:
+        audit: Audit model instance
+        db: Database session
+        repository: Repository model
+        clone_path: Path to a checkout of the audited branch
+        github_token: Optional custom GitHub token
+        memory: Tracker for per-stage memory accounting
+    """
+    memory = memory or MemoryTracker()
+
+    # Step 3: Apply fixes
+    if audit.issues_found:
+        append_log(audit, db, 'INFO', f'🔧 Step 3: Applying fixes for {audit.issues_found} issues...')
+        audit.status = AuditStatus.FIXING
+        db.commit()
+
+        memory.mark('fix')
+        fix_paths = [
+            row[0] for row in
+            db.query(Issue.file_path).filter(Issue.audit_id == audit.id, Issue.is_fixed == 1).distinct()
+        ]
+        with stage_timer('fix'):
+            ensure_checked_out(clone_path, fix_paths)
+            fixes_applied = apply_fixes(clone_path, iter_fixable_issues(db, audit.id))
+        audit.fixes_applied = fixes_applied
+        db.commit()
+        append_log(audit, db, 'SUCCESS', f'✅ Applied {fixes_applied} fixes')
+
+    # Step 4: Create Pull Request
+    if audit.fixes_applied > 0:
+        append_log(audit, db, 'INFO', f'📤 Step 4: Creating Pull Request...')
+        audit.status = AuditStatus.CREATING_PR
+        db.commit()
+
+        memory.mark('pr')
+        with stage_timer('pr'):
             pr_url, pr_number = create_pull_request(
                 clone_path,
                 repository,
                 audit,
-                all_issues,
+                load_issue_summaries(db, audit.id),
                 db,
                 github_token=github_token
             )
-            
-            if pr_url:
-                audit.pr_url = pr_url
-                audit.pr_number = pr_number
-                append_log(audit, db, 'SUCCESS', f'🎉 Pull Request created: #{pr_number}')
-        
-        # Mark as completed
-        audit.status = AuditStatus.COMPLETED
-        audit.completed_at = datetime.utcnow()
-        append_log(audit, db, 'SUCCESS', f'✨ Audit completed successfully! Found {audit.issues_found} issues, applied {audit.fixes_applied} fixes')
+
+        if pr_url:
+            audit.pr_url = pr_url
+            audit.pr_number = pr_number
+            append_log(audit, db, 'SUCCESS', f'🎉 Pull Request created: #{pr_number}')
+
+    memory.finish()
+    append_log(audit, db, 'INFO', f'📊 Memory by stage: {memory.summary()}', data={'memory': memory.stages, 'db_seconds': current_db_seconds()})
+
+    # Mark as completed
+    audit.status = AuditStatus.COMPLETED
+    audit.completed_at = datetime.utcnow()
+    append_log(audit, db, 'SUCCESS', f'✨ Audit completed successfully! Found {audit.issues_found} issues, applied {audit.fixes_applied} fixes')
+    db.commit()
+
+    logger.info(f"Audit completed successfully for {repository.owner}/{repository.name}")
+
+
+def remove_clone(clone_path: str):
+    """Remove a cloned repository directory (and its owner file) if it exists."""
+    if clone_path and os.path.exists(clone_path):
+        try:
+            release_clone(clone_path)
+            logger.info(f"Cleaned up clone directory: {clone_path}")
+        except Exception as e:
+            logger.error(f"Failed to cleanup {clone_path}: {e}")
+
+
+# =============================================================================
+# Fan-out (sharded) audits
+# =============================================================================
+
+def dispatch_shards(audit, db, clone_path: str, files: list, github_token: str = None, gemini_api_key: str = None):
+    """
+    Split discovered files into shards and dispatch them as a chord.
+
+    Shards receive paths relative to the clone root, since every shard
+    clones the repository again on whichever worker picks it up. The
+    chord's callback ID is committed on the audit before the chord is
+    sent, and cleared by finalize_sharded_audit with the audit's final
+    state; until then, process_repository_audit won't dispatch again.
+
+    Args:
+        audit: Audit model instance
+        db: Database session
+        clone_path: Path to the orchestrator's clone
+        files: List of (file_path, language) tuples from discover_files
+    """
+    rel_files = [(os.path.relpath(path, clone_path), language) for path, language in files]
+    shards = split_into_shards(rel_files, settings.AUDIT_SHARD_SIZE)
+
+    append_log(audit, db, 'INFO', f'🧩 Fan-out: dispatching {len(shards)} shards of up to {settings.AUDIT_SHARD_SIZE} files')
+
+    audit.fanout = True
+    audit.chord_id = str(uuid.uuid4())
+    db.commit()
+
+    header = group(
+        analyze_audit_shard.s(audit.id, shard, gemini_api_key, shard_index=idx)
+        for idx, shard in enumerate(shards)
+    )
+    try:
+        chord(header)(finalize_sharded_audit.s(audit.id, github_token).set(task_id=audit.chord_id))
+    except Exception:
+        db.rollback()
+        audit.chord_id = None
         db.commit()
-        
-        logger.info(f"Audit completed successfully for {repository.owner}/{repository.name}")
-        
+        raise
+
+
+def append_shard_log(audit_id: int, db, level: str, message: str):
+    """Append a log entry while holding a row lock, so concurrent shards don't overwrite each other."""
+    audit = db.query(Audit).filter(Audit.id == audit_id).with_for_update().first()
+    if audit:
+        append_log(audit, db, level, message)
+
+
+@celery_app.task(base=AuditTask, bind=True, name="worker.tasks.audit_task.analyze_audit_shard")
+def analyze_audit_shard(self, audit_id: int, files: list, gemini_api_key: str = None, shard_index: int = 0, **kwargs):
+    """
+    Analyze one shard of a fan-out audit.
+
+    Progress counters are incremented atomically in SQL so shards running on
+    different workers can update the parent audit concurrently. Errors are
+    logged rather than raised, so a failing shard never blocks the chord.
+    Files checkpointed by an earlier delivery of the shard are skipped, so
+    a shard that hits the soft time limit is retried (up to
+    AUDIT_MAX_RESUMES times) and continues where it stopped.
+
+    Args:
+        audit_id: ID of the parent audit
+        files: List of (relative_path, language) pairs for this shard
+        shard_index: Position of the shard, used for logging
+        **kwargs: Contains db session injected by AuditTask
+
+    Returns:
+        Number of issues found in this shard
+    """
+    db = kwargs.get('db')
+    annotate_span({"audit.id": audit_id})
+    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+
+    if not audit or audit.status == AuditStatus.FAILED:
+        return 0
+
+    agent = get_agent(gemini_api_key)
+    repository = audit.repository
+    clone_path = None
+    found = 0
+
+    try:
+        done_files = load_checkpoints(db, audit_id)
+        files = [(rel_path, language) for rel_path, language in files if rel_path not in done_files]
+        if not files:
+            return 0
+
+        clone_path, _ = clone_repository(repository.url, repository.branch, task_id=self.request.id)
+
+        for rel_path, language in files:
+            # Stop if the audit was deleted or failed in another shard
+            db.expire_all()
+            audit = db.query(Audit).filter(Audit.id == audit_id).first()
+            if not audit or audit.status == AuditStatus.FAILED:
+                logger.warning(f"Audit {audit_id} is gone or failed. Stopping shard {shard_index}.")
+                break
+            db.commit()  # Return the connection to the pool while waiting on the LLM
+
+            issues = []
+            try:
+                file_path = os.path.join(clone_path, rel_path)
+                if os.path.getsize(file_path) > settings.MAX_FILE_SIZE:
+                    logger.warning(f"Skipping {file_path}: too large")
+                else:
+                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        content = f.read()
+                    with file_analysis_timer(language), start_span("analyze_file", {"file.path": rel_path, "file.language": language}):
+                        issues = agent.analyze_file(rel_path, content, language)
+                    save_issues(audit, db, rel_path, issues)
+                save_checkpoint(audit, db, rel_path, len(issues))
+                # Counted in the checkpoint's transaction: a failed file is not processed
+                db.query(Audit).filter(Audit.id == audit_id).update({
+                    Audit.processed_files: Audit.processed_files + 1,
+                    Audit.issues_found: Audit.issues_found + len(issues),
+                    Audit.version: Audit.version + 1,
+                }, synchronize_session=False)
+                db.commit()
+            except SoftTimeLimitExceeded:
+                raise
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error analyzing {rel_path}: {e}")
+                append_shard_log(audit_id, db, 'ERROR', f'❌ Error analyzing {os.path.basename(rel_path)}: {str(e)[:100]}...')
+                if is_quota_error(e):
+                    audit = db.query(Audit).filter(Audit.id == audit_id).with_for_update().first()
+                    if audit and audit.status != AuditStatus.FAILED:
+                        fail_audit_for_quota(audit, db, e)
+                    break
+                continue
+
+            publish_audit_progress(db, audit_id)  # Bulk UPDATEs bypass the event hooks
+            found += len(issues)
+
+        append_shard_log(audit_id, db, 'INFO', f'⚙️  Shard {shard_index + 1} finished {len(files)} files ({found} issues found)')
+
+    except CloneStorageFull as e:
+        db.rollback()
+        logger.warning(f"Shard {shard_index} of audit {audit_id} deferred: {e}")
+        raise self.retry(countdown=settings.CLONE_STORAGE_RETRY_DELAY, max_retries=None)
+
+    except SoftTimeLimitExceeded:
+        db.rollback()
+        try:
+            append_shard_log(audit_id, db, 'WARNING', f'⏱️ Shard {shard_index + 1} reached the soft time limit. Re-queuing it to resume from the last checkpoint...')
+            raise self.retry(countdown=5, max_retries=settings.AUDIT_MAX_RESUMES)
+        except MaxRetriesExceededError:
+            # finalize_sharded_audit fails the audit for the files left unanalyzed
+            append_shard_log(audit_id, db, 'ERROR', f'❌ Shard {shard_index + 1} failed: time limit exceeded after {settings.AUDIT_MAX_RESUMES} resumes')
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Shard {shard_index} of audit {audit_id} failed: {e}")
+        append_shard_log(audit_id, db, 'ERROR', f'❌ Shard {shard_index + 1} failed: {str(e)[:200]}')
+
+    finally:
+        remove_clone(clone_path)
+
+    return found
+
+
+@celery_app.task(base=AuditTask, bind=True, name="worker.tasks.audit_task.finalize_sharded_audit")
+def finalize_sharded_audit(self, shard_results: list, audit_id: int, github_token: str = None, **kwargs):
+    """
+    Chord callback for fan-out audits: apply fixes and open the Pull Request.
+
+    Shards never fail the chord, so an audit some of whose files were not
+    analyzed (a file errored or a shard gave up) is failed here instead of
+    completed. Completeness is judged from the file checkpoints rather than
+    the processed_files counter, which is only a progress indicator.
+
+    Args:
+        shard_results: Issue counts returned by each shard
+        audit_id: ID of the parent audit
+        **kwargs: Contains db session injected by AuditTask
+    """
+    db = kwargs.get('db')
+    annotate_span({"audit.id": audit_id})
+    audit = db.query(Audit).filter(Audit.id == audit_id).first()
+
+    if not audit:
+        return
+
+    # chord_id is cleared with the audit's final state, so a resume may dispatch new shards
+    if audit.status == AuditStatus.FAILED:
+        audit.chord_id = None
+        db.commit()
+        return
+
+    repository = audit.repository
+    clone_path = None
+
+    try:
+        analyzed = count_checkpoints(db, audit_id)
+        audit.processed_files = analyzed
+        append_log(audit, db, 'INFO', f'🧩 All {len(shard_results)} shards finished ({analyzed}/{audit.total_files} files)')
+
+        if analyzed < audit.total_files:
+            missing = audit.total_files - analyzed
+            append_log(audit, db, 'ERROR', f'❌ Audit failed: {missing} of {audit.total_files} files were not analyzed')
+            audit.status = AuditStatus.FAILED
+            audit.error_message = f"{missing} files were not analyzed"
+            audit.completed_at = datetime.utcnow()
+            audit.chord_id = None
+            db.commit()
+            return
+
+        audit.issues_found = count_issues(db, audit_id)
+        db.commit()
+
+        memory = MemoryTracker()
+        if audit.issues_found:
+            memory.mark('clone')
+            clone_path, _ = clone_repository(repository.url, repository.branch, task_id=self.request.id)
+
+        fix_and_open_pr(audit, db, repository, clone_path, github_token=github_token, memory=memory)
+        audit.chord_id = None
+        db.commit()
+
+    except CloneStorageFull as e:
+        db.rollback()
+        logger.warning(f"Finalizing audit {audit_id} deferred: {e}")
+        raise self.retry(countdown=settings.CLONE_STORAGE_RETRY_DELAY, max_retries=None)
+
     except Exception as e:
         db.rollback()
         logger.error(f"Audit failed: {e}")
@@ -271,19 +777,16 @@ def process_repository_audit(self, audit_id: int, github_token: str = None, gemi
         audit.status = AuditStatus.FAILED
         audit.error_message = str(e)
         audit.completed_at = datetime.utcnow()
+        audit.chord_id = None
         db.commit()
-    
+
     finally:
-        # Cleanup: Remove cloned repository
-        if clone_path and os.path.exists(clone_path):
-            try:
-                shutil.rmtree(clone_path)
-                logger.info(f"Cleaned up clone directory: {clone_path}")
-            except Exception as e:
-                logger.error(f"Failed to cleanup {clone_path}: {e}")
+        remove_clone(clone_path)
 
 
-def clone_repository(url: str, branch: str) -> tuple:
+@traced("clone_repository")
+@stage_timer('clone')
+def clone_repository(url: str, branch: str, task_id: str = None) -> tuple:
     """
     Clone a repository to local storage with automatic branch fallback.
     
@@ -294,23 +797,29 @@ def clone_repository(url: str, branch: str) -> tuple:
     Args:
         url: Repository URL
         branch: Branch to clone
+        task_id: Celery task that owns the clone (for the storage janitor)
         
     Returns:
         Path to cloned repository
+        
+    Raises:
+        CloneStorageFull: If the clone storage quota is exhausted
     """
     clone_dir = settings.CLONE_DIR
-    os.makedirs(clone_dir, exist_ok=True)
+    ensure_capacity()
     
     # Generate unique directory name
     repo_name = url.split('/')[-1].replace('.git', '')
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    clone_path = os.path.join(clone_dir, f"{repo_name}_{timestamp}")
+    # Suffix keeps concurrent clones (e.g. fan-out shards) from colliding
+    clone_path = os.path.join(clone_dir, f"{repo_name}_{timestamp}_{uuid.uuid4().hex[:8]}")
     
     logger.info(f"Cloning {url} to {clone_path}")
+    register_clone(clone_path, task_id)
     
     # Try to clone with specified branch
     try:
-        git.Repo.clone_from(url, clone_path, branch=branch, depth=1)
+        fetch_branch(url, clone_path, branch)
         logger.info(f"Successfully cloned branch '{branch}'")
         return clone_path, branch
     except git.GitCommandError as e:
@@ -331,7 +840,7 @@ def clone_repository(url: str, branch: str) -> tuple:
             for fallback in fallback_branches:
                 try:
                     logger.info(f"Attempting to clone with branch '{fallback}'...")
-                    git.Repo.clone_from(url, clone_path, branch=fallback, depth=1)
+                    fetch_branch(url, clone_path, fallback)
                     logger.info(f"✅ Successfully cloned using fallback branch '{fallback}'")
                     return clone_path, fallback
                 except git.GitCommandError:
@@ -346,6 +855,67 @@ def clone_repository(url: str, branch: str) -> tuple:
             raise
 
 
+def fetch_branch(url: str, clone_path: str, branch: str):
+    """
+    Clone a single branch into clone_path using the configured CLONE_MODE.
+
+    "full" is a plain shallow clone. "sparse" (default) is a shallow partial
+    clone (--filter=blob:none) with a non-cone sparse checkout: only blobs of
+    analyzable files (SUPPORTED_EXTENSIONS, outside SKIP_PATTERNS) are
+    downloaded; images, datasets, lockfiles and vendored code never are.
+    Other files can be fetched lazily later with ensure_checked_out().
+
+    Servers that don't support filters silently fall back to a full fetch,
+    and a git without non-cone sparse checkout falls back to a full checkout.
+    """
+    if settings.CLONE_MODE != "sparse":
+        git.Repo.clone_from(url, clone_path, branch=branch, depth=1)
+        return
+
+    repo = git.Repo.clone_from(
+        url, clone_path, branch=branch, depth=1,
+        filter='blob:none', no_checkout=True,
+    )
+    try:
+        repo.git.sparse_checkout('set', '--no-cone', *sparse_checkout_patterns())
+    except git.GitCommandError as e:
+        logger.warning(f"Sparse checkout unavailable, checking out all files: {e}")
+    repo.git.checkout(branch)
+
+
+@traced("ensure_checked_out")
+def ensure_checked_out(repo_path: str, rel_paths) -> int:
+    """
+    Make sure files outside the sparse checkout exist in the working tree.
+
+    Missing paths are added to the sparse-checkout set, which lazily fetches
+    just their blobs from the partial clone's remote.
+
+    Args:
+        repo_path: Path to repository
+        rel_paths: Iterable of paths relative to the repository root
+
+    Returns:
+        Number of paths that had to be fetched
+    """
+    missing = [
+        path for path in rel_paths
+        if not os.path.exists(os.path.join(repo_path, path))
+    ]
+    if not missing:
+        return 0
+
+    try:
+        # Anchor each path so it matches only that file; fails harmlessly on non-sparse clones
+        git.Repo(repo_path).git.sparse_checkout('add', *[f"/{path}" for path in missing])
+    except git.GitCommandError as e:
+        logger.warning(f"Failed to fetch {len(missing)} files outside the sparse checkout: {e}")
+        return 0
+    return len(missing)
+
+
+@traced("discover_files")
+@stage_timer('discover')
 def discover_files(repo_path: str) -> list:
     """
     Discover files to analyze using RAG (Intelligent Context Retrieval).
@@ -383,114 +953,111 @@ def discover_files(repo_path: str) -> list:
     return files
 
 
-def apply_fixes(repo_path: str, issues: list) -> int:
+@traced("apply_fixes")
+def apply_fixes(repo_path: str, issues) -> int:
     """
     Apply fixes to files.
     
+    Consecutive issues for the same file are applied in one read/write, so
+    passing issues ordered by file (see iter_fixable_issues) touches each
+    file once. Any iterable works, including a streaming query.
+    
     Args:
         repo_path: Path to repository
-        issues: List of Issue objects
+        issues: Iterable of Issue objects
         
     Returns:
         Number of fixes applied
     """
     fixes_applied = 0
     
-    for issue in issues:
-        if not issue.fixed_code or not issue.is_fixed:
+    for rel_path, file_issues in groupby(issues, key=lambda issue: issue.file_path):
+        file_path = os.path.join(repo_path, rel_path)
+        
+        if not os.path.exists(file_path):
+            logger.warning(f"File not found: {file_path}")
             continue
         
         try:
-            file_path = os.path.join(repo_path, issue.file_path)
-            
-            if not os.path.exists(file_path):
-                logger.warning(f"File not found: {file_path}")
-                continue
-            
             # Read current content
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
+        except Exception as e:
+            logger.error(f"Failed to apply fix to {rel_path}: {e}")
+            continue
+        
+        file_fixes = 0
+        for issue in file_issues:
+            if not issue.fixed_code or not issue.is_fixed:
+                continue
             
             # Replace original with fixed code
             if issue.original_code and issue.original_code in content:
                 content = content.replace(issue.original_code, issue.fixed_code)
-                
+                file_fixes += 1
+        
+        if file_fixes:
+            try:
                 # Write back
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write(content)
                 
-                fixes_applied += 1
-                logger.info(f"Applied fix to {issue.file_path}")
-            
-        except Exception as e:
-            logger.error(f"Failed to apply fix to {issue.file_path}: {e}")
+                fixes_applied += file_fixes
+                logger.info(f"Applied {file_fixes} fix(es) to {rel_path}")
+            except Exception as e:
+                logger.error(f"Failed to apply fix to {rel_path}: {e}")
     
     return fixes_applied
 
 
+@traced("create_pull_request")
 def create_pull_request(repo_path: str, repository: Repository, audit: Audit, issues: list, db: Session, github_token: str = None) -> tuple:
     """
     Create a Pull Request with the fixes.
     
     Safety Valve: Never commits to main, always creates a branch.
-    
+
+    With PR_CREATION_MODE="api" the commit is built server-side through the
+    Git Data API from only the changed files, so nothing is pushed and a
+    shallow/sparse clone is enough. "push" commits locally and pushes.
+
     Args:
         repo_path: Path to repository
         repository: Repository model
         audit: Audit model
-        issues: List of Issue objects
-        
+        issues: List of Issue objects or IssueSummary tuples
+
     Returns:
         Tuple of (PR URL, PR number)
     """
     try:
         repo = git.Repo(repo_path)
-        
-        # Create new branch
         branch_name = f"fix/ai-auto-patch-{audit.id}"
-        repo.git.checkout('-b', branch_name)
-        
-        # Stage all changes
-        repo.git.add('--all')
-        
+        token = github_token or settings.GITHUB_TOKEN
+
         # Create commit
-        commit_message = f"""🤖 AutoDev Agent: Fix {len(issues)} issues
+        commit_lines = [f"""🤖 AutoDev Agent: Fix {len(issues)} issues
 
 This PR was automatically generated by AutoDev Agent.
 
 Issues fixed:
-"""
+"""]
         
         for issue in issues[:10]:  # Limit to first 10 in commit message
-            commit_message += f"- {issue.issue_type.value}: {issue.description}\n"
+            commit_lines.append(f"- {issue.issue_type.value}: {issue.description}\n")
         
         if len(issues) > 10:
-            commit_message += f"- ... and {len(issues) - 10} more\n"
-        
-        repo.index.commit(commit_message)
-        
-        # Push to origin
-        # Authenticate with token
-        token = github_token or settings.GITHUB_TOKEN
-        clean_url = repository.url.rstrip("/")
-        auth_url = clean_url.replace("https://", f"https://{token}@")
-        if not auth_url.endswith(".git"):
-            auth_url += ".git"
-            
-        repo.remotes.origin.set_url(auth_url)
-        try:
-            repo.remotes.origin.push(branch_name)
-        except git.GitCommandError as e:
-            if "403" in str(e):
-                logger.error(f"Git Push failed with 403: {e}")
-                append_log(audit, db, 'ERROR', '❌ Git Push failed (403 Forbidden). Your GitHub Token likely is missing the "repo" scope. Please regenerate it with "repo" permission.')
-                raise e
-            else:
-                raise e
+            commit_lines.append(f"- ... and {len(issues) - 10} more\n")
         
+        commit_message = "".join(commit_lines)
+
+        if settings.PR_CREATION_MODE != "api":
+            push_branch(repo, repository, audit, db, branch_name, commit_message, token)
+
         # Create PR via GitHub API
         pr_title = f"🤖 AutoDev Agent: Fix {len(issues)} issues"
-        pr_body = f"""## AutoDev Agent - Automated Code Fixes
+        # Assemble the body from parts; repeated += is quadratic on large audits
+        pr_body_parts = [f"""## AutoDev Agent - Automated Code Fixes
 
 This Pull Request was automatically generated by [AutoDev Agent](https://github.com/your-org/autodev-agent).
 
@@ -500,10 +1067,10 @@ This Pull Request was automatically generated by [AutoDev Agent](https://github.
 
 ### Issues Fixed
 
-"""
+"""]
         
         for issue in issues:
-            pr_body += f"""
+            pr_body_parts.append(f"""
 #### {issue.issue_type.value.replace('_', ' ').title()} - {issue.severity.value.upper()}
 **File**: `{issue.file_path}`
 **Description**: {issue.description}
@@ -511,9 +1078,9 @@ This Pull Request was automatically generated by [AutoDev Agent](https://github.
 {f'**Line**: {issue.line_number}' if issue.line_number else ''}
 
 ---
-"""
+""")
         
-        pr_body += """
+        pr_body_parts.append("""
 
 ### ⚠️ Important
 Please review these changes carefully before merging. While the AI has done its best to provide accurate fixes, human review is essential.
@@ -526,19 +1093,31 @@ Please review these changes carefully before merging. While the AI has done its
 
 ---
 *Generated by AutoDev Agent powered by Google Gemini 1.5 Flash*
-"""
+""")
+        pr_body = "".join(pr_body_parts)
         
         # Create PR
         gh_svc = GitHubService(token=token) if github_token else github_service
         
-        pr_url, pr_number = gh_svc.create_pull_request(
-            repo_full_name=f"{repository.owner}/{repository.name}",
-            branch_name=branch_name,
-            title=pr_title,
-            body=pr_body,
-            base_branch=repository.branch
-        )
-        
+        if settings.PR_CREATION_MODE == "api":
+            pr_url, pr_number = gh_svc.create_pull_request_from_files(
+                repo_full_name=f"{repository.owner}/{repository.name}",
+                branch_name=branch_name,
+                files=collect_changed_files(repo),
+                commit_message=commit_message,
+                title=pr_title,
+                body=pr_body,
+                base_branch=repository.branch
+            )
+        else:
+            pr_url, pr_number = gh_svc.create_pull_request(
+                repo_full_name=f"{repository.owner}/{repository.name}",
+                branch_name=branch_name,
+                title=pr_title,
+                body=pr_body,
+                base_branch=repository.branch
+            )
+
         return pr_url, pr_number
         
     except Exception as e:
@@ -549,3 +1128,66 @@ Please review these changes carefully before merging. While the AI has done its
         except:
              pass
         return None, None
+
+
+@traced("push_branch")
+def push_branch(repo, repository: Repository, audit: Audit, db: Session, branch_name: str, commit_message: str, token: str):
+    """
+    Commit the working tree changes on a new branch and push it to origin.
+    
+    Args:
+        repo: git.Repo of the clone
+        repository: Repository model
+        audit: Audit model
+        db: Database session
+        branch_name: Branch to create and push
+        commit_message: Commit message
+        token: GitHub token used to authenticate the push
+    """
+    # Create new branch
+    repo.git.checkout('-b', branch_name)
+    
+    # Stage all changes
+    repo.git.add('--all')
+    repo.index.commit(commit_message)
+    
+    # Push to origin
+    # Authenticate with token
+    clean_url = repository.url.rstrip("/")
+    auth_url = clean_url.replace("https://", f"https://{token}@")
+    if not auth_url.endswith(".git"):
+        auth_url += ".git"
+        
+    repo.remotes.origin.set_url(auth_url)
+    try:
+        repo.remotes.origin.push(branch_name)
+    except git.GitCommandError as e:
+        if "403" in str(e):
+            logger.error(f"Git Push failed with 403: {e}")
+            append_log(audit, db, 'ERROR', '❌ Git Push failed (403 Forbidden). Your GitHub Token likely is missing the "repo" scope. Please regenerate it with "repo" permission.')
+            raise e
+        else:
+            raise e
+
+
+@traced("collect_changed_files")
+def collect_changed_files(repo) -> list:
+    """
+    Collect the files modified in the working tree, for the Git Data API.
+    
+    Args:
+        repo: git.Repo of the clone
+        
+    Returns:
+        List of (path, content bytes, git file mode) tuples
+    """
+    changed = []
+    for diff in repo.index.diff(None):
+        if diff.deleted_file:
+            continue
+        path = diff.b_path or diff.a_path
+        with open(os.path.join(repo.working_tree_dir, path), 'rb') as f:
+            content = f.read()
+        mode = oct(diff.b_mode or diff.a_mode or 0o100644)[2:]
+        changed.append((path, content, mode))
+    return changed
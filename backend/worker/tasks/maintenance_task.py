@@ -0,0 +1,110 @@
+"""
+Maintenance tasks - Periodic housekeeping for the worker fleet.
+"""
+import logging
+from datetime import datetime
+
+from worker.worker import celery_app
+from worker.clone_storage import reclaim_orphans, storage_usage
+from app.core.compaction import compact_storage as run_compaction
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.purge import purge_audits, purge_conditions
+from app.core.stats import rebuild_audit_counters
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+@celery_app.task(name="worker.tasks.maintenance_task.cleanup_clone_storage")
+def cleanup_clone_storage():
+    """
+    Reclaim orphaned clone directories and report clone storage usage.
+    
+    Runs on worker startup and periodically via Celery beat.
+    
+    Returns:
+        Storage usage after cleanup, plus the bytes reclaimed
+    """
+    reclaimed = reclaim_orphans()
+    usage = storage_usage()
+    usage["reclaimed_bytes"] = reclaimed
+    
+    logger.info(
+        f"Clone storage: {usage['clone_count']} clones, {usage['used_bytes'] / MB:.0f}MB used "
+        f"of {usage['quota_bytes'] / MB:.0f}MB, reclaimed {reclaimed / MB:.0f}MB"
+    )
+    return usage
+
+
+@celery_app.task(name="worker.tasks.maintenance_task.reconcile_audit_counters")
+def reconcile_audit_counters():
+    """
+    Rebuild the dashboard's audit_counters table from the audits table.
+    
+    The counters are maintained on every status transition; this periodic
+    rebuild (Celery beat) repairs drift from writes that bypass the ORM.
+    
+    Returns:
+        Finished audits per status
+    """
+    db = SessionLocal()
+    try:
+        counters = rebuild_audit_counters(db)
+    finally:
+        db.close()
+    
+    logger.info(f"Audit counters rebuilt: {counters}")
+    return counters
+
+
+@celery_app.task(name="worker.tasks.maintenance_task.purge_finished_audits")
+def purge_finished_audits(older_than: str = None, repository_id: int = None):
+    """
+    Delete finished audits in the background, AUDIT_PURGE_CHUNK_SIZE at a time.
+    
+    Queued by POST /api/audits/purge for purges too large to run inline.
+    
+    Args:
+        older_than: ISO timestamp; audits created before it are purged
+        repository_id: Only purge audits of this repository
+        
+    Returns:
+        Number of audits deleted
+    """
+    conditions = purge_conditions(
+        older_than=datetime.fromisoformat(older_than) if older_than else None,
+        repository_id=repository_id,
+    )
+    db = SessionLocal()
+    try:
+        deleted = purge_audits(db, conditions, settings.AUDIT_PURGE_CHUNK_SIZE)
+    finally:
+        db.close()
+    
+    logger.info(f"Purge finished: {deleted} audits deleted")
+    return deleted
+
+
+@celery_app.task(name="worker.tasks.maintenance_task.compact_storage")
+def compact_storage():
+    """
+    Compact finished audits: issue fixes become diffs, old logs are archived.
+    
+    Runs periodically via Celery beat; API responses are unchanged.
+    
+    Returns:
+        Issues compacted, logs archived and bytes saved
+    """
+    db = SessionLocal()
+    try:
+        totals = run_compaction(db, settings.STORAGE_COMPACTION_BATCH_SIZE, settings.LOG_ARCHIVE_AFTER_DAYS)
+    finally:
+        db.close()
+    
+    logger.info(
+        f"Storage compaction: {totals['issues_compacted']} issues, {totals['logs_archived']} logs archived, "
+        f"{(totals['issue_bytes_saved'] + totals['log_bytes_saved']) / MB:.1f}MB saved"
+    )
+    return totals
@@ -1,27 +1,106 @@
 """
 Celery worker configuration and initialization.
 """
+import os
+
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown, worker_ready
 from app.core.config import settings
+from app.core.task_queue import celery_config
+from worker.io_pool import patch_for_gevent
+
+# No-op under prefork; required before any DB or Gemini call under gevent
+patch_for_gevent()
+
+# Pool processes share their metrics through files; must be set before prometheus_client is imported
+if settings.WORKER_METRICS_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.WORKER_METRICS_DIR)
+
+from app.core.database import engine
+from app.core.events import install_event_hooks
+from app.core.tracing import configure_tracing, flush_spans, install_celery_tracing
+from worker.metrics import install_db_timing
+
+# Publish status, progress, log and issue changes as live audit events
+install_event_hooks()
+
+# Measure database time per task (autodev_task_db_seconds)
+install_db_timing(engine)
 
 # Create Celery application
 celery_app = Celery(
     "autodev_worker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["worker.tasks.audit_task"]
+    include=["worker.tasks.audit_task", "worker.tasks.maintenance_task"]
 )
 
-# Configure Celery
+# Run tasks in spans continuing the publisher's trace (no-op unless TRACING_EXPORTER is set)
+install_celery_tracing()
+
+# Configure Celery (serialization, queues and priorities are shared with the API)
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
+    **celery_config(),
     task_track_started=True,
     task_time_limit=3600,  # 1 hour max per task
     task_soft_time_limit=3000,  # 50 minutes soft limit
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=10,  # Restart worker after 10 tasks
+    # Recycle children on measured memory (KB) rather than a fixed task count
+    worker_max_memory_per_child=settings.WORKER_MAX_MEMORY_PER_CHILD_MB * 1024 or None,
+    worker_max_tasks_per_child=settings.WORKER_MAX_TASKS_PER_CHILD or None,
+    # Redeliver audits whose worker died mid-task; they resume from checkpoints
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Periodic housekeeping (requires a beat process: `celery -A worker.worker beat`)
+    beat_schedule={
+        "cleanup-clone-storage": {
+            "task": "worker.tasks.maintenance_task.cleanup_clone_storage",
+            "schedule": settings.CLONE_JANITOR_INTERVAL,
+        },
+        "reconcile-audit-counters": {
+            "task": "worker.tasks.maintenance_task.reconcile_audit_counters",
+            "schedule": settings.STATS_RECONCILE_INTERVAL,
+        },
+        "compact-storage": {
+            "task": "worker.tasks.maintenance_task.compact_storage",
+            "schedule": settings.STORAGE_COMPACTION_INTERVAL,
+        },
+    },
 )
+
+
+@worker_init.connect
+def reset_metrics(**kwargs):
+    """Start from empty metrics: files left by a previous run would be counted again."""
+    from worker.metrics import reset_multiprocess_dir
+    reset_multiprocess_dir()
+
+
+@worker_init.connect
+def start_tracing(**kwargs):
+    """Install the span exporter before the pool forks (children inherit it)."""
+    configure_tracing("autodev-worker")
+
+
+@worker_ready.connect
+def reclaim_clone_storage(**kwargs):
+    """Reclaim clones orphaned by a previous crash before accepting work."""
+    from worker.clone_storage import reclaim_orphans
+    reclaim_orphans()
+
+
+@worker_ready.connect
+def serve_metrics(**kwargs):
+    """Expose the metrics of all pool processes on WORKER_METRICS_PORT."""
+    if settings.WORKER_METRICS_PORT:
+        from worker.metrics import start_metrics_server
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def release_process_metrics(pid=None, **kwargs):
+    """Forget the live values of an exited pool process and export its last spans."""
+    from worker.metrics import mark_process_dead
+    mark_process_dead(pid or os.getpid())
+    flush_spans()
+
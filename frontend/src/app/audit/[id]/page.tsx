@@ -4,7 +4,7 @@ import { useState, useEffect } from 'react';
 import { useRouter } from 'next/navigation';
 import { ArrowLeft, GitBranch, FileCode, AlertTriangle, CheckCircle, Code2, ExternalLink, Clock } from 'lucide-react';
 import Link from 'next/link';
-import { auditAPI, AuditDetail } from '@/lib/api';
+import { auditAPI, subscribeToAudit, AuditDetail, AuditProgress, Issue, LogEntry } from '@/lib/api';
 import { formatRelativeTime, getStatusColor, formatStatus, getSeverityColor } from '@/lib/utils';
 import LiveLogs from '@/components/LiveLogs';
 
@@ -13,12 +13,22 @@ export default function AuditDetailPage({ params }: { params: { id: string } })
     const [audit, setAudit] = useState<AuditDetail | null>(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
+    const [streaming, setStreaming] = useState(true);
 
     useEffect(() => {
+        const auditId = parseInt(params.id);
+        let source: EventSource | null = null;
+        let interval: ReturnType<typeof setInterval> | null = null;
+        let cancelled = false;
+
         const fetchAudit = async () => {
             try {
-                const data = await auditAPI.getAudit(parseInt(params.id));
+                const data = await auditAPI.getAudit(auditId);
                 setAudit(data);
+                if (interval && ['completed', 'failed'].includes(data.status)) {
+                    clearInterval(interval);
+                }
+                return data;
             } catch (err) {
                 console.error('Failed to fetch audit:', err);
                 setError('Failed to load audit details');
@@ -27,17 +37,65 @@ export default function AuditDetailPage({ params }: { params: { id: string } })
             }
         };
 
-        fetchAudit();
+        // Fall back to polling when the event stream is unavailable
+        const startPolling = () => {
+            source?.close();
+            setStreaming(false);
+            if (!interval) {
+                interval = setInterval(fetchAudit, 5000);
+            }
+        };
+
+        const applyProgress = (progress: AuditProgress) => {
+            setAudit((prev) => prev ? { ...prev, ...progress, id: prev.id } : prev);
+        };
 
-        // Auto-refresh every 5 seconds if audit is in progress
-        const interval = setInterval(() => {
-            if (audit && !['completed', 'failed'].includes(audit.status)) {
-                fetchAudit();
+        const openStream = () => {
+            source = subscribeToAudit(auditId, {
+                snapshot: (snapshot) => setAudit((prev) => prev ? { ...prev, ...snapshot } : prev),
+                status: applyProgress,
+                progress: applyProgress,
+                log: (entry: LogEntry) => {
+                    setAudit((prev) => prev ? { ...prev, logs: [...(prev.logs || []), entry] } : prev);
+                },
+                issue: (issue: Issue) => {
+                    setAudit((prev) => {
+                        if (!prev || prev.issues.some((existing) => existing.id === issue.id)) {
+                            return prev;
+                        }
+                        return { ...prev, issues: [...prev.issues, { ...issue, created_at: new Date().toISOString() }] };
+                    });
+                },
+                // Reload once at the end to pick up code blocks and fix status of every issue
+                end: () => {
+                    source?.close();
+                    fetchAudit();
+                },
+            }, () => {
+                if (source?.readyState === EventSource.CLOSED) {
+                    startPolling();
+                }
+            });
+        };
+
+        fetchAudit().then((data) => {
+            if (!cancelled && data && !['completed', 'failed'].includes(data.status)) {
+                if (typeof EventSource === 'undefined') {
+                    startPolling();
+                } else {
+                    openStream();
+                }
             }
-        }, 5000);
+        });
 
-        return () => clearInterval(interval);
-    }, [params.id, audit?.status]);
+        return () => {
+            cancelled = true;
+            source?.close();
+            if (interval) {
+                clearInterval(interval);
+            }
+        };
+    }, [params.id]);
 
     if (loading) {
         return (
@@ -181,7 +239,7 @@ export default function AuditDetailPage({ params }: { params: { id: string } })
 
                 {/* Live Logs */}
                 <div className="mb-8">
-                    <LiveLogs auditId={audit.id} status={audit.status} />
+                    <LiveLogs logs={audit.logs || []} status={audit.status} streaming={streaming} />
                 </div>
 
                 {/* Issues List */}
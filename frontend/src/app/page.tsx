@@ -5,7 +5,7 @@ import { Bot, Github, Sparkles, RefreshCw, ExternalLink } from 'lucide-react';
 import RepoForm from '@/components/RepoForm';
 import StatsCard from '@/components/StatsCard';
 import AuditList from '@/components/AuditList';
-import { auditAPI, Audit, Statistics } from '@/lib/api';
+import { auditAPI, subscribeToAllAudits, Audit, AuditProgress, Statistics } from '@/lib/api';
 
 export default function HomePage() {
     const [audits, setAudits] = useState<Audit[]>([]);
@@ -32,9 +32,48 @@ export default function HomePage() {
     useEffect(() => {
         fetchData();
 
-        // Auto-refresh every 10 seconds
-        const interval = setInterval(fetchData, 10000);
-        return () => clearInterval(interval);
+        let interval: ReturnType<typeof setInterval> | null = null;
+        let refreshTimer: ReturnType<typeof setTimeout> | null = null;
+
+        // Fall back to auto-refresh every 10 seconds without the event stream
+        const startPolling = () => {
+            if (!interval) {
+                interval = setInterval(fetchData, 10000);
+            }
+        };
+
+        if (typeof EventSource === 'undefined') {
+            startPolling();
+            return () => {
+                if (interval) clearInterval(interval);
+            };
+        }
+
+        const applyProgress = (progress: AuditProgress) => {
+            setAudits((prev) => prev.map((audit) => (
+                audit.id === progress.audit_id ? { ...audit, ...progress, id: audit.id } : audit
+            )));
+        };
+
+        // Status transitions (and new audits) change the list and statistics: refetch, debounced
+        const source = subscribeToAllAudits({
+            status: (progress: AuditProgress) => {
+                applyProgress(progress);
+                if (refreshTimer) clearTimeout(refreshTimer);
+                refreshTimer = setTimeout(fetchData, 500);
+            },
+            progress: applyProgress,
+        }, () => {
+            if (source.readyState === EventSource.CLOSED) {
+                startPolling();
+            }
+        });
+
+        return () => {
+            source.close();
+            if (interval) clearInterval(interval);
+            if (refreshTimer) clearTimeout(refreshTimer);
+        };
     }, []);
 
     const handleRefresh = () => {
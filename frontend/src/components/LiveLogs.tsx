@@ -2,21 +2,15 @@
 
 import { useState, useEffect, useRef } from 'react';
 import { Terminal, ChevronDown, ChevronUp } from 'lucide-react';
-import { API_URL } from '@/lib/api';
+import { LogEntry } from '@/lib/api';
 
 interface LiveLogsProps {
-    auditId: number;
+    logs: LogEntry[];
     status: string;
+    streaming?: boolean;
 }
 
-interface LogEntry {
-    timestamp: string;
-    level: string;
-    message: string;
-}
-
-export default function LiveLogs({ auditId, status }: LiveLogsProps) {
-    const [logs, setLogs] = useState<LogEntry[]>([]);
+export default function LiveLogs({ logs, status, streaming = true }: LiveLogsProps) {
     const [isCollapsed, setIsCollapsed] = useState(false);
     const logsContainerRef = useRef<HTMLDivElement>(null);
 
@@ -35,33 +29,6 @@ export default function LiveLogs({ auditId, status }: LiveLogsProps) {
         scrollToBottom();
     }, [logs]);
 
-    useEffect(() => {
-        const fetchLogs = async () => {
-            try {
-                const response = await fetch(`${API_URL}/api/audits/${auditId}`);
-                const data = await response.json();
-
-                if (data.logs && Array.isArray(data.logs)) {
-                    setLogs(data.logs);
-                }
-            } catch (error) {
-                console.error('Failed to fetch logs:', error);
-            }
-        };
-
-        // Initial fetch
-        fetchLogs();
-
-        // Poll every 2 seconds if audit is in progress
-        const interval = setInterval(() => {
-            if (!['completed', 'failed'].includes(status)) {
-                fetchLogs();
-            }
-        }, 2000);
-
-        return () => clearInterval(interval);
-    }, [auditId, status]);
-
     const getLogColor = (level: string) => {
         switch (level.toLowerCase()) {
             case 'error':
@@ -130,7 +97,7 @@ export default function LiveLogs({ auditId, status }: LiveLogsProps) {
                     {!['completed', 'failed'].includes(status) && logs.length > 0 && (
                         <div className="mt-4 pt-4 border-t border-dark-800/50 flex items-center gap-2 text-xs text-dark-500">
                             <div className="w-2 h-2 bg-green-400 rounded-full animate-pulse" />
-                            <span>Live - Updates every 2 seconds</span>
+                            <span>{streaming ? 'Live - Streaming updates' : 'Live - Updates every 5 seconds'}</span>
                         </div>
                     )}
                 </div>
@@ -51,6 +51,9 @@ export interface Audit {
     created_at: string;
     started_at?: string;
     completed_at?: string;
+    branch?: string;
+    commit_sha?: string;
+    version?: number;
     logs?: any[];
 }
 
@@ -59,6 +62,25 @@ export interface AuditDetail extends Audit {
     issues: Issue[];
 }
 
+export interface LogEntry {
+    timestamp: string;
+    level: string;
+    message: string;
+    data?: any;
+}
+
+export interface AuditProgress {
+    audit_id: number;
+    status: string;
+    total_files: number;
+    processed_files: number;
+    issues_found: number;
+    fixes_applied: number;
+    pr_url?: string;
+    pr_number?: number;
+    error_message?: string;
+}
+
 export interface Statistics {
     total_audits: number;
     completed_audits: number;
@@ -105,6 +127,30 @@ export const auditAPI = {
     },
 };
 
+// Live events (Server-Sent Events)
+export type EventHandlers = Record<string, (data: any) => void>;
+
+/**
+ * Open an EventSource on an events endpoint and dispatch its named events.
+ * The browser reconnects automatically; each reconnect starts with a fresh snapshot.
+ */
+export const subscribeToEvents = (path: string, handlers: EventHandlers, onError?: () => void) => {
+    const source = new EventSource(`${API_URL}${path}`);
+    Object.entries(handlers).forEach(([type, handler]) => {
+        source.addEventListener(type, (event) => handler(JSON.parse((event as MessageEvent).data)));
+    });
+    source.onerror = () => onError?.();
+    return source;
+};
+
+// Events of one audit: snapshot, status, progress, log, issue, end
+export const subscribeToAudit = (id: number, handlers: EventHandlers, onError?: () => void) =>
+    subscribeToEvents(`/api/audits/${id}/events`, handlers, onError);
+
+// Status and progress events of all audits (dashboard)
+export const subscribeToAllAudits = (handlers: EventHandlers, onError?: () => void) =>
+    subscribeToEvents('/api/audits/events', handlers, onError);
+
 // Standalone exports for easier imports
 export const createAudit = auditAPI.createAudit;
 export const getAudits = auditAPI.getAudits;